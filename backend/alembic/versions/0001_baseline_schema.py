@@ -0,0 +1,97 @@
+"""Baseline schema (tables created by create_all before migrations)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("phone", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_phone", "users", ["phone"], unique=True)
+
+    op.create_table(
+        "fields",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("area", sa.Float(), nullable=False),
+        sa.Column("crop_type", sa.String(), nullable=False),
+        sa.Column("variety", sa.String()),
+        sa.Column("soil_type", sa.String()),
+        sa.Column("planting_date", sa.DateTime()),
+        sa.Column("expected_harvest_date", sa.DateTime()),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+        sa.Column("status", sa.String()),
+        sa.Column("owner_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_fields_id", "fields", ["id"])
+
+    op.create_table(
+        "operations",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("field_id", sa.String(), sa.ForeignKey("fields.id"), nullable=False),
+        sa.Column("notes", sa.String()),
+        sa.Column("cost", sa.Float()),
+        sa.Column("water_amount", sa.Float()),
+        sa.Column("irrigation_method", sa.String()),
+        sa.Column("duration", sa.Float()),
+        sa.Column("fertilizer_type", sa.String()),
+        sa.Column("fertilizer_quantity", sa.Float()),
+        sa.Column("npk_ratio", sa.String()),
+        sa.Column("product_name", sa.String()),
+        sa.Column("product_quantity", sa.Float()),
+        sa.Column("target_pest", sa.String()),
+        sa.Column("harvest_quantity", sa.Float()),
+        sa.Column("quality", sa.String()),
+        sa.Column("extra_data", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_operations_id", "operations", ["id"])
+
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("priority", sa.String()),
+        sa.Column("is_read", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("alerts")
+    op.drop_table("operations")
+    op.drop_table("fields")
+    op.drop_table("users")
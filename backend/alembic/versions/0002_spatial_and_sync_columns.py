@@ -0,0 +1,255 @@
+"""Spatial columns on fields, sync versions and tombstones
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:10:00
+
+"""
+import math
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copie figée de app.utils.geo (révision 0002) : la migration ne dépend pas du code courant
+_WEATHER_GRID_STEP = 0.1
+_GEOHASH_PRECISION = 7
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_MGRS_LAT_BANDS = "CDEFGHJKLMNPQRSTUVWX"
+_MGRS_COL_SETS = ("ABCDEFGH", "JKLMNPQR", "STUVWXYZ")
+_MGRS_ROW_LETTERS = "ABCDEFGHJKLMNPQRSTUV"
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+_UTM_K0 = 0.9996
+
+
+def _geohash_encode(latitude: float, longitude: float, precision: int = _GEOHASH_PRECISION) -> str:
+    """
+    Encoder une position en geohash
+
+    Args:
+        latitude: Latitude (degrés)
+        longitude: Longitude (degrés)
+        precision: Nombre de caractères
+
+    Returns:
+        Chaîne geohash (base32)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def _weather_grid_cell(latitude: float, longitude: float, step: float = _WEATHER_GRID_STEP) -> str:
+    """
+    Identifiant de la cellule de grille météo contenant le point
+
+    Les parcelles d'une même cellule partagent les mêmes prévisions
+    Open-Meteo / NASA POWER.
+    """
+    row = math.floor((latitude + 90.0) / step)
+    col = math.floor((longitude + 180.0) / step)
+    return f"{step:g}:{row}:{col}"
+
+
+def _utm_zone(latitude: float, longitude: float) -> int:
+    """Numéro de zone UTM (avec les exceptions Norvège/Svalbard)"""
+    zone = int((longitude + 180.0) / 6.0) + 1
+    if zone > 60:
+        zone = 60
+    if 56.0 <= latitude < 64.0 and 3.0 <= longitude < 12.0:
+        zone = 32
+    if 72.0 <= latitude < 84.0:
+        if 0.0 <= longitude < 9.0:
+            zone = 31
+        elif 9.0 <= longitude < 21.0:
+            zone = 33
+        elif 21.0 <= longitude < 33.0:
+            zone = 35
+        elif 33.0 <= longitude < 42.0:
+            zone = 37
+    return zone
+
+
+def _latlon_to_utm(latitude: float, longitude: float, zone: Optional[int] = None) -> Tuple[float, float, int]:
+    """
+    Projeter une position WGS84 en UTM
+
+    Returns:
+        Tuple (easting, northing, zone) en mètres
+    """
+    if zone is None:
+        zone = _utm_zone(latitude, longitude)
+
+    e2 = _WGS84_F * (2 - _WGS84_F)
+    ep2 = e2 / (1 - e2)
+
+    lat = math.radians(latitude)
+    lon0 = math.radians((zone - 1) * 6 - 180 + 3)
+    lon = math.radians(longitude)
+
+    sin_lat = math.sin(lat)
+    cos_lat = math.cos(lat)
+    tan_lat = math.tan(lat)
+
+    n = _WGS84_A / math.sqrt(1 - e2 * sin_lat ** 2)
+    t = tan_lat ** 2
+    c = ep2 * cos_lat ** 2
+    a = cos_lat * (lon - lon0)
+
+    m = _WGS84_A * (
+        (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256) * lat
+        - (3 * e2 / 8 + 3 * e2 ** 2 / 32 + 45 * e2 ** 3 / 1024) * math.sin(2 * lat)
+        + (15 * e2 ** 2 / 256 + 45 * e2 ** 3 / 1024) * math.sin(4 * lat)
+        - (35 * e2 ** 3 / 3072) * math.sin(6 * lat)
+    )
+
+    easting = _UTM_K0 * n * (
+        a
+        + (1 - t + c) * a ** 3 / 6
+        + (5 - 18 * t + t ** 2 + 72 * c - 58 * ep2) * a ** 5 / 120
+    ) + 500000.0
+
+    northing = _UTM_K0 * (
+        m + n * tan_lat * (
+            a ** 2 / 2
+            + (5 - t + 9 * c + 4 * c ** 2) * a ** 4 / 24
+            + (61 - 58 * t + t ** 2 + 600 * c - 330 * ep2) * a ** 6 / 720
+        )
+    )
+    if latitude < 0:
+        northing += 10000000.0
+
+    return easting, northing, zone
+
+
+def _mgrs_tile(latitude: float, longitude: float) -> Optional[str]:
+    """
+    Identifiant de tuile MGRS 100 km (ex: "30NVN")
+
+    Les produits Sentinel-2 L2A sont découpés selon cette grille : deux parcelles
+    de la même tuile sont couvertes par les mêmes scènes.
+    """
+    if not -80.0 <= latitude < 84.0:
+        return None
+
+    easting, northing, zone = _latlon_to_utm(latitude, longitude)
+    band = _MGRS_LAT_BANDS[min(int((latitude + 80.0) / 8.0), len(_MGRS_LAT_BANDS) - 1)]
+
+    col_letters = _MGRS_COL_SETS[(zone - 1) % 3]
+    col = col_letters[int(easting // 100000) - 1]
+
+    row_index = int(northing // 100000) % 20
+    if zone % 2 == 0:
+        row_index = (row_index + 5) % 20
+    row = _MGRS_ROW_LETTERS[row_index]
+
+    return f"{zone:02d}{band}{col}{row}"
+
+
+def _spatial_columns(latitude: float, longitude: float) -> Dict[str, Optional[str]]:
+    """Colonnes geohash / grid_cell / s2_tile d'une parcelle"""
+    return {
+        "geohash": _geohash_encode(latitude, longitude),
+        "grid_cell": _weather_grid_cell(latitude, longitude),
+        "s2_tile": _mgrs_tile(latitude, longitude),
+    }
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("fields") as batch:
+        batch.add_column(sa.Column("geohash", sa.String(12)))
+        batch.add_column(sa.Column("grid_cell", sa.String()))
+        batch.add_column(sa.Column("s2_tile", sa.String(5)))
+        batch.add_column(sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"))
+    op.create_index("ix_fields_geohash", "fields", ["geohash"])
+    op.create_index("ix_fields_grid_cell", "fields", ["grid_cell"])
+    op.create_index("ix_fields_s2_tile", "fields", ["s2_tile"])
+
+    for table in ("operations", "alerts"):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "change_counters",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime()),
+    )
+
+    # Colonnes spatiales des parcelles existantes
+    bind = op.get_bind()
+    fields = sa.table(
+        "fields",
+        sa.column("id", sa.String), sa.column("latitude", sa.Float), sa.column("longitude", sa.Float),
+        sa.column("geohash", sa.String), sa.column("grid_cell", sa.String), sa.column("s2_tile", sa.String),
+    )
+    rows = bind.execute(
+        sa.select(fields.c.id, fields.c.latitude, fields.c.longitude).where(fields.c.latitude.isnot(None))
+    ).all()
+    for field_id, lat, lon in rows:
+        bind.execute(fields.update().where(fields.c.id == field_id).values(**_spatial_columns(lat, lon)))
+
+    # Versions des lignes existantes (1..N) : un premier pull since=0 les renvoie toutes
+    version = 0
+    for name in ("fields", "operations", "alerts"):
+        table = sa.table(name, sa.column("id", sa.String), sa.column("version", sa.BigInteger))
+        for (row_id,) in bind.execute(sa.select(table.c.id).order_by(table.c.id)).all():
+            version += 1
+            bind.execute(table.update().where(table.c.id == row_id).values(version=version))
+    if version:
+        counters = sa.table("change_counters", sa.column("name", sa.String), sa.column("value", sa.BigInteger))
+        bind.execute(counters.insert().values(name="sync", value=version))
+
+
+def downgrade() -> None:
+    op.drop_table("tombstones")
+    op.drop_table("change_counters")
+    for table in ("alerts", "operations"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("version")
+    op.drop_index("ix_fields_s2_tile", "fields")
+    op.drop_index("ix_fields_grid_cell", "fields")
+    op.drop_index("ix_fields_geohash", "fields")
+    with op.batch_alter_table("fields") as batch:
+        batch.drop_column("version")
+        batch.drop_column("s2_tile")
+        batch.drop_column("grid_cell")
+        batch.drop_column("geohash")
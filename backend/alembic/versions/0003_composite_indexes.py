@@ -0,0 +1,44 @@
+"""Composite indexes for owner / parent filters and keyset ordering
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nom, table, colonnes) ; chaque index sert un filtre + tri de route
+INDEXES = [
+    # get_fields, /api/sync/pull
+    ("ix_fields_owner_created_id", "fields", ["owner_id", "created_at", "id"]),
+    ("ix_fields_owner_version", "fields", ["owner_id", "version"]),
+    # get_operations (jointure par fields.id puis tri par date)
+    ("ix_operations_field_date_id", "operations", ["field_id", "date", "id"]),
+    ("ix_operations_field_version", "operations", ["field_id", "version"]),
+    # get_alerts (toutes / non lues)
+    ("ix_alerts_user_created_id", "alerts", ["user_id", "created_at", "id"]),
+    ("ix_alerts_user_read_created_id", "alerts", ["user_id", "is_read", "created_at", "id"]),
+    ("ix_alerts_user_version", "alerts", ["user_id", "version"]),
+    # get_users
+    ("ix_users_created_id", "users", ["created_at", "id"]),
+    ("ix_tombstones_owner_version", "tombstones", ["owner_id", "version"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table)
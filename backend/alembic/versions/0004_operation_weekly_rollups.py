@@ -0,0 +1,72 @@
+"""Weekly operation rollups per field and operation type
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:00:00
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "operation_weekly_rollups",
+        sa.Column("field_id", sa.String(), primary_key=True),
+        sa.Column("week_start", sa.Date(), primary_key=True),
+        sa.Column("op_type", sa.String(), primary_key=True),
+        sa.Column("op_count", sa.Integer(), nullable=False),
+        sa.Column("water_amount", sa.Float(), nullable=False),
+        sa.Column("duration", sa.Float(), nullable=False),
+        sa.Column("cost", sa.Float(), nullable=False),
+    )
+    # Opérations déjà saisies (agrégation figée : pas d'import de app.models)
+    bind = op.get_bind()
+    operations = sa.table(
+        "operations",
+        sa.column("field_id", sa.String), sa.column("date", sa.DateTime), sa.column("type", sa.String),
+        sa.column("water_amount", sa.Float), sa.column("duration", sa.Float), sa.column("cost", sa.Float),
+    )
+    totals = {}
+    for field_id, when, op_type, water, duration, cost in bind.execute(
+        sa.select(
+            operations.c.field_id, operations.c.date, operations.c.type,
+            operations.c.water_amount, operations.c.duration, operations.c.cost,
+        )
+    ):
+        day = when.date() if isinstance(when, datetime) else when
+        key = (field_id, day - timedelta(days=day.weekday()), op_type)
+        acc = totals.setdefault(key, [0, 0.0, 0.0, 0.0])
+        acc[0] += 1
+        acc[1] += water or 0
+        acc[2] += duration or 0
+        acc[3] += cost or 0
+
+    if totals:
+        rollups = sa.table(
+            "operation_weekly_rollups",
+            sa.column("field_id", sa.String), sa.column("week_start", sa.Date), sa.column("op_type", sa.String),
+            sa.column("op_count", sa.Integer), sa.column("water_amount", sa.Float),
+            sa.column("duration", sa.Float), sa.column("cost", sa.Float),
+        )
+        bind.execute(rollups.insert(), [
+            {
+                "field_id": field_id, "week_start": week_start, "op_type": op_type,
+                "op_count": count, "water_amount": water, "duration": duration, "cost": cost,
+            }
+            for (field_id, week_start, op_type), (count, water, duration, cost) in totals.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_table("operation_weekly_rollups")
@@ -0,0 +1,38 @@
+"""Daily ETc / rainfall archive per field
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "field_daily_climate",
+        sa.Column("field_id", sa.String(), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("week_start", sa.Date(), nullable=False),
+        sa.Column("et0", sa.Float()),
+        sa.Column("kc", sa.Float()),
+        sa.Column("etc", sa.Float()),
+        sa.Column("rainfall", sa.Float()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_field_daily_climate_field_week", "field_daily_climate", ["field_id", "week_start"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_field_daily_climate_field_week", "field_daily_climate")
+    op.drop_table("field_daily_climate")
@@ -0,0 +1,32 @@
+"""Field and dedup key on alerts (alert engine)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("alerts") as batch:
+        batch.add_column(sa.Column("field_id", sa.String()))
+        batch.add_column(sa.Column("dedup_key", sa.String()))
+    op.create_index("ix_alerts_dedup_created", "alerts", ["dedup_key", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alerts_dedup_created", "alerts")
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("dedup_key")
+        batch.drop_column("field_id")
@@ -0,0 +1,41 @@
+"""Unread alert counters per user
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_alert_counters",
+        sa.Column("user_id", sa.String(), primary_key=True),
+        sa.Column("unread", sa.Integer(), nullable=False),
+    )
+    # Alertes déjà présentes (requête figée : pas d'import de app.models)
+    alerts = sa.table("alerts", sa.column("user_id", sa.String), sa.column("is_read", sa.Boolean))
+    counters = sa.table("user_alert_counters", sa.column("user_id", sa.String), sa.column("unread", sa.Integer))
+    op.execute(
+        counters.insert().from_select(
+            ["user_id", "unread"],
+            sa.select(alerts.c.user_id, sa.func.count())
+            .where(alerts.c.is_read == sa.false())
+            .group_by(alerts.c.user_id),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_alert_counters")
@@ -0,0 +1,27 @@
+"""Indexes for the spatial index catch-up (fields and tombstones by version)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_fields_version", "fields", ["version"])
+    op.create_index("ix_tombstones_entity_version", "tombstones", ["entity", "version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tombstones_entity_version", "tombstones")
+    op.drop_index("ix_fields_version", "fields")
@@ -1,22 +1,39 @@
 """
 Alert routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Optional
 import uuid
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.alert import Alert
-from app.schemas.alert import AlertCreate, AlertUpdate, AlertResponse
+from app.models.alert_counter import UserAlertCounter
+from app.schemas.alert import AlertCreate, AlertUpdate, AlertResponse, AlertEvaluation, UnreadCount
+from app.services.alert_engine import alert_engine
+from app.services.pubsub import publish_event, publish_unread_counts
 from app.core.security import get_current_user
+from app.utils.pagination import keyset_paginate, finish_page
 
 router = APIRouter()
 
+async def _commit_change(db: AsyncSession):
+    """Commit an update/delete; a concurrent change to the same alert is a conflict"""
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Alert was modified concurrently, retry"
+        )
+
 @router.post("/", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
 async def create_alert(
     alert_data: AlertCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new alert"""
@@ -26,38 +43,68 @@ async def create_alert(
     )
     
     db.add(alert)
-    db.commit()
-    db.refresh(alert)
+    await db.commit()
+    await db.refresh(alert)
+    await publish_event(alert.user_id, "alert", AlertResponse.model_validate(alert))
+    await publish_unread_counts(db, [alert.user_id])
     return alert
 
+@router.post("/evaluate", response_model=AlertEvaluation)
+async def evaluate_alerts(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Run the alert rules now for the current user's fields"""
+    return await alert_engine.run(db, owner_id=current_user["id"])
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Number of unread alerts (app badge)"""
+    result = await db.execute(
+        select(UserAlertCounter.unread).where(UserAlertCounter.user_id == current_user["id"])
+    )
+    return UnreadCount(unread=result.scalar() or 0)
+
 @router.get("/", response_model=List[AlertResponse])
 async def get_alerts(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     unread_only: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all alerts for current user"""
-    query = db.query(Alert).filter(Alert.user_id == current_user["id"])
+    """Get all alerts for current user (most recent first, keyset pagination)"""
+    query = select(Alert).where(Alert.user_id == current_user["id"])
     
     if unread_only:
-        query = query.filter(Alert.is_read == False)
+        query = query.where(Alert.is_read == False)
+    
+    query = keyset_paginate(query, [Alert.created_at, Alert.id], cursor, limit, descending=True)
+    if skip and not cursor:
+        query = query.offset(skip)  # Fallback: pagination par offset
     
-    alerts = query.order_by(Alert.created_at.desc()).offset(skip).limit(limit).all()
-    return alerts
+    result = await db.execute(query)
+    return finish_page(result.scalars().all(), limit, ["created_at", "id"], response)
 
 @router.get("/{alert_id}", response_model=AlertResponse)
 async def get_alert(
     alert_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get alert by ID"""
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Alert).where(
+            Alert.id == alert_id,
+            Alert.user_id == current_user["id"]
+        )
+    )
+    alert = result.scalars().first()
     
     if not alert:
         raise HTTPException(
@@ -70,14 +117,17 @@ async def get_alert(
 async def update_alert(
     alert_id: str,
     alert_data: AlertUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Update alert (mark as read)"""
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Alert).where(
+            Alert.id == alert_id,
+            Alert.user_id == current_user["id"]
+        )
+    )
+    alert = result.scalars().first()
     
     if not alert:
         raise HTTPException(
@@ -88,21 +138,25 @@ async def update_alert(
     if alert_data.is_read is not None:
         alert.is_read = alert_data.is_read
     
-    db.commit()
-    db.refresh(alert)
+    await _commit_change(db)
+    await db.refresh(alert)
+    await publish_unread_counts(db, [alert.user_id])
     return alert
 
 @router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_alert(
     alert_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Delete alert"""
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Alert).where(
+            Alert.id == alert_id,
+            Alert.user_id == current_user["id"]
+        )
+    )
+    alert = result.scalars().first()
     
     if not alert:
         raise HTTPException(
@@ -110,6 +164,7 @@ async def delete_alert(
             detail="Alert not found"
         )
     
-    db.delete(alert)
-    db.commit()
+    await db.delete(alert)
+    await _commit_change(db)
+    await publish_unread_counts(db, [current_user["id"]])
     return None
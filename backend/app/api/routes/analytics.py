@@ -0,0 +1,140 @@
+"""
+Analytics routes
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, case, func, literal, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+
+from app.db.database import get_async_db
+from app.models.climate import FieldDailyClimate
+from app.models.field import Field
+from app.models.rollup import OperationWeeklyRollup, week_start
+from app.schemas.analytics import WaterEfficiencyReport, WaterEfficiencyRow
+from app.core.security import get_current_user
+
+# Séries temporelles volumineuses : sérialisation orjson
+router = APIRouter(default_response_class=ORJSONResponse)
+
+def _ratios(irrigation, rainfall, etc):
+    supply_ratio = (irrigation + rainfall) / func.nullif(etc, 0)
+    irrigation_ratio = case((etc > rainfall, irrigation / (etc - rainfall)), else_=None)
+    return supply_ratio, irrigation_ratio
+
+@router.get("/water-efficiency", response_model=WaterEfficiencyReport)
+async def get_water_efficiency(
+    start: date = Query(..., description="First day of the period"),
+    end: Optional[date] = Query(None, description="Last day of the period (default: today)"),
+    field_id: Optional[str] = None,
+    weekly: bool = Query(False, description="One row per field and ISO week instead of period totals"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Logged irrigation against crop demand (archived ETc) and rainfall, per field
+
+    Computed in one query: irrigation comes from the weekly operation rollups
+    (water_amount in mm), demand and rainfall from the daily climate archive
+    filled by the ETP and rainfall routes. Weeks overlapping the bounds are
+    counted whole, but archived forecast days after `end` (or after today)
+    are left out of the demand.
+    """
+    end = end or date.today()
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+    first_week = week_start(start)
+    # L'archive ETc contient aussi les jours de prévision : pas de demande sans irrigation saisie
+    last_day = min(end, date.today())
+    
+    owned = [Field.owner_id == current_user["id"]]
+    if field_id:
+        owned.append(Field.id == field_id)
+    
+    climate_t = FieldDailyClimate
+    climate = (
+        select(
+            climate_t.field_id,
+            climate_t.week_start,
+            func.sum(climate_t.etc).label("etc_mm"),
+            func.sum(climate_t.rainfall).label("rainfall_mm"),
+            func.count(climate_t.etc).label("climate_days"),
+        )
+        .join(Field, Field.id == climate_t.field_id)
+        .where(*owned, climate_t.week_start >= first_week, climate_t.day <= last_day)
+        .group_by(climate_t.field_id, climate_t.week_start)
+        .cte("climate")
+    )
+    
+    rollup = OperationWeeklyRollup
+    supply = (
+        select(rollup.field_id, rollup.week_start, func.sum(rollup.water_amount).label("irrigation_mm"))
+        .join(Field, Field.id == rollup.field_id)
+        .where(*owned, rollup.op_type == "irrigation", rollup.week_start >= first_week, rollup.week_start <= end)
+        .group_by(rollup.field_id, rollup.week_start)
+        .cte("supply")
+    )
+    
+    # Semaines ayant une demande ou un apport (équivalent d'un FULL OUTER JOIN)
+    weeks = union(
+        select(climate.c.field_id, climate.c.week_start),
+        select(supply.c.field_id, supply.c.week_start),
+    ).cte("weeks")
+    weekly_rows = (
+        select(
+            weeks.c.field_id,
+            weeks.c.week_start,
+            func.coalesce(supply.c.irrigation_mm, 0.0).label("irrigation_mm"),
+            func.coalesce(climate.c.rainfall_mm, 0.0).label("rainfall_mm"),
+            func.coalesce(climate.c.etc_mm, 0.0).label("etc_mm"),
+            func.coalesce(climate.c.climate_days, 0).label("climate_days"),
+        )
+        .select_from(weeks)
+        .outerjoin(supply, and_(supply.c.field_id == weeks.c.field_id, supply.c.week_start == weeks.c.week_start))
+        .outerjoin(climate, and_(climate.c.field_id == weeks.c.field_id, climate.c.week_start == weeks.c.week_start))
+        .cte("weekly")
+    )
+    w = weekly_rows.c
+    
+    if weekly:
+        supply_ratio, irrigation_ratio = _ratios(w.irrigation_mm, w.rainfall_mm, w.etc_mm)
+        running = {"partition_by": w.field_id, "order_by": w.week_start}
+        query = (
+            select(
+                w.field_id, Field.name.label("field_name"), w.week_start,
+                w.irrigation_mm, w.rainfall_mm, w.etc_mm, w.climate_days,
+                supply_ratio.label("supply_ratio"),
+                irrigation_ratio.label("irrigation_ratio"),
+                func.sum(w.irrigation_mm).over(**running).label("cumulative_irrigation_mm"),
+                func.sum(w.etc_mm).over(**running).label("cumulative_etc_mm"),
+            )
+            .join(Field, Field.id == w.field_id)
+            .order_by(w.field_id, w.week_start)
+        )
+    else:
+        irrigation, rainfall, etc = func.sum(w.irrigation_mm), func.sum(w.rainfall_mm), func.sum(w.etc_mm)
+        supply_ratio, irrigation_ratio = _ratios(irrigation, rainfall, etc)
+        query = (
+            select(
+                w.field_id, Field.name.label("field_name"), literal(None).label("week_start"),
+                irrigation.label("irrigation_mm"), rainfall.label("rainfall_mm"), etc.label("etc_mm"),
+                func.sum(w.climate_days).label("climate_days"),
+                supply_ratio.label("supply_ratio"),
+                irrigation_ratio.label("irrigation_ratio"),
+                func.percent_rank().over(order_by=supply_ratio).label("efficiency_rank"),
+            )
+            .join(Field, Field.id == w.field_id)
+            .group_by(w.field_id, Field.name)
+            .order_by(w.field_id)
+        )
+    
+    result = await db.execute(query)
+    return WaterEfficiencyReport(
+        start=first_week,
+        end=end,
+        rows=[WaterEfficiencyRow(**row._mapping) for row in result.all()]
+    )
@@ -2,28 +2,30 @@
 Authentication routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import uuid
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    password_hasher,
     create_access_token,
     get_current_user
 )
 from app.core.config import settings
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.phone == user_data.phone).first()
+    result = await db.execute(select(User).where(User.phone == user_data.phone))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,12 +37,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         id=str(uuid.uuid4()),
         phone=user_data.phone,
         name=user_data.name,
-        hashed_password=get_password_hash(user_data.password)
+        hashed_password=await password_hasher.hash(user_data.password)
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     # Create access token
     access_token = create_access_token(
@@ -53,11 +55,15 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user"""
-    user = db.query(User).filter(User.phone == credentials.phone).first()
+    result = await db.execute(select(User).where(User.phone == credentials.phone))
+    user = result.scalars().first()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect phone number or password"
@@ -69,6 +75,11 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is disabled"
         )
     
+    # Coût bcrypt modifié depuis la création du hash
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Create access token
     access_token = create_access_token(
         data={"sub": user.id, "phone": user.phone}
@@ -82,10 +93,10 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user information"""
-    user = db.query(User).filter(User.id == current_user["id"]).first()
+    user = await user_cache.get(db, current_user["id"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,206 @@
+"""
+Field dashboard: every section of the field screen in one request
+
+The field is loaded once, the sections run concurrently, each with its own
+deadline (DASHBOARD_SECTION_DEADLINES), and the upstream calls they have in
+common are made once per request: one Open-Meteo call (with the past 7 days)
+serves the forecast and the SMI, the NASA POWER series serves the rainfall
+chart and the SMI 7-day total, and the Open-Elevation lookup serves the
+topography and the SMI elevation. A slow or failing section does not fail
+the others: each one reports its own status.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.db.database import get_async_db
+from app.models.field import Field
+from app.schemas.dashboard import DashboardSection, FieldDashboard
+from app.schemas.field import FieldResponse
+from app.services.climate_archive import archive_etc, archive_rainfall
+from app.services.etp_service import etp_service
+from app.services.pubsub import publish_event
+from app.services.smi_pipeline import smi_pipeline
+from app.services.weather_data import (
+    fetch_forecast, fetch_rainfall, fetch_topography, load_ndvi_series, parse_forecast
+)
+from app.services.weather_service import weather_service
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+SECTIONS = ("weather", "rainfall", "topography", "ndvi", "smi", "etp")
+
+
+class SharedUpstream:
+    """Upstream calls made at most once per dashboard, whichever section asks first"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, factory: Callable[[], Awaitable]):
+        task = self.tasks.get(key)
+        if task is None:
+            task = self.tasks[key] = asyncio.create_task(factory())
+        # shield : l'échéance d'une section n'annule pas l'appel attendu par les autres
+        return await asyncio.shield(task)
+
+    async def close(self):
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+
+class DashboardLoader:
+    def __init__(self, field: Field, db: AsyncSession, upstream: SharedUpstream, rainfall_days: int):
+        self.field = field
+        self.db = db
+        self.upstream = upstream
+        self.rainfall_days = rainfall_days
+
+    # ==================== Entrées partagées ====================
+
+    def forecast(self):
+        # 7 jours passés inclus pour la température moyenne du SMI
+        return self.upstream.get("forecast", lambda: fetch_forecast(
+            self.upstream.client, self.field.latitude, self.field.longitude, past_days=7
+        ))
+
+    def rainfall_series(self):
+        return self.upstream.get("rainfall", lambda: fetch_rainfall(
+            self.upstream.client, self.field.latitude, self.field.longitude, self.rainfall_days
+        ))
+
+    def topography(self):
+        return self.upstream.get("topography", lambda: fetch_topography(
+            self.upstream.client, self.field.latitude, self.field.longitude
+        ))
+
+    # ==================== Sections ====================
+
+    async def weather(self):
+        return parse_forecast(await self.forecast(), past_days=7)
+
+    async def rainfall(self):
+        return await self.rainfall_series()
+
+    async def ndvi(self):
+        return await load_ndvi_series(self.field)
+
+    async def smi(self):
+        (ndvi, ndwi), forecast, rainfall, topography = await asyncio.gather(
+            smi_pipeline.field_indices(self.field, self.db),
+            self.forecast(), self.rainfall_series(), self.topography()
+        )
+        since = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        rainfall_7d = smi_pipeline.rainfall_total(point.precipitation for point in rainfall if point.date >= since)
+        temp_avg, rainfall_forecast = smi_pipeline.weather_inputs(forecast["daily"])
+        return smi_pipeline.evaluate(
+            self.field, ndvi, ndwi, rainfall_7d, temp_avg, rainfall_forecast, topography.elevation
+        )
+
+    async def etp(self):
+        # Prévision OpenWeatherMap : fournisseur distinct, non partagé
+        weather_data = await weather_service.get_weather_data_for_etp(
+            self.field.latitude, self.field.longitude, 7
+        )
+        return await etp_service.calculate_etp_forecast(
+            field_id=self.field.id,
+            crop_type=self.field.crop_type,
+            planting_date=self.field.planting_date,
+            latitude=self.field.latitude,
+            longitude=self.field.longitude,
+            weather_data=weather_data,
+        )
+
+    def missing_input(self, name: str) -> Optional[str]:
+        if not self.field.latitude or not self.field.longitude:
+            return "Field must have location coordinates"
+        if name in ("ndvi", "smi", "etp") and not self.field.planting_date:
+            return "Field must have planting date"
+        return None
+
+    async def run_section(self, name: str) -> DashboardSection:
+        missing = self.missing_input(name)
+        if missing:
+            return DashboardSection(status="skipped", error=missing)
+
+        deadline = settings.DASHBOARD_SECTION_DEADLINES.get(name, settings.DASHBOARD_DEFAULT_DEADLINE)
+        started = time.perf_counter()
+        try:
+            data = await asyncio.wait_for(getattr(self, name)(), deadline)
+            section = DashboardSection(status="ok", data=data)
+        except asyncio.TimeoutError:
+            section = DashboardSection(status="timeout", error=f"No result within {deadline:g}s")
+        except HTTPException as e:
+            section = DashboardSection(status="error", error=str(e.detail))
+        except Exception as e:
+            section = DashboardSection(status="error", error=str(e) or type(e).__name__)
+        section.elapsed_ms = round((time.perf_counter() - started) * 1000)
+        return section
+
+
+@router.get("/{field_id}/dashboard", response_model=FieldDashboard)
+async def get_field_dashboard(
+    field_id: str,
+    sections: Optional[str] = Query(None, description="Comma-separated subset of: " + ", ".join(SECTIONS)),
+    rainfall_days: int = Query(30, ge=7, le=365),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Field details plus weather, rainfall, topography, NDVI, SMI and ETP, with per-section status"""
+    requested = SECTIONS
+    if sections:
+        requested = tuple(name.strip() for name in sections.split(",") if name.strip())
+        unknown = set(requested) - set(SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown sections: {', '.join(sorted(unknown))}"
+            )
+
+    result = await db.execute(
+        select(Field).where(
+            Field.id == field_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    field = result.scalars().first()
+
+    if not field:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Field not found"
+        )
+
+    async with httpx.AsyncClient() as client:
+        upstream = SharedUpstream(client)
+        loader = DashboardLoader(field, db, upstream, rainfall_days)
+        try:
+            results = await asyncio.gather(*(loader.run_section(name) for name in requested))
+        finally:
+            await upstream.close()
+    loaded = dict(zip(requested, results))
+
+    # Écritures après les sections : la session n'est pas partagée entre tâches
+    if "rainfall" in loaded and loaded["rainfall"].status == "ok":
+        await archive_rainfall(db, field.id, loaded["rainfall"].data)
+    if "etp" in loaded and loaded["etp"].status == "ok":
+        await archive_etc(db, field.id, loaded["etp"].data)
+    if "smi" in loaded and loaded["smi"].status == "ok":
+        await publish_event(field.owner_id, "recommendation", loaded["smi"].data)
+
+    return FieldDashboard(
+        field=FieldResponse.model_validate(field),
+        sections=loaded,
+        generated_at=datetime.utcnow(),
+    )
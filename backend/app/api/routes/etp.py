@@ -1,33 +1,43 @@
 """
 Evapotranspiration (ETP) routes
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.field import Field
 from app.schemas.etp import ETPForecast
+from app.services.climate_archive import archive_etc
 from app.services.etp_service import etp_service
 from app.services.weather_service import weather_service
 from app.core.security import get_current_user
+from app.utils.conditional import conditional_response, forecast_max_age, forecast_run, make_etag, utc_day
 
-router = APIRouter()
+# Séries temporelles volumineuses : sérialisation orjson
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.get("/{field_id}", response_model=ETPForecast)
 async def calculate_field_etp(
     field_id: str,
+    request: Request,
+    response: Response,
     days: int = Query(7, ge=1, le=14, description="Number of days for forecast"),
     irrigation_efficiency: float = Query(0.75, ge=0.1, le=1.0, description="Irrigation efficiency"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Calculate evapotranspiration for a specific field"""
     # Get field
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Field).where(
+            Field.id == field_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    field = result.scalars().first()
     
     if not field:
         raise HTTPException(
@@ -48,6 +58,15 @@ async def calculate_field_etp(
             detail="Field must have planting date"
         )
     
+    # Entrées : parcelle, paramètres, run de prévision et âge de la culture (jour)
+    etag = make_etag(
+        "etp", field.latitude, field.longitude, field.crop_type, field.planting_date,
+        days, irrigation_efficiency, forecast_run(), utc_day()
+    )
+    not_modified = conditional_response(request, response, etag, forecast_max_age())
+    if not_modified:
+        return not_modified
+    
     try:
         # Get weather data
         weather_data = await weather_service.get_weather_data_for_etp(
@@ -67,6 +86,8 @@ async def calculate_field_etp(
             irrigation_efficiency=irrigation_efficiency
         )
         
+        await archive_etc(db, field.id, etp_forecast)
+        
         return etp_forecast
         
     except Exception as e:
@@ -0,0 +1,74 @@
+"""
+Push routes: new alerts and recomputed recommendations (SSE or WebSocket)
+
+Events are JSON objects {"event": "alert" | "recommendation", "data": {...}}
+published on the user's channel; no database query is made while connected.
+"""
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.security import get_stream_user, get_user_from_token
+from app.services.pubsub import broker, user_channel
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_events(request: Request, current_user: dict = Depends(get_stream_user)):
+    """Server-sent events stream for the current user"""
+
+    async def event_stream():
+        async with broker.subscribe(user_channel(current_user["id"])) as subscription:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                message = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event = json.loads(message)
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: str = Query(...)):
+    """WebSocket stream for the current user (token in the query string)"""
+    try:
+        current_user = get_user_from_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    async with broker.subscribe(user_channel(current_user["id"])) as subscription:
+
+        async def forward():
+            while True:
+                message = await subscription.get(settings.EVENTS_KEEPALIVE_SECONDS)
+                await websocket.send_text(message if message is not None else '{"event": "keepalive"}')
+
+        async def receive():
+            # Les messages du client sont ignorés ; on attend la déconnexion
+            while True:
+                await websocket.receive_text()
+
+        tasks = [asyncio.create_task(forward()), asyncio.create_task(receive())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                try:
+                    await task
+                except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+                    pass
@@ -1,22 +1,25 @@
 """
 Field routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import uuid
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.field import Field
-from app.schemas.field import FieldCreate, FieldUpdate, FieldResponse
+from app.schemas.field import FieldCreate, FieldUpdate, FieldResponse, FieldMapPoint, FieldGroups
+from app.services.spatial_index import spatial_index
 from app.core.security import get_current_user
+from app.utils.pagination import keyset_paginate, finish_page
 
 router = APIRouter()
 
 @router.post("/", response_model=FieldResponse, status_code=status.HTTP_201_CREATED)
 async def create_field(
     field_data: FieldCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new field"""
@@ -27,34 +30,94 @@ async def create_field(
     )
     
     db.add(field)
-    db.commit()
-    db.refresh(field)
+    await db.commit()
+    await db.refresh(field)
     return field
 
 @router.get("/", response_model=List[FieldResponse])
 async def get_fields(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all fields for current user"""
-    fields = db.query(Field).filter(
-        Field.owner_id == current_user["id"]
-    ).offset(skip).limit(limit).all()
-    return fields
+    """Get all fields for current user (keyset pagination on creation date)"""
+    query = keyset_paginate(
+        select(Field).where(Field.owner_id == current_user["id"]),
+        [Field.created_at, Field.id], cursor, limit
+    )
+    if skip and not cursor:
+        query = query.offset(skip)  # Fallback: pagination par offset
+    
+    result = await db.execute(query)
+    return finish_page(result.scalars().all(), limit, ["created_at", "id"], response)
+
+@router.get("/map", response_model=List[FieldMapPoint])
+async def get_fields_map(
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180),
+    latitude: Optional[float] = Query(None, ge=-90, le=90, description="Centre (recherche par rayon)"),
+    longitude: Optional[float] = Query(None, ge=-180, le=180, description="Centre (recherche par rayon)"),
+    radius_m: float = Query(5000, gt=0, le=200000, description="Rayon de recherche (m)"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Fields of current user in a bounding box, or near a point"""
+    await spatial_index.ensure_loaded(db)
+
+    if latitude is not None and longitude is not None:
+        nearby = spatial_index.fields_near(
+            latitude, longitude, radius_m, limit=limit, owner_id=current_user["id"]
+        )
+        return [
+            FieldMapPoint.model_validate(entry).model_copy(update={"distance_m": round(distance, 1)})
+            for entry, distance in nearby
+        ]
+
+    if None in (min_lat, min_lon, max_lat, max_lon):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either a bounding box (min_lat, min_lon, max_lat, max_lon) or latitude/longitude"
+        )
+
+    entries = spatial_index.fields_in_bbox(
+        min_lat, min_lon, max_lat, max_lon, owner_id=current_user["id"]
+    )
+    return [FieldMapPoint.model_validate(entry) for entry in entries[:limit]]
+
+@router.get("/groups", response_model=FieldGroups)
+async def get_field_groups(
+    key: str = Query("grid_cell", pattern="^(grid_cell|s2_tile|geohash)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Group fields of current user by weather grid cell, Sentinel-2 tile or geohash"""
+    await spatial_index.ensure_loaded(db)
+    groups = spatial_index.group_by_cell(key, owner_id=current_user["id"])
+    return FieldGroups(
+        key=key,
+        groups={cell: [entry.id for entry in entries] for cell, entries in groups.items()}
+    )
 
 @router.get("/{field_id}", response_model=FieldResponse)
 async def get_field(
     field_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get field by ID"""
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Field).where(
+            Field.id == field_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    field = result.scalars().first()
     
     if not field:
         raise HTTPException(
@@ -67,14 +130,17 @@ async def get_field(
 async def update_field(
     field_id: str,
     field_data: FieldUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Update field"""
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Field).where(
+            Field.id == field_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    field = result.scalars().first()
     
     if not field:
         raise HTTPException(
@@ -86,21 +152,24 @@ async def update_field(
     for key, value in field_data.dict(exclude_unset=True).items():
         setattr(field, key, value)
     
-    db.commit()
-    db.refresh(field)
+    await db.commit()
+    await db.refresh(field)
     return field
 
 @router.delete("/{field_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_field(
     field_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Delete field"""
-    field = db.query(Field).filter(
-        Field.id == field_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Field).where(
+            Field.id == field_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    field = result.scalars().first()
     
     if not field:
         raise HTTPException(
@@ -108,6 +177,6 @@ async def delete_field(
             detail="Field not found"
         )
     
-    db.delete(field)
-    db.commit()
+    await db.delete(field)
+    await db.commit()
     return None
@@ -1,31 +1,40 @@
 """
 Operation routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
 import uuid
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.operation import Operation
 from app.models.field import Field
-from app.schemas.operation import OperationCreate, OperationUpdate, OperationResponse
+from app.models.rollup import OperationWeeklyRollup, week_start
+from app.schemas.operation import (
+    OperationCreate, OperationUpdate, OperationResponse, SeasonSummary, SeasonSummaryRow
+)
 from app.core.security import get_current_user
+from app.utils.pagination import keyset_paginate, finish_page
 
 router = APIRouter()
 
 @router.post("/", response_model=OperationResponse, status_code=status.HTTP_201_CREATED)
 async def create_operation(
     operation_data: OperationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new operation"""
     # Verify field belongs to user
-    field = db.query(Field).filter(
-        Field.id == operation_data.field_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Field.id).where(
+            Field.id == operation_data.field_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    field = result.scalar_one_or_none()
     
     if not field:
         raise HTTPException(
@@ -39,40 +48,100 @@ async def create_operation(
     )
     
     db.add(operation)
-    db.commit()
-    db.refresh(operation)
+    await db.commit()
+    await db.refresh(operation)
     return operation
 
 @router.get("/", response_model=List[OperationResponse])
 async def get_operations(
+    response: Response,
     field_id: str = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all operations for current user"""
-    query = db.query(Operation).join(Field).filter(
+    """Get all operations for current user (most recent first, keyset pagination)"""
+    query = select(Operation).join(Field).where(
         Field.owner_id == current_user["id"]
     )
     
     if field_id:
-        query = query.filter(Operation.field_id == field_id)
+        query = query.where(Operation.field_id == field_id)
+    
+    query = keyset_paginate(query, [Operation.date, Operation.id], cursor, limit, descending=True)
+    if skip and not cursor:
+        query = query.offset(skip)  # Fallback: pagination par offset
+    
+    result = await db.execute(query)
+    return finish_page(result.scalars().all(), limit, ["date", "id"], response)
+
+@router.get("/season-summary", response_model=SeasonSummary)
+async def get_season_summary(
+    start: date = Query(..., description="First day of the season"),
+    end: Optional[date] = Query(None, description="Last day of the season (default: today)"),
+    field_id: Optional[str] = None,
+    weekly: bool = Query(False, description="One row per ISO week instead of season totals"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Water, duration and cost totals per field and operation type over a season
+
+    Reads the weekly rollups only; weeks overlapping the bounds are counted whole.
+    """
+    end = end or date.today()
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+    first_week = week_start(start)
+    
+    rollup = OperationWeeklyRollup
+    keys = [rollup.field_id, rollup.op_type] + ([rollup.week_start] if weekly else [])
+    query = (
+        select(
+            *keys,
+            func.sum(rollup.op_count).label("op_count"),
+            func.sum(rollup.water_amount).label("water_amount"),
+            func.sum(rollup.duration).label("duration"),
+            func.sum(rollup.cost).label("cost"),
+        )
+        .join(Field, Field.id == rollup.field_id)
+        .where(
+            Field.owner_id == current_user["id"],
+            rollup.week_start >= first_week,
+            rollup.week_start <= end,
+        )
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+    if field_id:
+        query = query.where(rollup.field_id == field_id)
     
-    operations = query.offset(skip).limit(limit).all()
-    return operations
+    result = await db.execute(query)
+    return SeasonSummary(
+        start=first_week,
+        end=end,
+        rows=[SeasonSummaryRow(**row._mapping) for row in result.all()]
+    )
 
 @router.get("/{operation_id}", response_model=OperationResponse)
 async def get_operation(
     operation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get operation by ID"""
-    operation = db.query(Operation).join(Field).filter(
-        Operation.id == operation_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Operation).join(Field).where(
+            Operation.id == operation_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    operation = result.scalars().first()
     
     if not operation:
         raise HTTPException(
@@ -85,14 +154,17 @@ async def get_operation(
 async def update_operation(
     operation_id: str,
     operation_data: OperationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Update operation"""
-    operation = db.query(Operation).join(Field).filter(
-        Operation.id == operation_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Operation).join(Field).where(
+            Operation.id == operation_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    operation = result.scalars().first()
     
     if not operation:
         raise HTTPException(
@@ -104,21 +176,24 @@ async def update_operation(
     for key, value in operation_data.dict(exclude_unset=True).items():
         setattr(operation, key, value)
     
-    db.commit()
-    db.refresh(operation)
+    await db.commit()
+    await db.refresh(operation)
     return operation
 
 @router.delete("/{operation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_operation(
     operation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Delete operation"""
-    operation = db.query(Operation).join(Field).filter(
-        Operation.id == operation_id,
-        Field.owner_id == current_user["id"]
-    ).first()
+    result = await db.execute(
+        select(Operation).join(Field).where(
+            Operation.id == operation_id,
+            Field.owner_id == current_user["id"]
+        )
+    )
+    operation = result.scalars().first()
     
     if not operation:
         raise HTTPException(
@@ -126,6 +201,6 @@ async def delete_operation(
             detail="Operation not found"
         )
     
-    db.delete(operation)
-    db.commit()
+    await db.delete(operation)
+    await db.commit()
     return None
@@ -0,0 +1,101 @@
+"""
+Offline sync routes
+"""
+import zlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.db.database import get_async_db
+from app.schemas.sync import SyncPullResponse, SyncPushRequest, SyncPushResponse
+from app.services.sync_service import sync_service
+
+router = APIRouter()
+
+def _decode_body(body: bytes, content_encoding: str) -> bytes:
+    """Decompress a gzip/deflate request body, bounded by SYNC_PUSH_MAX_BYTES"""
+    encoding = content_encoding.strip().lower()
+    if encoding in ("", "identity"):
+        data = body
+    elif encoding in ("gzip", "deflate"):
+        wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+        try:
+            decompressor = zlib.decompressobj(wbits)
+            data = decompressor.decompress(body, settings.SYNC_PUSH_MAX_BYTES + 1)
+        except zlib.error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid compressed body"
+            )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Encoding: {content_encoding}"
+        )
+
+    if len(data) > settings.SYNC_PUSH_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Sync batch too large"
+        )
+    return data
+
+@router.post(
+    "/push",
+    response_model=SyncPushResponse,
+    openapi_extra={"requestBody": {"content": {"application/json": {
+        "schema": SyncPushRequest.model_json_schema()
+    }}, "required": True}},
+)
+async def push_changes(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Apply a batch of offline changes (fields, operations) in one transaction
+
+    The body may be sent with `Content-Encoding: gzip`. Each item carries its
+    client-generated id; the response gives a status per item, in order.
+    """
+    raw = _decode_body(await request.body(), request.headers.get("content-encoding", ""))
+    try:
+        payload = SyncPushRequest.model_validate_json(raw)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_input=False)
+        )
+
+    if len(payload.fields) + len(payload.operations) > settings.SYNC_PUSH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Sync batch exceeds {settings.SYNC_PUSH_MAX_ITEMS} items"
+        )
+
+    try:
+        return await sync_service.apply_push(db, current_user["id"], payload)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Sync batch conflicts with existing data"
+        )
+
+@router.get("/pull", response_model=SyncPullResponse)
+async def pull_changes(
+    since: int = Query(0, ge=0, description="Last version received (0 for a full download)"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Fields, operations and alerts changed since a version, plus deletions
+
+    Call again with `since=version` while `has_more` is true.
+    """
+    return await sync_service.pull_changes(db, current_user["id"], since, limit)
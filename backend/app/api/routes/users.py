@@ -1,36 +1,45 @@
 """
 User routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
-from app.core.security import get_current_user, get_password_hash
+from app.core.security import get_current_user, password_hasher
+from app.services.user_cache import user_cache
+from app.utils.pagination import keyset_paginate, finish_page
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all users (admin only)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    query = keyset_paginate(select(User), [User.created_at, User.id], cursor, limit)
+    if skip and not cursor:
+        query = query.offset(skip)  # Fallback: pagination par offset
+    
+    result = await db.execute(query)
+    return finish_page(result.scalars().all(), limit, ["created_at", "id"], response)
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -42,7 +51,7 @@ async def get_user(
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Update user"""
@@ -52,7 +61,7 @@ async def update_user(
             detail="Not authorized to update this user"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,8 +72,9 @@ async def update_user(
     if user_data.name is not None:
         user.name = user_data.name
     if user_data.password is not None:
-        user.hashed_password = get_password_hash(user_data.password)
+        user.hashed_password = await password_hasher.hash(user_data.password)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    user_cache.invalidate(user_id)
+    await db.refresh(user)
     return user
@@ -2,21 +2,124 @@
 Application configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./rice.db"
+    # URL asynchrone (asyncpg / aiosqlite) ; dérivée de DATABASE_URL si vide
+    ASYNC_DATABASE_URL: str = ""
+    # Pool de connexions (PostgreSQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # secondes
+    DB_POOL_RECYCLE: int = 1800  # secondes
+    # Profil SQLite (petits sites) : WAL, un seul écrivain, lecteurs concurrents
+    SQLITE_POOL_SIZE: int = 8
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024  # 64 Mo par connexion
+    SQLITE_MMAP_SIZE: int = 256 * 1024 ** 2  # 256 Mo
     
     # JWT
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200  # 30 days
+    TOKEN_CACHE_SIZE: int = 10000  # jetons vérifiés gardés en mémoire (0 = désactivé)
+    USER_CACHE_TTL_SECONDS: int = 30
+    
+    # Mots de passe (bcrypt dans un pool de threads)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # au-delà : 503
     
     # API Keys
     OPENWEATHER_API_KEY: str = ""
     MAPBOX_ACCESS_TOKEN: str = ""
     GOOGLE_EARTH_ENGINE_KEY: str = ""
+    # Initialisation GEE en arrière-plan : reprise exponentielle en cas d'échec
+    GEE_INIT_BACKOFF_SECONDS: float = 5
+    GEE_INIT_MAX_BACKOFF_SECONDS: float = 300
+    # Dépendances exigées par /ready (database, earth_engine, spatial_index)
+    READY_REQUIRES: List[str] = ["database"]
+    
+    # Cache local des scènes Sentinel-2 (chunks tuile x date x bande)
+    SCENE_CACHE_DIR: str = "./cache/scenes"
+    SCENE_CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # 2 Go
+    SCENE_CACHE_CHUNK_SIZE: int = 500  # pixels (20 m) par côté de chunk
+    SCENE_CACHE_MIN_FIELDS_PER_TILE: int = 3  # seuil de téléchargement groupé
+    SCENE_CACHE_DOWNLOAD_WORKERS: int = 2  # téléchargements de tuiles simultanés
+    
+    # Index spatial en mémoire : rattrapage des écritures des autres workers
+    SPATIAL_INDEX_REFRESH_SECONDS: float = 30
+    SPATIAL_INDEX_MAX_AGE_SECONDS: float = 3600  # rechargement complet
+    
+    # Synchronisation hors-ligne
+    SYNC_PUSH_MAX_ITEMS: int = 2000
+    SYNC_PUSH_MAX_BYTES: int = 5 * 1024 ** 2  # taille décompressée max
+    
+    # Moteur d'alertes (recommandations, risque inondation, stades phénologiques)
+    ALERT_ENGINE_ENABLED: bool = True
+    ALERT_ENGINE_SCHEDULE: str = "0 * * * *"  # cron UTC (planificateur)
+    ALERT_ENGINE_BATCH_SIZE: int = 500  # parcelles par transaction
+    ALERT_ENGINE_CONCURRENCY: int = 8  # requêtes météo simultanées
+    ALERT_ENGINE_USE_GEE: bool = False  # échantillonnage GEE si la scène n'est pas en cache
+    ALERT_DEDUP_HOURS: int = 48
+    
+    # Calcul par lots de la flotte (SMI, recommandations) dans un pool de processus
+    BATCH_COMPUTE_WORKERS: int = 0  # 0 = nombre de cœurs ; 1 = dans le processus
+    BATCH_COMPUTE_CHUNK_SIZE: int = 128  # parcelles par tâche
+    BATCH_COMPUTE_MIN_ROWS: int = 256  # en dessous : calcul dans le processus
+    BATCH_COMPUTE_SHM_MIN_BYTES: int = 256 * 1024  # au-delà : mémoire partagée
+    
+    # Planificateur de tâches de fond (cron UTC = heure locale Côte d'Ivoire)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_POLL_SECONDS: float = 30
+    SCHEDULER_LEASE_SECONDS: int = 300  # renouvelé pendant l'exécution
+    # Prévisions en cache jusqu'au prochain run : début des heures de pointe du matin
+    FORECAST_PREFETCH_SCHEDULE: str = "2 5,6 * * *"
+    FORECAST_PREFETCH_CONCURRENCY: int = 8
+    NDVI_APPEND_SCHEDULE: str = "0 3 * * *"
+    ALERT_COUNTERS_RECONCILE_SCHEDULE: str = "30 2 * * *"
+    
+    # Événements poussés (SSE / WebSocket) : "memory" (un worker) ou "redis"
+    PUBSUB_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    EVENTS_KEEPALIVE_SECONDS: int = 15
+    EVENTS_QUEUE_SIZE: int = 100  # messages en attente par abonné
+    
+    # Cache des données amont : niveaux consultés dans l'ordre (memory, disk, redis)
+    # Plusieurs workers : ["memory", "redis"] pour partager les données chaudes
+    CACHE_BACKENDS: List[str] = ["memory"]
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 ** 2
+    CACHE_DISK_DIR: str = "./cache/upstream"
+    CACHE_DISK_MAX_BYTES: int = 512 * 1024 ** 2
+    CACHE_REDIS_URL: str = ""  # REDIS_URL si vide
+    CACHE_LOCK_SECONDS: float = 30  # verrou de chargement entre workers
+    ELEVATION_CACHE_TTL_SECONDS: int = 30 * 86400  # SRTM : donnée statique
+    
+    # Validateurs HTTP (ETag / Cache-Control) des données météo et satellite
+    WEATHER_MODEL_RUN_MINUTES: int = 60  # rafraîchissement des prévisions Open-Meteo
+    S2_REVISIT_DAYS: int = 5  # revisite Sentinel-2 (2A + 2B)
+    
+    # Tableau de bord parcelle : échéance de chaque section (secondes)
+    DASHBOARD_SECTION_DEADLINES: Dict[str, float] = {
+        "weather": 8, "rainfall": 15, "topography": 8, "ndvi": 20, "smi": 20, "etp": 10,
+    }
+    DASHBOARD_DEFAULT_DEADLINE: float = 10
+    
+    # Compression des réponses (brotli si installé, sinon gzip)
+    COMPRESSION_MIN_BYTES: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    
+    # Traces par requête : en-tête Server-Timing et export vers un collecteur
+    SERVER_TIMING_ENABLED: bool = True
+    TRACE_EXPORT_URL: str = ""  # ex. http://localhost:4319/traces (scripts/trace_collector.py) ; vide = pas d'export
+    TRACE_EXPORT_BATCH_SIZE: int = 100
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 5
+    TRACE_EXPORT_MAX_QUEUED: int = 10000  # au-delà : traces abandonnées
     
     # Server
     HOST: str = "0.0.0.0"
@@ -0,0 +1,199 @@
+"""
+Prometheus metrics (exposed on /metrics)
+
+- latency of HTTP requests per route template, method and status;
+- latency and errors of upstream calls per provider (Open-Meteo, NASA
+  POWER, Open-Elevation, OpenWeatherMap, Earth Engine);
+- upstream cache lookups (hit / miss / coalesced) per namespace and hits
+  per tier;
+- duration of SQL statements, from SQLAlchemy cursor events;
+- in-flight and queued work of the executors (bcrypt threads, process
+  pool, asyncio.to_thread pool, cache loads, scheduled jobs), read at
+  scrape time.
+
+Metrics are per process: with several uvicorn workers, scrape each worker.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import record_db_time
+
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "sigir_http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "sigir_upstream_request_duration_seconds", "Upstream call latency", ["provider", "outcome"],
+    buckets=UPSTREAM_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "sigir_upstream_errors_total", "Failed upstream calls", ["provider", "reason"]
+)
+CACHE_REQUESTS = Counter(
+    "sigir_cache_requests_total", "Upstream cache lookups", ["namespace", "result"]
+)
+CACHE_TIER_HITS = Counter(
+    "sigir_cache_tier_hits_total", "Upstream cache hits per tier", ["tier"]
+)
+DB_QUERY_DURATION = Histogram(
+    "sigir_db_query_duration_seconds", "SQL statement duration", ["operation"], buckets=DB_BUCKETS
+)
+DB_QUERY_ERRORS = Counter(
+    "sigir_db_query_errors_total", "Failed SQL statements", ["operation"]
+)
+
+# Espace de noms des clés de cache -> fournisseur amont
+PROVIDERS = {
+    "open-meteo": "open_meteo",
+    "open-meteo-smi": "open_meteo",
+    "nasa-power": "nasa_power",
+    "open-elevation": "open_elevation",
+    "openweathermap": "openweathermap",
+    "gee-indices": "earth_engine",
+    "gee-ndvi": "earth_engine",
+}
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def provider_of(namespace: str) -> str:
+    return PROVIDERS.get(namespace, namespace)
+
+
+@contextmanager
+def observe_upstream(provider: str):
+    """Chronométrer un appel amont ; l'exception est comptée puis propagée"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        if isinstance(e, httpx.HTTPStatusError):
+            reason = str(e.response.status_code)
+        else:
+            reason = type(e).__name__
+        UPSTREAM_ERRORS.labels(provider, reason).inc()
+        UPSTREAM_REQUEST_DURATION.labels(provider, "error").observe(time.perf_counter() - started)
+        raise
+    UPSTREAM_REQUEST_DURATION.labels(provider, "ok").observe(time.perf_counter() - started)
+
+
+# ==================== Base de données ====================
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(sync_engine):
+    """Durée de chaque requête SQL (moteur synchrone ou async_engine.sync_engine)"""
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            DB_QUERY_DURATION.labels(_operation(statement)).observe(elapsed)
+            record_db_time(elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        DB_QUERY_ERRORS.labels(_operation(exception_context.statement or "")).inc()
+
+    return sync_engine
+
+
+# ==================== Exécuteurs ====================
+
+class ExecutorCollector(Collector):
+    """Travail en cours / en attente des exécuteurs, lu au moment du scrape"""
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+    def register(self, name: str, source: Callable[[], Dict[str, int]]):
+        self.sources[name] = source
+
+    def collect(self):
+        in_flight = GaugeMetricFamily(
+            "sigir_executor_in_flight", "Tasks submitted and not finished", labels=["executor"]
+        )
+        queued = GaugeMetricFamily(
+            "sigir_executor_queued", "Tasks waiting for a free worker", labels=["executor"]
+        )
+        for name, source in self.sources.items():
+            try:
+                values = source()
+            except Exception:
+                continue
+            if "in_flight" in values:
+                in_flight.add_metric([name], values["in_flight"])
+            if "queued" in values:
+                queued.add_metric([name], values["queued"])
+        yield in_flight
+        yield queued
+
+
+def _default_thread_pool() -> Dict[str, int]:
+    # Pool de asyncio.to_thread (GEE, cache disque) ; créé au premier appel
+    try:
+        executor = asyncio.get_running_loop()._default_executor
+    except RuntimeError:
+        return {}
+    if executor is None:
+        return {"queued": 0}
+    return {"queued": executor._work_queue.qsize()}
+
+
+executors = ExecutorCollector()
+executors.register("default_threads", _default_thread_pool)
+REGISTRY.register(executors)
+
+
+def render_metrics() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+# ==================== HTTP ====================
+
+class MetricsMiddleware:
+    """Latence par modèle de route (/api/fields/{field_id}, pas l'URL) ; 'unmatched' pour les 404"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status_code)
+            ).observe(time.perf_counter() - started)
+
@@ -1,16 +1,29 @@
 """
 Security utilities for authentication and authorization
 """
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
+from app.core.metrics import executors
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Coût bcrypt fixé : un hash d'un autre coût est recalculé à la connexion suivante
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -20,6 +33,81 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """
+    bcrypt hors de la boucle d'événements
+
+    Les calculs (100-300 ms de CPU chacun) s'exécutent dans un pool de
+    threads borné : bcrypt libère le GIL, la boucle continue de servir les
+    autres requêtes. Au-delà de PASSWORD_HASH_MAX_PENDING calculs en attente,
+    les nouvelles demandes sont refusées (503) plutôt que mises en file.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.wait_seconds = 0.0
+        self.compute_seconds = 0.0
+
+    async def _run(self, func, *args):
+        if self.in_flight >= self.workers + self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, retry later",
+                headers={"Retry-After": "1"},
+            )
+
+        def timed():
+            started = time.perf_counter()
+            return started, func(*args), time.perf_counter() - started
+
+        self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            started, result, duration = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.wait_seconds += started - submitted
+        self.compute_seconds += duration
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valide, nouveau hash si le coût configuré a changé)"""
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_wait_ms": round(self.wait_seconds / completed * 1000, 2),
+            "avg_compute_ms": round(self.compute_seconds / completed * 1000, 2),
+        }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+executors.register("password_hashing", lambda: {
+    "in_flight": password_hasher.in_flight,
+    "queued": max(0, password_hasher.in_flight - password_hasher.workers),
+})
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -44,9 +132,44 @@ def decode_access_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Get the current authenticated user from JWT token"""
-    token = credentials.credentials
+class TokenCache:
+    """
+    LRU des jetons déjà vérifiés -> utilisateur
+
+    Une entrée expire avec le jeton (claim `exp`), la signature n'est donc
+    vérifiée qu'une fois par jeton tant qu'il reste dans le cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        entry = self.entries.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self.entries[token]
+            return None
+        self.entries.move_to_end(token)
+        return user
+
+    def put(self, token: str, user: dict, expires_at: float):
+        self.entries[token] = (user, expires_at)
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+def get_user_from_token(token: str) -> dict:
+    """Authenticated user from a JWT token"""
+    user = token_cache.get(token)
+    if user is not None:
+        return dict(user)
+    
     payload = decode_access_token(token)
     
     user_id: str = payload.get("sub")
@@ -56,4 +179,26 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Could not validate credentials",
         )
     
-    return {"id": user_id, "phone": payload.get("phone")}
+    user = {"id": user_id, "phone": payload.get("phone")}
+    if settings.TOKEN_CACHE_SIZE and payload.get("exp"):
+        token_cache.put(token, user, float(payload["exp"]))
+    return dict(user)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Get the current authenticated user from JWT token"""
+    return get_user_from_token(credentials.credentials)
+
+async def get_stream_user(
+    token: Optional[str] = Query(None, description="JWT (EventSource cannot send headers)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> dict:
+    """Current user from the Authorization header or the `token` query parameter"""
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return get_user_from_token(token)
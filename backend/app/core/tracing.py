@@ -0,0 +1,230 @@
+"""
+Per-request tracing: spans, Server-Timing header and trace export
+
+Every HTTP request gets a trace (contextvars, so spans opened in tasks
+spawned by the handler are attached to it). `span("nasa_power")` times a
+stage; SQL time is accumulated from the engine events (cf. app.core.metrics).
+When the response starts, the spans are summarised in a `Server-Timing`
+header (visible in the browser devtools) and the trace record is handed
+to the exporter, which posts batches of JSON records to TRACE_EXPORT_URL
+(scripts/trace_collector.py is a local stand-in for the collector).
+"""
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class Span:
+    __slots__ = ("id", "parent_id", "name", "start", "end", "attributes", "error")
+
+    def __init__(self, id: int, parent_id: Optional[int], name: str, start: float, attributes: Dict):
+        self.id = id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self._ids = itertools.count(1)
+
+    def server_timing(self) -> str:
+        """Étapes terminées au format Server-Timing (durées en ms)"""
+        entries = []
+        for span in self.spans:
+            if span.end is None:
+                continue
+            entry = f"{span.name};dur={(span.end - span.start) * 1000:.1f}"
+            description = span.error or span.attributes.get("cache")
+            if description:
+                entry += f';desc="{description}"'
+            entries.append(entry)
+        if self.db_queries:
+            entries.append(f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"')
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def record(self, status_code: int) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - self.start) * 1000, 2),
+            "status": status_code,
+            "worker": os.getpid(),
+            "db": {"queries": self.db_queries, "duration_ms": round(self.db_seconds * 1000, 2)},
+            "spans": [
+                {
+                    "id": span.id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ms": round((span.start - self.start) * 1000, 2),
+                    "duration_ms": round((span.end - span.start) * 1000, 2) if span.end is not None else None,
+                    "attributes": span.attributes,
+                    "error": span.error,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Chronométrer une étape de la requête en cours (sans effet hors requête)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = current_span.get()
+    item = Span(next(trace._ids), parent.id if parent else None, name, time.perf_counter(), attributes)
+    trace.spans.append(item)
+    token = current_span.set(item)
+    try:
+        yield item
+    except BaseException as e:
+        item.error = type(e).__name__
+        raise
+    finally:
+        item.end = time.perf_counter()
+        current_span.reset(token)
+
+
+def annotate(**attributes):
+    """Ajouter des attributs à l'étape en cours (ex. cache="hit")"""
+    item = current_span.get()
+    if item is not None:
+        item.attributes.update(attributes)
+
+
+def record_db_time(seconds: float):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.db_seconds += seconds
+        trace.db_queries += 1
+
+
+# ==================== Export ====================
+
+class TraceExporter:
+    """File bornée de traces envoyées par lots au collecteur ; pertes plutôt que blocage"""
+
+    def __init__(self, url: str, batch_size: int, interval: float, max_queued: int):
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self.exported = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def submit(self, record: Dict):
+        if not self.enabled:
+            return
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _next_batch(self) -> List[Dict]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run_forever(self):
+        """Boucle de fond (lifespan de l'application)"""
+        async with httpx.AsyncClient(timeout=10) as client:
+            while True:
+                batch = await self._next_batch()
+                try:
+                    response = await client.post(self.url, json={"traces": batch})
+                    response.raise_for_status()
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    print(f"⚠️ Export des traces impossible: {e}")
+
+    def stats(self) -> Dict:
+        return {"exported": self.exported, "dropped": self.dropped, "queued": self.queue.qsize()}
+
+
+# Instance globale
+trace_exporter = TraceExporter(
+    settings.TRACE_EXPORT_URL,
+    batch_size=settings.TRACE_EXPORT_BATCH_SIZE,
+    interval=settings.TRACE_EXPORT_INTERVAL_SECONDS,
+    max_queued=settings.TRACE_EXPORT_MAX_QUEUED,
+)
+
+
+# ==================== HTTP ====================
+
+class TracingMiddleware:
+    """Une trace par requête ; en-tête Server-Timing ajouté au début de la réponse"""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        token = current_trace.set(trace)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                # Modèle de route : regroupement des traces côté collecteur
+                trace.name = f"{scope['method']} {route.path}"
+            trace_exporter.submit(trace.record(status_code))
@@ -1,13 +1,100 @@
 """Database configuration and session management"""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Derive the async driver URL (aiosqlite / asyncpg) from a sync database URL"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> dict:
+    """Pool sizing for the database backend, from Settings"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {
+            "pool_pre_ping": True,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        }
+    if parsed.database in (None, "", ":memory:"):
+        return {}  # base en mémoire : pool unique imposé par le dialecte
+    # Fichier local : pas de coupure réseau, l'écrivain unique est arbitré par busy_timeout.
+    # Pool explicite : aiosqlite ouvrirait sinon une connexion (et un thread) par session
+    return {
+        "poolclass": AsyncAdaptedQueuePool if parsed.get_dialect().is_async else QueuePool,
+        "pool_size": settings.SQLITE_POOL_SIZE,
+        "max_overflow": 0,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000, "check_same_thread": False},
+    }
+
+def sqlite_pragmas() -> list:
+    pragmas = [
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if settings.SQLITE_WAL:
+        # Les lecteurs ne bloquent plus l'écrivain (et inversement)
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+def configure_engine(sync_engine):
+    """Apply the SQLite deployment profile on every new connection"""
+    if sync_engine.dialect.name != "sqlite":
+        return sync_engine
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+    return sync_engine
+
+# Sync engine: scripts, migrations and background jobs
+engine = configure_engine(create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: request handlers (does not block the event loop)
+_async_url = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+configure_engine(async_engine.sync_engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
+def dialect_insert(dialect_name: str):
+    """INSERT construct supporting ON CONFLICT upserts for the backend"""
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -15,3 +102,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1 +1,11 @@
 """Models module"""
+# Import every model so string-based relationships resolve whichever module is loaded first
+from app.models.user import User
+from app.models.field import Field
+from app.models.operation import Operation
+from app.models.alert import Alert
+from app.models.sync import ChangeCounter, Tombstone
+from app.models.rollup import OperationWeeklyRollup
+from app.models.climate import FieldDailyClimate
+from app.models.alert_counter import UserAlertCounter
+from app.models.job import ScheduledJob, JobRun
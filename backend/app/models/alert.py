@@ -1,8 +1,8 @@
 """
 Alert model
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, String, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy.orm import column_property, relationship
 from datetime import datetime
 from app.db.database import Base
 
@@ -15,8 +15,28 @@ class Alert(Base):
     title = Column(String, nullable=False)
     message = Column(String, nullable=False)
     priority = Column(String, default="normal")  # low, normal, high, critical
-    is_read = Column(Boolean, default=False)
+    # Ancienne valeur chargée avant modification (compteur de non-lues, cf. app.models.alert_counter)
+    is_read = column_property(Column(Boolean, default=False), active_history=True)
+    # Alertes générées (app.services.alert_engine) : parcelle concernée et clé d'unicité
+    field_id = Column(String)
+    dedup_key = Column(String)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")  # version de synchronisation (cf. app.models.sync)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="alerts")
+    
+    __table_args__ = (
+        # Pagination par curseur des alertes d'un utilisateur
+        Index("ix_alerts_user_created_id", "user_id", "created_at", "id"),
+        # Alertes non lues (unread_only), même ordre
+        Index("ix_alerts_user_read_created_id", "user_id", "is_read", "created_at", "id"),
+        # Synchronisation différentielle (GET /api/sync/pull)
+        Index("ix_alerts_user_version", "user_id", "version"),
+        # Déduplication du moteur d'alertes
+        Index("ix_alerts_dedup_created", "dedup_key", "created_at"),
+    )
+    # Verrou optimiste sur la version de synchronisation : deux mises à jour
+    # concurrentes de la même alerte ne peuvent pas décompter deux fois le
+    # compteur de non-lues (StaleDataError pour la seconde)
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
@@ -0,0 +1,94 @@
+"""
+Unread alert counters
+
+One row per user, maintained incrementally on every flush that creates,
+marks or deletes alerts (cf. _update_unread_counters), so the app badge
+reads a single row instead of counting alerts.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable
+
+from sqlalchemy import Column, Integer, String, delete, event, func, inspect, select
+from sqlalchemy.orm import Session
+from app.db.database import Base, dialect_insert
+from app.models.alert import Alert
+from app.models.user import User
+
+class UserAlertCounter(Base):
+    __tablename__ = "user_alert_counters"
+
+    user_id = Column(String, primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+
+def apply_counter_deltas(connection, deltas: Dict[str, int]):
+    """Add deltas to the counters with an atomic upsert (unread = unread + delta)"""
+    rows = [{"user_id": user_id, "unread": delta} for user_id, delta in deltas.items() if delta]
+    if not rows:
+        return
+
+    table = UserAlertCounter.__table__
+    stmt = dialect_insert(connection.dialect.name)(table)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"unread": table.c.unread + stmt.excluded.unread},
+        ),
+        rows,
+    )
+
+
+def unread_counts(connection, user_ids: Iterable[str]) -> Dict[str, int]:
+    user_ids = set(user_ids)
+    counts = dict(connection.execute(
+        select(UserAlertCounter.user_id, UserAlertCounter.unread).where(UserAlertCounter.user_id.in_(user_ids))
+    ).all())
+    return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+
+def _was_unread(alert: Alert) -> bool:
+    history = inspect(alert).attrs["is_read"].history
+    previous = history.deleted[0] if history.deleted else alert.is_read
+    return not previous
+
+
+@event.listens_for(Session, "after_flush")
+def _update_unread_counters(session, flush_context):
+    deltas: Dict[str, int] = defaultdict(int)
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+
+    for obj in session.new:
+        if isinstance(obj, Alert) and not obj.is_read:
+            deltas[obj.user_id] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Alert):
+            continue
+        state = inspect(obj)
+        if not (state.attrs["is_read"].history.has_changes() or state.attrs["user_id"].history.has_changes()):
+            continue
+        if _was_unread(obj):
+            history = state.attrs["user_id"].history
+            deltas[history.deleted[0] if history.deleted else obj.user_id] -= 1
+        if not obj.is_read:
+            deltas[obj.user_id] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Alert) and obj.user_id not in deleted_users and _was_unread(obj):
+            deltas[obj.user_id] -= 1
+
+    if not deltas and not deleted_users:
+        return
+    connection = session.connection()
+    apply_counter_deltas(connection, deltas)
+    if deleted_users:
+        connection.execute(delete(UserAlertCounter).where(UserAlertCounter.user_id.in_(deleted_users)))
+
+
+def rebuild_alert_counters(connection):
+    """Recompute every counter from the alerts table (migrations, bulk imports)"""
+    connection.execute(delete(UserAlertCounter))
+    rows = connection.execute(
+        select(Alert.user_id, func.count()).where(Alert.is_read == False).group_by(Alert.user_id)
+    ).all()
+    apply_counter_deltas(connection, dict(rows))
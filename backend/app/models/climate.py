@@ -0,0 +1,25 @@
+"""
+Field daily climate archive (ETc, rainfall)
+
+One row per field and day, filled by the ETP and rainfall routes, so water
+demand can be compared with logged irrigation in SQL.
+"""
+from sqlalchemy import Column, Date, DateTime, Float, Index, String
+from datetime import datetime
+from app.db.database import Base
+
+class FieldDailyClimate(Base):
+    __tablename__ = "field_daily_climate"
+    
+    field_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    week_start = Column(Date, nullable=False)  # lundi de la semaine ISO (jointure avec les cumuls)
+    et0 = Column(Float)  # mm/jour
+    kc = Column(Float)
+    etc = Column(Float)  # mm/jour
+    rainfall = Column(Float)  # mm/jour
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_field_daily_climate_field_week", "field_id", "week_start"),
+    )
@@ -1,10 +1,11 @@
 """
 Field (Parcelle) model
 """
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer
+from sqlalchemy import BigInteger, Column, String, Float, DateTime, ForeignKey, Integer, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
+from app.utils.geo import spatial_columns
 
 class Field(Base):
     __tablename__ = "fields"
@@ -19,11 +20,33 @@ class Field(Base):
     expected_harvest_date = Column(DateTime)
     latitude = Column(Float)
     longitude = Column(Float)
+    # Index spatial (maintenu à l'écriture, cf. _update_spatial_columns)
+    geohash = Column(String(12), index=True)
+    grid_cell = Column(String, index=True)  # cellule grille météo
+    s2_tile = Column(String(5), index=True)  # tuile MGRS Sentinel-2
     status = Column(String, default="active")
     owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")  # version de synchronisation (cf. app.models.sync)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     owner = relationship("User", back_populates="fields")
-    # operations = relationship("Operation", back_populates="field", cascade="all, delete-orphan")  # TODO: Create Operation model
+    operations = relationship("Operation", back_populates="field", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Pagination par curseur des parcelles d'un propriétaire
+        Index("ix_fields_owner_created_id", "owner_id", "created_at", "id"),
+        # Synchronisation différentielle (GET /api/sync/pull)
+        Index("ix_fields_owner_version", "owner_id", "version"),
+        # Rattrapage de l'index spatial des autres workers (cf. app.services.spatial_index)
+        Index("ix_fields_version", "version"),
+    )
+
+
+@event.listens_for(Field, "before_insert")
+@event.listens_for(Field, "before_update")
+def _update_spatial_columns(mapper, connection, target):
+    """Recalculer geohash / cellule météo / tuile Sentinel-2 à chaque écriture"""
+    for key, value in spatial_columns(target.latitude, target.longitude).items():
+        setattr(target, key, value)
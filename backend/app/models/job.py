@@ -0,0 +1,47 @@
+"""
+Scheduled background jobs and their run history
+
+One row per registered job holds its cron schedule, next due time and the
+lease of the worker currently running it (cf. app.services.scheduler);
+every execution is recorded in job_runs.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
+from datetime import datetime
+from app.db.database import Base
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    schedule = Column(String, nullable=False)  # cron (UTC)
+    enabled = Column(Boolean, default=True, nullable=False)
+    next_run_at = Column(DateTime, nullable=False)
+    attempt = Column(Integer, default=0, nullable=False)  # échecs consécutifs (reprises)
+    lease_owner = Column(String)  # worker qui exécute le job
+    lease_expires_at = Column(DateTime)
+    last_started_at = Column(DateTime)
+    last_finished_at = Column(DateTime)
+    last_status = Column(String)  # success | failed | timeout
+    last_error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_scheduled_jobs_due", "enabled", "next_run_at"),
+    )
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_name = Column(String, nullable=False)
+    worker = Column(String, nullable=False)
+    attempt = Column(Integer, default=0, nullable=False)
+    status = Column(String, nullable=False)  # running | success | failed | timeout | abandoned
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    error = Column(Text)
+    result = Column(Text)  # résumé JSON renvoyé par le job
+
+    __table_args__ = (
+        Index("ix_job_runs_job_started", "job_name", "started_at"),
+    )
@@ -1,7 +1,7 @@
 """
 Operation model (irrigation, fertilization, treatment)
 """
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import BigInteger, Column, String, Float, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
@@ -40,8 +40,16 @@ class Operation(Base):
     # Additional data as JSON
     extra_data = Column(JSON)
     
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")  # version de synchronisation (cf. app.models.sync)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     field = relationship("Field", back_populates="operations")
+    
+    __table_args__ = (
+        # Pagination par curseur du journal d'une parcelle
+        Index("ix_operations_field_date_id", "field_id", "date", "id"),
+        # Synchronisation différentielle (GET /api/sync/pull)
+        Index("ix_operations_field_version", "field_id", "version"),
+    )
@@ -0,0 +1,136 @@
+"""
+Operation rollup models
+
+Weekly totals per field and operation type, maintained incrementally on
+every flush that touches operations (cf. _update_operation_rollups), so
+reports read a few rows per field instead of the operation log.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Column, Date, Float, Integer, String, delete, event, inspect, select
+from sqlalchemy.orm import Session
+from app.db.database import Base, dialect_insert
+from app.models.field import Field
+from app.models.operation import Operation
+
+class OperationWeeklyRollup(Base):
+    __tablename__ = "operation_weekly_rollups"
+    
+    field_id = Column(String, primary_key=True)
+    week_start = Column(Date, primary_key=True)  # lundi de la semaine ISO
+    op_type = Column(String, primary_key=True)
+    op_count = Column(Integer, nullable=False, default=0)
+    water_amount = Column(Float, nullable=False, default=0.0)
+    duration = Column(Float, nullable=False, default=0.0)
+    cost = Column(Float, nullable=False, default=0.0)
+
+
+MEASURES = ("water_amount", "duration", "cost")
+
+RollupKey = Tuple[str, date, str]
+
+
+def week_start(value: datetime) -> date:
+    """Monday of the ISO week containing `value`"""
+    day = value.date() if isinstance(value, datetime) else value
+    return day - timedelta(days=day.weekday())
+
+
+def add_operation(deltas: Dict[RollupKey, list], field_id: str, when: datetime, op_type: str,
+                  values: Dict[str, Optional[float]], sign: int = 1):
+    """Accumulate one operation (sign=-1 to remove it) into per-key deltas [count, water, duration, cost]"""
+    delta = deltas[(field_id, week_start(when), op_type)]
+    delta[0] += sign
+    for i, measure in enumerate(MEASURES, start=1):
+        delta[i] += sign * (values.get(measure) or 0.0)
+
+
+def apply_rollup_deltas(connection, deltas: Dict[RollupKey, list]):
+    """Add deltas to the rollup rows with an atomic upsert, then drop emptied rows"""
+    rows = [
+        {"field_id": f, "week_start": w, "op_type": t, "op_count": d[0],
+         "water_amount": d[1], "duration": d[2], "cost": d[3]}
+        for (f, w, t), d in deltas.items() if any(d)
+    ]
+    if not rows:
+        return
+    
+    table = OperationWeeklyRollup.__table__
+    stmt = dialect_insert(connection.dialect.name)(table)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.field_id, table.c.week_start, table.c.op_type],
+            set_={
+                column: table.c[column] + stmt.excluded[column]
+                for column in ("op_count",) + MEASURES
+            },
+        ),
+        rows,
+    )
+    connection.execute(
+        delete(table).where(
+            table.c.field_id.in_({row["field_id"] for row in rows}),
+            table.c.op_count <= 0,
+        )
+    )
+
+
+def _previous(obj, attr: str):
+    """Value of an attribute before the flush"""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+_ROLLUP_ATTRS = ("field_id", "date", "type") + MEASURES
+
+
+@event.listens_for(Session, "after_flush")
+def _update_operation_rollups(session, flush_context):
+    deltas: Dict[RollupKey, list] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    deleted_fields = {obj.id for obj in session.deleted if isinstance(obj, Field)}
+    
+    for obj in session.new:
+        if isinstance(obj, Operation):
+            add_operation(deltas, obj.field_id, obj.date, obj.type,
+                          {m: getattr(obj, m) for m in MEASURES})
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Operation):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[attr].history.has_changes() for attr in _ROLLUP_ATTRS):
+            continue
+        add_operation(deltas, _previous(obj, "field_id"), _previous(obj, "date"), _previous(obj, "type"),
+                      {m: _previous(obj, m) for m in MEASURES}, sign=-1)
+        add_operation(deltas, obj.field_id, obj.date, obj.type,
+                      {m: getattr(obj, m) for m in MEASURES})
+    
+    for obj in session.deleted:
+        if isinstance(obj, Operation) and obj.field_id not in deleted_fields:
+            add_operation(deltas, obj.field_id, obj.date, obj.type,
+                          {m: getattr(obj, m) for m in MEASURES}, sign=-1)
+    
+    if not deltas and not deleted_fields:
+        return
+    connection = session.connection()
+    apply_rollup_deltas(connection, deltas)
+    if deleted_fields:
+        connection.execute(
+            delete(OperationWeeklyRollup).where(OperationWeeklyRollup.field_id.in_(deleted_fields))
+        )
+
+
+def rebuild_rollups(connection, batch_size: int = 10000):
+    """Recompute every rollup row from the operation log (migrations, bulk imports)"""
+    connection.execute(delete(OperationWeeklyRollup))
+    deltas: Dict[RollupKey, list] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    result = connection.execution_options(yield_per=batch_size).execute(
+        select(Operation.field_id, Operation.date, Operation.type, *[getattr(Operation, m) for m in MEASURES])
+    )
+    for field_id, when, op_type, *values in result:
+        add_operation(deltas, field_id, when, op_type, dict(zip(MEASURES, values)))
+    apply_rollup_deltas(connection, deltas)
@@ -0,0 +1,103 @@
+"""
+Sync bookkeeping models (change versions, tombstones)
+
+Every flush that creates, modifies or deletes a Field, Operation or Alert
+takes the next value of a global change counter and stamps it on the rows
+(`version` column); deletions leave a tombstone with the same version.
+Clients pull everything above the last version they have seen.
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, event, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime
+from app.db.database import Base
+from app.models.alert import Alert
+from app.models.field import Field
+from app.models.operation import Operation
+
+CHANGE_COUNTER = "sync"
+
+class ChangeCounter(Base):
+    __tablename__ = "change_counters"
+    
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)  # field, operation, alert
+    entity_id = Column(String, nullable=False)
+    owner_id = Column(String, nullable=False)
+    version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_tombstones_owner_version", "owner_id", "version"),
+        Index("ix_tombstones_entity_version", "entity", "version"),
+    )
+
+
+VERSIONED = {Field: "field", Operation: "operation", Alert: "alert"}
+
+
+def next_change_version(session: Session) -> int:
+    """
+    Allocate the next change version
+
+    The counter row stays locked until the transaction ends, so versions
+    become visible in increasing order and a client never skips a change
+    committed after its last pull.
+    """
+    connection = session.connection()
+    version = connection.execute(
+        update(ChangeCounter)
+        .where(ChangeCounter.name == CHANGE_COUNTER)
+        .values(value=ChangeCounter.value + 1)
+        .returning(ChangeCounter.value)
+    ).scalar()
+    if version is None:
+        version = 1
+        connection.execute(ChangeCounter.__table__.insert().values(name=CHANGE_COUNTER, value=version))
+    return version
+
+
+def current_change_version(connection) -> int:
+    return connection.execute(
+        select(ChangeCounter.value).where(ChangeCounter.name == CHANGE_COUNTER)
+    ).scalar() or 0
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_change_versions(session, flush_context, instances):
+    changed = [
+        obj for obj in session.new | session.dirty
+        if type(obj) in VERSIONED and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in VERSIONED]
+    if not changed and not deleted:
+        return
+    
+    version = next_change_version(session)
+    for obj in changed:
+        obj.version = version
+    
+    # Propriétaire des opérations supprimées : une requête pour toutes
+    field_ids = {obj.field_id for obj in deleted if isinstance(obj, Operation)}
+    field_owners = {}
+    if field_ids:
+        field_owners = dict(session.connection().execute(
+            select(Field.id, Field.owner_id).where(Field.id.in_(field_ids))
+        ).all())
+    
+    for obj in deleted:
+        if isinstance(obj, Field):
+            owner_id = obj.owner_id
+        elif isinstance(obj, Alert):
+            owner_id = obj.user_id
+        else:
+            owner_id = field_owners.get(obj.field_id)
+        if owner_id is not None:
+            session.add(Tombstone(
+                entity=VERSIONED[type(obj)], entity_id=obj.id, owner_id=owner_id, version=version
+            ))
@@ -1,7 +1,7 @@
 """
 User model
 """
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
@@ -19,4 +19,9 @@ class User(Base):
     
     # Relationships
     fields = relationship("Field", back_populates="owner", cascade="all, delete-orphan")
-    # alerts = relationship("Alert", back_populates="user", cascade="all, delete-orphan")  # TODO: Create Alert model
+    alerts = relationship("Alert", back_populates="user", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Pagination par curseur de la liste des utilisateurs
+        Index("ix_users_created_id", "created_at", "id"),
+    )
@@ -13,6 +13,7 @@ class AlertBase(BaseModel):
 
 class AlertCreate(AlertBase):
     user_id: str
+    field_id: Optional[str] = None
 
 class AlertUpdate(BaseModel):
     is_read: Optional[bool] = None
@@ -20,8 +21,17 @@ class AlertUpdate(BaseModel):
 class AlertResponse(AlertBase):
     id: str
     user_id: str
+    field_id: Optional[str] = None
     is_read: bool
     created_at: datetime
     
     class Config:
         from_attributes = True
+
+class AlertEvaluation(BaseModel):
+    fields: int  # parcelles évaluées
+    created: int
+    deduplicated: int  # alertes identiques non lues déjà présentes
+
+class UnreadCount(BaseModel):
+    unread: int
@@ -0,0 +1,25 @@
+"""
+Analytics schemas (Pydantic models)
+"""
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+class WaterEfficiencyRow(BaseModel):
+    field_id: str
+    field_name: str
+    week_start: Optional[date] = None  # renseigné si weekly=true
+    irrigation_mm: float
+    rainfall_mm: float
+    etc_mm: float  # demande de la culture
+    climate_days: int  # jours archivés (ETc) dans la période
+    supply_ratio: Optional[float] = None  # (irrigation + pluie) / ETc
+    irrigation_ratio: Optional[float] = None  # irrigation / (ETc - pluie), si déficit
+    cumulative_irrigation_mm: Optional[float] = None  # weekly : cumul depuis le début
+    cumulative_etc_mm: Optional[float] = None
+    efficiency_rank: Optional[float] = None  # saison : rang centile du supply_ratio (0-1)
+
+class WaterEfficiencyReport(BaseModel):
+    start: date  # lundi de la première semaine incluse
+    end: date
+    rows: List[WaterEfficiencyRow]
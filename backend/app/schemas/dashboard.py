@@ -0,0 +1,19 @@
+"""
+Field dashboard schemas (Pydantic models)
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.schemas.field import FieldResponse
+
+class DashboardSection(BaseModel):
+    status: str  # ok | error | timeout | skipped
+    data: Optional[Any] = None
+    error: Optional[str] = None
+    elapsed_ms: int = 0
+
+class FieldDashboard(BaseModel):
+    field: FieldResponse
+    sections: Dict[str, DashboardSection]
+    generated_at: datetime
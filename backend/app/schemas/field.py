@@ -3,7 +3,7 @@ Field schemas (Pydantic models)
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 class FieldBase(BaseModel):
     name: str
@@ -35,8 +35,27 @@ class FieldResponse(FieldBase):
     id: str
     status: str
     owner_id: str
+    geohash: Optional[str] = None
+    grid_cell: Optional[str] = None
+    s2_tile: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+class FieldMapPoint(BaseModel):
+    id: str
+    latitude: float
+    longitude: float
+    geohash: Optional[str] = None
+    grid_cell: Optional[str] = None
+    s2_tile: Optional[str] = None
+    distance_m: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class FieldGroups(BaseModel):
+    key: str
+    groups: Dict[str, List[str]]  # cellule -> ids des parcelles
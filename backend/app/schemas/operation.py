@@ -2,8 +2,8 @@
 Operation schemas (Pydantic models)
 """
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import date, datetime
+from typing import Optional, Dict, Any, List
 
 class OperationBase(BaseModel):
     type: str = Field(..., pattern="^(irrigation|fertilization|treatment|harvest)$")
@@ -82,3 +82,17 @@ class OperationResponse(OperationBase):
     
     class Config:
         from_attributes = True
+
+class SeasonSummaryRow(BaseModel):
+    field_id: str
+    op_type: str
+    week_start: Optional[date] = None  # renseigné si weekly=true
+    op_count: int
+    water_amount: float
+    duration: float
+    cost: float
+
+class SeasonSummary(BaseModel):
+    start: date  # lundi de la première semaine incluse
+    end: date
+    rows: List[SeasonSummaryRow]
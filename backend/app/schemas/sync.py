@@ -0,0 +1,42 @@
+"""
+Offline sync schemas (Pydantic models)
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from app.schemas.alert import AlertResponse
+from app.schemas.field import FieldResponse
+from app.schemas.operation import OperationResponse
+
+class SyncItem(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: str = Field(..., min_length=1, max_length=64)  # client-generated id
+    data: Optional[Dict[str, Any]] = None
+
+class SyncPushRequest(BaseModel):
+    fields: List[SyncItem] = []
+    operations: List[SyncItem] = []
+
+class SyncItemResult(BaseModel):
+    entity: Literal["field", "operation"]
+    id: str
+    op: str
+    status: Literal["created", "updated", "deleted", "error"]
+    error: Optional[str] = None
+
+class SyncPushResponse(BaseModel):
+    applied: int
+    failed: int
+    results: List[SyncItemResult]
+
+class SyncTombstone(BaseModel):
+    entity: Literal["field", "operation", "alert"]
+    id: str
+    version: int
+
+class SyncPullResponse(BaseModel):
+    version: int  # `since` à envoyer au prochain appel
+    has_more: bool
+    fields: List[FieldResponse] = []
+    operations: List[OperationResponse] = []
+    alerts: List[AlertResponse] = []
+    deleted: List[SyncTombstone] = []
@@ -36,3 +36,41 @@ class WeatherCurrent(BaseModel):
     condition: str
     icon: str
     timestamp: datetime
+
+# Séries par position (Open-Meteo, NASA POWER, Open-Elevation, Sentinel-2)
+
+class WeatherDay(BaseModel):
+    date: str
+    temperature_max: float
+    temperature_min: float
+    temperature_mean: float
+    precipitation_sum: float
+    precipitation_probability_max: float
+    wind_speed_max: float
+    relative_humidity_mean: float
+    et0_fao_evapotranspiration: float
+
+class WeatherResponse(BaseModel):
+    latitude: float
+    longitude: float
+    timezone: str
+    current: dict
+    daily: List[WeatherDay]
+
+class RainfallPoint(BaseModel):
+    date: str
+    precipitation: float
+
+class TopographyResponse(BaseModel):
+    elevation: float
+    slope: float
+    aspect: float
+    drainageClass: str
+    floodRisk: str
+
+class NDVIPoint(BaseModel):
+    date: str
+    ndvi_mean: float
+    ndvi_min: float
+    ndvi_max: float
+    cloud_coverage: float
@@ -0,0 +1,295 @@
+"""
+Moteur de génération d'alertes
+Évalue des règles (recommandation d'irrigation, risque inondation, changement
+de stade phénologique) pour toutes les parcelles et insère les nouvelles
+alertes par lots, en ignorant celles déjà émises récemment (lues ou non).
+"""
+
+import asyncio
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.alert import Alert
+from app.models.field import Field
+from app.schemas.alert import AlertResponse
+from app.services.batch_compute import batch_computer
+from app.services.irrigation_recommendations import irrigation_recommendation_service
+from app.services.pubsub import publish_event, publish_unread_counts
+from app.services.smi_pipeline import smi_pipeline
+from app.utils.geo import grid_cell_center
+
+
+@dataclass
+class AlertCandidate:
+    user_id: str
+    field_id: str
+    type: str
+    title: str
+    message: str
+    priority: str
+    dedup_key: str
+
+    def to_alert(self) -> Alert:
+        return Alert(
+            id=str(uuid.uuid4()), user_id=self.user_id, field_id=self.field_id, type=self.type,
+            title=self.title, message=self.message, priority=self.priority, dedup_key=self.dedup_key
+        )
+
+
+# Priorités des services de recommandation -> priorités des alertes
+PRIORITY_MAP = {
+    "URGENTE": "critical",
+    "CRITIQUE": "critical",
+    "HAUTE": "high",
+    "MOYENNE": "normal",
+    "BASSE": "low",
+}
+
+
+# ==================== Règles ====================
+
+class AlertRule(ABC):
+    """Règle d'alerte : parcelle (+ conditions SMI si disponibles) -> alertes candidates"""
+    name = "rule"
+    needs_conditions = False
+
+    @abstractmethod
+    def evaluate(self, field: Field, conditions: Optional[Dict], now: datetime) -> List[AlertCandidate]:
+        """Alertes candidates pour la parcelle (sans déduplication)"""
+
+    def candidate(self, field: Field, qualifier: str, **kwargs) -> AlertCandidate:
+        return AlertCandidate(
+            user_id=field.owner_id, field_id=field.id,
+            dedup_key=f"{self.name}:{field.id}:{qualifier}", **kwargs
+        )
+
+
+class IrrigationRecommendationRule(AlertRule):
+    """Recommandation d'irrigation (ou d'arrêt) issue du calcul SMI"""
+    name = "recommendation"
+    needs_conditions = True
+    ACTIONS = ("IRRIGUER_IMMÉDIATEMENT", "IRRIGUER_SOUS_48H", "IRRIGATION_LÉGÈRE", "RISQUE_ASPHYXIE")
+
+    def evaluate(self, field, conditions, now):
+        recommendation = conditions["recommendation"]
+        action = recommendation["action"]
+        if action not in self.ACTIONS:
+            return []
+        volume = recommendation.get("volume_mm")
+        title = action.replace("_", " ").capitalize()
+        if volume:
+            title = f"{title} ({volume} mm)"
+        return [self.candidate(
+            field, action,
+            type="irrigation",
+            title=f"{field.name}: {title}",
+            message=recommendation["reason"],
+            priority=PRIORITY_MAP.get(recommendation["priority"], "normal"),
+        )]
+
+
+class FloodRiskRule(AlertRule):
+    """Risque d'inondation élevé (SMI + pluies prévues)"""
+    name = "flood"
+    needs_conditions = True
+    LEVELS = {"ÉLEVÉ": "high", "CRITIQUE": "critical"}
+
+    def evaluate(self, field, conditions, now):
+        flood_risk = conditions["flood_risk"]
+        level = flood_risk["risk_level"]
+        if level not in self.LEVELS:
+            return []
+        return [self.candidate(
+            field, level,
+            type="weather",
+            title=f"{field.name}: risque inondation {level.lower()}",
+            message="; ".join(flood_risk["warnings"]) or f"Score de risque {flood_risk['risk_score']}",
+            priority=self.LEVELS[level],
+        )]
+
+
+class PhenologyTransitionRule(AlertRule):
+    """Entrée dans un nouveau stade phénologique depuis la fenêtre de déduplication"""
+    name = "phenology"
+
+    def evaluate(self, field, conditions, now):
+        stage = irrigation_recommendation_service.get_phenology_stage(field.planting_date, now)
+        previous = irrigation_recommendation_service.get_phenology_stage(
+            field.planting_date, now - timedelta(hours=settings.ALERT_DEDUP_HOURS)
+        )
+        if stage == previous:
+            return []
+        threshold = irrigation_recommendation_service.PHENOLOGY_THRESHOLDS.get(stage)
+        message = threshold["description"] if threshold else "Préparer la récolte"
+        return [self.candidate(
+            field, stage,
+            type="harvest" if stage == "récolte" else "phenology",
+            title=f"{field.name}: stade {stage}",
+            message=message,
+            priority=PRIORITY_MAP.get(threshold["priority"], "normal") if threshold else "high",
+        )]
+
+
+DEFAULT_RULES = [IrrigationRecommendationRule(), FloodRiskRule(), PhenologyTransitionRule()]
+
+
+# ==================== Moteur ====================
+
+class AlertEngine:
+    """
+    Évaluation des règles sur toute la flotte
+
+    Les parcelles sont lues par lots (keyset sur l'id). Les entrées météo
+    sont récupérées une fois par cellule de grille météo (0.1°) et les
+    indices Sentinel-2 depuis le cache local des scènes. Chaque lot est
+    dédupliqué en une requête contre les alertes récentes (lues ou non) puis
+    inséré en une seule transaction.
+    """
+
+    def __init__(self, rules: Optional[List[AlertRule]] = None):
+        self.rules = rules or DEFAULT_RULES
+        self.last_run: Optional[datetime] = None
+        self.last_stats: Dict = {}
+
+    async def run(self, db: Optional[AsyncSession] = None, owner_id: Optional[str] = None) -> Dict:
+        """Évaluer toutes les parcelles (ou celles d'un propriétaire)"""
+        if db is None:
+            async with AsyncSessionLocal() as session:
+                return await self.run(session, owner_id)
+
+        now = datetime.now()
+        stats = {"fields": 0, "created": 0, "deduplicated": 0}
+        cell_inputs: Dict[str, Optional[Dict]] = {}
+        semaphore = asyncio.Semaphore(settings.ALERT_ENGINE_CONCURRENCY)
+        last_id = ""
+
+        async with httpx.AsyncClient() as client:
+            while True:
+                query = (
+                    select(Field)
+                    .where(Field.planting_date.isnot(None), Field.id > last_id)
+                    .order_by(Field.id)
+                    .limit(settings.ALERT_ENGINE_BATCH_SIZE)
+                )
+                if owner_id:
+                    query = query.where(Field.owner_id == owner_id)
+                fields = (await db.execute(query)).scalars().all()
+                if not fields:
+                    break
+                last_id = fields[-1].id
+
+                conditions = await self._conditions(db, client, semaphore, fields, cell_inputs)
+                candidates = [
+                    candidate
+                    for field in fields
+                    for rule in self.rules
+                    if not rule.needs_conditions or conditions.get(field.id)
+                    for candidate in rule.evaluate(field, conditions.get(field.id), now)
+                ]
+                created = await self._insert_new(db, candidates)
+
+                stats["fields"] += len(fields)
+                stats["created"] += created
+                stats["deduplicated"] += len(candidates) - created
+
+        self.last_run, self.last_stats = now, stats
+        return stats
+
+    async def _conditions(
+        self,
+        db: AsyncSession,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        fields: List[Field],
+        cell_inputs: Dict[str, Optional[Dict]]
+    ) -> Dict[str, Dict]:
+        """Résultat du pipeline SMI par parcelle, avec une requête météo par cellule"""
+        located = [f for f in fields if f.latitude is not None and f.longitude is not None and f.grid_cell]
+        missing = {f.grid_cell for f in located} - set(cell_inputs)
+
+        async def fetch_cell(cell: str):
+            latitude, longitude = grid_cell_center(cell)
+            async with semaphore:
+                try:
+                    rainfall_7d = await smi_pipeline.fetch_rainfall_7d(client, latitude, longitude)
+                    temp_avg, rainfall_forecast = await smi_pipeline.fetch_weather(client, latitude, longitude)
+                    elevation = await smi_pipeline.fetch_elevation(client, latitude, longitude)
+                except (httpx.HTTPError, KeyError, ValueError, ZeroDivisionError) as e:
+                    print(f"⚠️ Alertes: météo indisponible pour la cellule {cell}: {e}")
+                    cell_inputs[cell] = None
+                    return
+            cell_inputs[cell] = {
+                "rainfall_7d": rainfall_7d, "temp_avg": temp_avg,
+                "rainfall_forecast": rainfall_forecast, "elevation": elevation,
+            }
+
+        await asyncio.gather(*(fetch_cell(cell) for cell in missing))
+
+        ready, rows = [], []
+        for field in located:
+            inputs = cell_inputs.get(field.grid_cell)
+            if inputs is None:
+                continue
+            try:
+                indices = await smi_pipeline.field_indices(field, db, allow_gee=settings.ALERT_ENGINE_USE_GEE)
+            except Exception as e:
+                print(f"⚠️ Alertes: indices indisponibles pour {field.id}: {e}")
+                continue
+            if indices is None:
+                continue
+            ready.append(field)
+            rows.append({"ndvi": indices[0], "ndwi": indices[1], "planting_date": field.planting_date, **inputs})
+
+        # Calcul SMI du lot dans le pool de processus (CPU)
+        results = await batch_computer.evaluate(rows, [field.id for field in ready])
+        conditions = {}
+        for field, result in zip(ready, results):
+            conditions[field.id] = result
+            await publish_event(field.owner_id, "recommendation", result)
+        return conditions
+
+    async def _insert_new(self, db: AsyncSession, candidates: Iterable[AlertCandidate]) -> int:
+        """
+        Insérer en une transaction les alertes sans équivalent récent
+
+        Une alerte lue compte aussi : sinon elle reviendrait à chaque
+        exécution tant que la condition reste vraie (ALERT_DEDUP_HOURS).
+        """
+        by_key = {c.dedup_key: c for c in candidates}
+        if not by_key:
+            return 0
+
+        since = datetime.utcnow() - timedelta(hours=settings.ALERT_DEDUP_HOURS)
+        result = await db.execute(
+            select(Alert.dedup_key).where(
+                Alert.dedup_key.in_(by_key),
+                Alert.created_at >= since,
+            )
+        )
+        existing = set(result.scalars())
+
+        alerts = [c.to_alert() for key, c in by_key.items() if key not in existing]
+        if not alerts:
+            return 0
+        db.add_all(alerts)
+        await db.flush()
+        events = [(alert.user_id, AlertResponse.model_validate(alert)) for alert in alerts]
+        await db.commit()
+
+        for user_id, event in events:
+            await publish_event(user_id, "alert", event)
+        await publish_unread_counts(db, {user_id for user_id, _ in events})
+        return len(alerts)
+
+
+# Instance globale
+alert_engine = AlertEngine()
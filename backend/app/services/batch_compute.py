@@ -0,0 +1,138 @@
+"""
+Calcul par lots sur toute la flotte dans un pool de processus
+
+Le calcul SMI / SWDI / risque inondation / recommandation est du Python pur
+(lié au CPU) : dans le processus du serveur il est limité à un cœur et
+bloque la boucle d'événements. Les entrées des parcelles sont rangées dans
+une matrice float64 (une ligne par parcelle, colonnes INPUT_COLUMNS),
+découpée en tranches envoyées à un ProcessPoolExecutor ; au-delà de
+BATCH_COMPUTE_SHM_MIN_BYTES la matrice passe par la mémoire partagée et
+chaque tâche ne transporte que son intervalle de lignes. Les résultats sont
+remis dans l'ordre des parcelles.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import executors
+
+INPUT_COLUMNS = ("ndvi", "ndwi", "rainfall_7d", "temp_avg", "rainfall_forecast", "elevation", "planting_ts")
+
+
+def pack_inputs(rows: Sequence[Dict]) -> np.ndarray:
+    """Entrées par parcelle -> matrice (n, len(INPUT_COLUMNS)) ; planting_date en timestamp"""
+    matrix = np.empty((len(rows), len(INPUT_COLUMNS)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        matrix[i] = [
+            row["ndvi"], row["ndwi"], row["rainfall_7d"], row["temp_avg"],
+            row["rainfall_forecast"], row["elevation"], row["planting_date"].timestamp(),
+        ]
+    return matrix
+
+
+def evaluate_rows(matrix: np.ndarray, field_ids: Sequence[str]) -> List[Dict]:
+    """Pipeline SMI pour chaque ligne (exécuté dans un processus du pool ou en ligne)"""
+    from app.services.smi_pipeline import smi_pipeline
+
+    results = []
+    for field_id, (ndvi, ndwi, rainfall_7d, temp_avg, rainfall_forecast, elevation, planting_ts) in zip(field_ids, matrix):
+        field = SimpleNamespace(id=field_id, planting_date=datetime.fromtimestamp(planting_ts))
+        results.append(smi_pipeline.evaluate(
+            field, float(ndvi), float(ndwi), float(rainfall_7d), float(temp_avg),
+            float(rainfall_forecast), float(elevation)
+        ))
+    return results
+
+
+def _evaluate_shared(name: str, shape: Tuple[int, int], start: int, end: int, field_ids: Sequence[str]) -> List[Dict]:
+    """Tâche du pool : lire ses lignes dans la mémoire partagée"""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        return evaluate_rows(matrix[start:end], field_ids)
+    finally:
+        block.close()
+
+
+class BatchComputer:
+    def __init__(self, workers: int, chunk_size: int, min_rows: int, shm_min_bytes: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_rows = min_rows
+        self.shm_min_bytes = shm_min_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0  # tranches soumises au pool
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn : pas de fork d'un processus qui a déjà des threads et une boucle asyncio
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def use_pool(self, n_rows: int) -> bool:
+        # Un seul cœur ou petit lot : le transfert coûte plus que le calcul
+        return self.workers > 1 and n_rows >= self.min_rows
+
+    async def evaluate(self, rows: Sequence[Dict], field_ids: Sequence[str]) -> List[Dict]:
+        """Résultats SMI dans l'ordre de `rows` ; en ligne pour les petits lots"""
+        if not rows:
+            return []
+        matrix = pack_inputs(rows)
+        if not self.use_pool(len(rows)):
+            return evaluate_rows(matrix, field_ids)
+
+        loop = asyncio.get_running_loop()
+        bounds = [(start, min(start + self.chunk_size, len(rows))) for start in range(0, len(rows), self.chunk_size)]
+        self.in_flight += len(bounds)
+        try:
+            if matrix.nbytes < self.shm_min_bytes:
+                chunks = await asyncio.gather(*(
+                    loop.run_in_executor(self.executor, evaluate_rows, matrix[start:end], field_ids[start:end])
+                    for start, end in bounds
+                ))
+            else:
+                block = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+                try:
+                    np.ndarray(matrix.shape, dtype=np.float64, buffer=block.buf)[:] = matrix
+                    chunks = await asyncio.gather(*(
+                        loop.run_in_executor(
+                            self.executor, _evaluate_shared, block.name, matrix.shape, start, end, field_ids[start:end]
+                        )
+                        for start, end in bounds
+                    ))
+                finally:
+                    block.close()
+                    block.unlink()
+        finally:
+            self.in_flight -= len(bounds)
+        return [result for chunk in chunks for result in chunk]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instance globale
+batch_computer = BatchComputer(
+    workers=settings.BATCH_COMPUTE_WORKERS,
+    chunk_size=settings.BATCH_COMPUTE_CHUNK_SIZE,
+    min_rows=settings.BATCH_COMPUTE_MIN_ROWS,
+    shm_min_bytes=settings.BATCH_COMPUTE_SHM_MIN_BYTES,
+)
+executors.register("batch_compute", lambda: {
+    "in_flight": batch_computer.in_flight,
+    "queued": max(0, batch_computer.in_flight - batch_computer.workers),
+})
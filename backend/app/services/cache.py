@@ -0,0 +1,352 @@
+"""
+Cache partagé des données amont (Open-Meteo, NASA POWER, Open-Elevation, GEE...)
+
+Niveaux consultés dans l'ordre de CACHE_BACKENDS :
+- memory : LRU en processus, borné en octets ;
+- disk : fichiers locaux, survivent au redémarrage du worker ;
+- redis : partagé entre workers et machines.
+
+Les valeurs sont sérialisées en JSON (orjson) avec leur date d'expiration,
+ce qui permet de recopier un succès d'un niveau lent vers les niveaux
+rapides avec le TTL restant. Protection contre l'effet de meute : un seul
+chargement par clé et par processus (les autres appelants attendent le
+même résultat) et, avec Redis, un verrou entre workers.
+
+Une valeur None n'est jamais mise en cache (échec amont, repli simulé...).
+"""
+
+import asyncio
+import hashlib
+import os
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, CACHE_TIER_HITS, executors, observe_upstream, provider_of
+from app.core.tracing import annotate
+
+_EXPIRY = struct.Struct("!d")
+
+
+def cache_key(namespace: str, *parts) -> str:
+    """Clé lisible ; coordonnées arrondies à 1e-4° (~11 m)"""
+    return ":".join([namespace] + [
+        f"{part:.4f}" if isinstance(part, float) else str(part) for part in parts
+    ])
+
+
+def encode(value: Any, expires_at: float) -> bytes:
+    return _EXPIRY.pack(expires_at) + orjson.dumps(value)
+
+
+def decode(payload: bytes) -> Tuple[float, Any]:
+    (expires_at,) = _EXPIRY.unpack_from(payload)
+    return expires_at, orjson.loads(payload[_EXPIRY.size:])
+
+
+class MemoryCache:
+    """LRU en processus, éviction au-delà de max_bytes"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._total_bytes = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        payload = self._entries.get(key)
+        if payload is None:
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    async def set(self, key: str, payload: bytes, ttl: float):
+        if len(payload) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= len(previous)
+        self._entries[key] = payload
+        self._total_bytes += len(payload)
+        while self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted)
+
+    async def delete(self, key: str):
+        payload = self._entries.pop(key, None)
+        if payload is not None:
+            self._total_bytes -= len(payload)
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "bytes": self._total_bytes}
+
+
+class DiskCache:
+    """Un fichier par clé (écriture atomique), éviction LRU par budget disque"""
+
+    name = "disk"
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Path, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._scanned = False
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return self.root / digest[:2] / digest
+
+    def _scan(self):
+        if self._scanned:
+            return
+        files = []
+        if self.root.exists():
+            for path in self.root.glob("*/*"):
+                if path.suffix == ".tmp":
+                    continue
+                stat = path.stat()
+                files.append((stat.st_atime, path, stat.st_size))
+        files.sort()
+        self._lru = OrderedDict((path, size) for _, path, size in files)
+        self._total_bytes = sum(self._lru.values())
+        self._scanned = True
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            payload = path.read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            self._scan()
+            if path in self._lru:
+                self._lru.move_to_end(path)
+        return payload
+
+    def _write(self, key: str, payload: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+        with self._lock:
+            self._scan()
+            self._total_bytes += len(payload) - self._lru.pop(path, 0)
+            self._lru[path] = len(payload)
+            while self._total_bytes > self.max_bytes and self._lru:
+                evicted, size = self._lru.popitem(last=False)
+                self._total_bytes -= size
+                evicted.unlink(missing_ok=True)
+
+    def _delete(self, key: str):
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        with self._lock:
+            self._total_bytes -= self._lru.pop(path, 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, payload: bytes, ttl: float):
+        await asyncio.to_thread(self._write, key, payload)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._lru), "bytes": self._total_bytes}
+
+
+class RedisCache:
+    """Niveau partagé entre workers ; verrou SET NX contre l'effet de meute"""
+
+    name = "redis"
+
+    prefix = "sigir:cache:"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, payload: bytes, ttl: float):
+        await self.client.set(self.prefix + key, payload, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def acquire(self, key: str, seconds: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await self.client.set(f"{self.prefix}lock:{key}", token, nx=True, px=int(seconds * 1000)):
+            return token
+        return None
+
+    async def release(self, key: str, token: str):
+        lock = f"{self.prefix}lock:{key}"
+        # Ne libérer que notre propre verrou (il a pu expirer entre-temps)
+        if await self.client.get(lock) == token.encode():
+            await self.client.delete(lock)
+
+    async def close(self):
+        await self.client.aclose()
+
+    def stats(self) -> Dict:
+        return {}
+
+
+class TieredCache:
+    def __init__(self, tiers: List, lock_seconds: float = 30):
+        self.tiers = tiers
+        self.lock_seconds = lock_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> Optional[RedisCache]:
+        return next((tier for tier in self.tiers if isinstance(tier, RedisCache)), None)
+
+    async def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        for level, tier in enumerate(self.tiers):
+            payload = await self._safe(tier, tier.get(key))
+            if payload is None:
+                continue
+            expires_at, value = decode(payload)
+            if expires_at <= now:
+                await self._safe(tier, tier.delete(key))
+                continue
+            CACHE_TIER_HITS.labels(tier.name).inc()
+            # Recopier vers les niveaux plus rapides avec le TTL restant
+            for upper in self.tiers[:level]:
+                await self._safe(upper, upper.set(key, payload, expires_at - now))
+            return value
+        return None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        if value is None or ttl <= 0:
+            return
+        payload = encode(value, time.time() + ttl)
+        for tier in self.tiers:
+            await self._safe(tier, tier.set(key, payload, ttl))
+
+    async def delete(self, key: str):
+        for tier in self.tiers:
+            await self._safe(tier, tier.delete(key))
+
+    @staticmethod
+    async def _safe(tier, operation: Awaitable):
+        """Un niveau en panne (Redis injoignable, disque plein) se comporte comme un échec de cache"""
+        try:
+            return await operation
+        except Exception as e:
+            print(f"⚠️ Cache {type(tier).__name__} indisponible: {e}")
+            return None
+
+    async def get_or_set(self, key: str, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Valeur en cache, sinon chargée une seule fois pour tous les appelants concurrents"""
+        namespace = key.split(":", 1)[0]
+        value = await self.get(key)
+        if value is not None:
+            self.hits += 1
+            CACHE_REQUESTS.labels(namespace, "hit").inc()
+            annotate(cache="hit")
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(namespace, "miss").inc()
+            annotate(cache="miss")
+            task = self._inflight[key] = asyncio.create_task(self._load(key, ttl, loader))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            # Chargement déjà en cours dans ce processus
+            CACHE_REQUESTS.labels(namespace, "coalesced").inc()
+            annotate(cache="coalesced")
+        # shield : un appelant annulé (échéance) n'interrompt pas le chargement des autres
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        shared = self.shared
+        token = None
+        if shared is not None:
+            try:
+                token = await shared.acquire(key, self.lock_seconds)
+                if token is None:
+                    # Un autre worker charge la même clé : attendre son résultat
+                    value = await self._wait_for_other(key)
+                    if value is not None:
+                        return value
+            except Exception as e:
+                print(f"⚠️ Verrou cache indisponible: {e}")
+        try:
+            with observe_upstream(provider_of(key.split(":", 1)[0])):
+                value = await loader()
+            await self.set(key, value, ttl)
+            return value
+        finally:
+            if token is not None:
+                try:
+                    await shared.release(key, token)
+                except Exception as e:
+                    print(f"⚠️ Verrou cache indisponible: {e}")
+
+    async def _wait_for_other(self, key: str) -> Optional[Any]:
+        deadline = time.monotonic() + self.lock_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            value = await self.get(key)
+            if value is not None:
+                return value
+            delay = min(delay * 2, 1.0)
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "tiers": {type(tier).__name__: tier.stats() for tier in self.tiers},
+        }
+
+    async def close(self):
+        for tier in self.tiers:
+            if isinstance(tier, RedisCache):
+                await tier.close()
+
+
+def create_cache() -> TieredCache:
+    tiers = []
+    for name in settings.CACHE_BACKENDS:
+        if name == "memory":
+            tiers.append(MemoryCache(settings.CACHE_MEMORY_MAX_BYTES))
+        elif name == "disk":
+            tiers.append(DiskCache(settings.CACHE_DISK_DIR, settings.CACHE_DISK_MAX_BYTES))
+        elif name == "redis":
+            tiers.append(RedisCache.from_url(settings.CACHE_REDIS_URL or settings.REDIS_URL))
+        else:
+            raise ValueError(f"Unknown cache backend: {name}")
+    return TieredCache(tiers, lock_seconds=settings.CACHE_LOCK_SECONDS)
+
+
+# Instance globale
+upstream_cache = create_cache()
+executors.register("upstream_cache_loads", lambda: {"in_flight": len(upstream_cache._inflight)})
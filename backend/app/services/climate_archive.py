@@ -0,0 +1,74 @@
+"""
+Archive of daily ETc and rainfall per field
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import dialect_insert
+from app.models.climate import FieldDailyClimate
+from app.models.rollup import week_start
+from app.schemas.etp import ETPForecast
+from app.schemas.weather import RainfallPoint
+
+CLIMATE_COLUMNS = ("et0", "kc", "etc", "rainfall")
+
+
+async def archive_daily_climate(db: AsyncSession, field_id: str, days: Iterable[Dict]):
+    """
+    Upsert daily values for a field
+
+    Each item has a `day` and any of et0/kc/etc/rainfall; only the columns
+    present are written, so the ETP and rainfall routes fill the same rows.
+    Forecast days are overwritten by later calls.
+    """
+    rows_by_columns: Dict[tuple, list] = {}
+    for item in days:
+        day = item["day"].date() if isinstance(item["day"], datetime) else item["day"]
+        values = {k: item[k] for k in CLIMATE_COLUMNS if item.get(k) is not None}
+        if not values:
+            continue
+        row = {"field_id": field_id, "day": day, "week_start": week_start(day), **values,
+               "updated_at": datetime.utcnow()}
+        rows_by_columns.setdefault(tuple(sorted(values)), []).append(row)
+    if not rows_by_columns:
+        return
+
+    connection = await db.connection()
+    table = FieldDailyClimate.__table__
+    insert = dialect_insert(connection.dialect.name)
+    for columns, rows in rows_by_columns.items():
+        stmt = insert(table)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.field_id, table.c.day],
+                set_={column: stmt.excluded[column] for column in columns + ("updated_at",)},
+            ),
+            rows,
+        )
+    await db.commit()
+
+
+async def archive_rainfall(db: AsyncSession, field_id: str, rainfall_data: List[RainfallPoint]):
+    """Archive des pluies journalières (valeurs manquantes ignorées)"""
+    try:
+        await archive_daily_climate(db, field_id, [
+            {"day": datetime.strptime(point.date, "%Y-%m-%d").date(), "rainfall": point.precipitation}
+            for point in rainfall_data if point.precipitation is not None and point.precipitation >= 0
+        ])
+    except Exception as e:
+        await db.rollback()
+        print(f"⚠️ Archivage pluie impossible: {e}")
+
+
+async def archive_etc(db: AsyncSession, field_id: str, etp_forecast: ETPForecast):
+    """Archive ETc journalière (analyses d'efficience de l'eau)"""
+    try:
+        await archive_daily_climate(db, field_id, [
+            {"day": day.date, "et0": day.et0, "kc": day.kc, "etc": day.etc}
+            for day in etp_forecast.data
+        ])
+    except Exception as e:
+        await db.rollback()
+        print(f"⚠️ Archivage ETc impossible: {e}")
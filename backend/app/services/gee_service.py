@@ -4,7 +4,6 @@ NDVI Sentinel-2 pour surveillance de la végétation
 Account: ee-metamatrice95
 """
 
-import ee
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import json
@@ -23,6 +22,8 @@ class GoogleEarthEngineService:
             return True
             
         try:
+            import ee  # import lourd, différé au premier usage
+            
             # Chercher la clé privée
             key_file = Path(__file__).parent.parent.parent / 'gee-key.json'
             
@@ -67,6 +68,8 @@ class GoogleEarthEngineService:
         if not self.initialize():
             return self._get_simulated_ndvi(start_date or datetime.now() - timedelta(days=120))
         
+        import ee
+        
         try:
             # Définir la zone d'intérêt
             point = ee.Geometry.Point([longitude, latitude])
@@ -4,7 +4,7 @@ Basé sur SMI, stade phénologique, prévisions météo
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 from app.services.soil_moisture import soil_moisture_service
 
 
@@ -323,17 +323,18 @@ class IrrigationRecommendationService:
         return int(round(volume / 5) * 5)  # Arrondir à 5mm près
     
     @staticmethod
-    def get_phenology_stage(planting_date: datetime) -> str:
+    def get_phenology_stage(planting_date: datetime, current_date: Optional[datetime] = None) -> str:
         """
         Déterminer stade phénologique basé sur jours après plantation
         
         Args:
             planting_date: Date de plantation
+            current_date: Date d'évaluation (défaut: maintenant)
         
         Returns:
             Nom du stade phénologique
         """
-        days = (datetime.now() - planting_date).days
+        days = ((current_date or datetime.now()) - planting_date).days
         
         # Cycle riz pluvial Côte d'Ivoire: ~120 jours
         if days < 10:
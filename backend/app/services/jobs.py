@@ -0,0 +1,108 @@
+"""
+Tâches planifiées (cf. app.services.scheduler)
+
+Travaux sortis du chemin critique des requêtes : préchargement des
+prévisions avant le pic du matin, ajout des nouvelles scènes Sentinel-2 au
+cache local, recalcul des alertes et des compteurs de toute la flotte.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+
+import httpx
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.alert_counter import rebuild_alert_counters
+from app.models.field import Field
+from app.services.alert_engine import alert_engine
+from app.services.scene_cache import scene_cache
+from app.services.scheduler import scheduler
+from app.services.smi_pipeline import gee_available, smi_pipeline
+from app.services.spatial_index import spatial_index
+from app.services.weather_data import fetch_forecast, fetch_rainfall, fetch_topography
+from app.services.weather_service import weather_service
+
+
+@scheduler.job("forecast_prefetch", settings.FORECAST_PREFETCH_SCHEDULE, retry_backoff_seconds=120)
+async def forecast_prefetch() -> Dict:
+    """
+    Remplir le cache amont pour chaque position de parcelle
+
+    Mêmes clés que les routes météo, SMI, ETP et tableau de bord : les
+    premières ouvertures de l'application ne font plus d'appel amont. Les
+    prévisions restent en cache jusqu'au prochain run du modèle, d'où une
+    exécution en début d'heure.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Field.latitude, Field.longitude)
+            .where(Field.latitude.isnot(None), Field.longitude.isnot(None))
+            .distinct()
+        )
+        positions = {(round(lat, 4), round(lon, 4)) for lat, lon in result.all()}
+
+    semaphore = asyncio.Semaphore(settings.FORECAST_PREFETCH_CONCURRENCY)
+    failures = 0
+
+    async def prefetch(client: httpx.AsyncClient, latitude: float, longitude: float):
+        nonlocal failures
+        async with semaphore:
+            calls = [
+                fetch_forecast(client, latitude, longitude),
+                fetch_forecast(client, latitude, longitude, past_days=7),
+                fetch_rainfall(client, latitude, longitude, 30),
+                fetch_topography(client, latitude, longitude),
+                smi_pipeline.fetch_weather(client, latitude, longitude),
+                smi_pipeline.fetch_rainfall_7d(client, latitude, longitude),
+                smi_pipeline.fetch_elevation(client, latitude, longitude),
+            ]
+            if settings.OPENWEATHER_API_KEY:
+                calls.append(weather_service.get_forecast(latitude, longitude))
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            failures += sum(isinstance(result, Exception) for result in results)
+
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(prefetch(client, lat, lon) for lat, lon in positions))
+
+    if positions and failures:
+        # Reprise : les positions déjà en cache ne refont pas d'appel
+        raise RuntimeError(f"{failures} upstream calls failed for {len(positions)} positions")
+    return {"positions": len(positions)}
+
+
+@scheduler.job("ndvi_append", settings.NDVI_APPEND_SCHEDULE, timeout_seconds=3 * 3600)
+async def ndvi_append() -> Dict:
+    """Télécharger les scènes Sentinel-2 parues depuis la dernière scène en cache, par tuile"""
+    if not gee_available():
+        return {"skipped": "Earth Engine unavailable"}
+
+    async with AsyncSessionLocal() as db:
+        await spatial_index.ensure_loaded(db)
+
+    window_start = datetime.now() - timedelta(days=30)
+    written = {}
+    for tile, members in spatial_index.group_by_cell("s2_tile").items():
+        if len(members) < settings.SCENE_CACHE_MIN_FIELDS_PER_TILE or scene_cache.is_downloading(tile):
+            continue
+        latest = scene_cache.latest_scene(tile, window_start)
+        start_date = datetime.strptime(latest, "%Y-%m-%d") + timedelta(days=1) if latest else window_start
+        written.update(await smi_pipeline.run_download(members, start_date))
+    return {"tiles": len(written), "scenes": sum(len(dates) for dates in written.values())}
+
+
+@scheduler.job("alert_engine", settings.ALERT_ENGINE_SCHEDULE, enabled=settings.ALERT_ENGINE_ENABLED)
+async def fleet_alerts() -> Dict:
+    """SMI et règles d'alerte pour toutes les parcelles"""
+    return await alert_engine.run()
+
+
+@scheduler.job("alert_counters_reconcile", settings.ALERT_COUNTERS_RECONCILE_SCHEDULE)
+async def alert_counters_reconcile() -> Dict:
+    """Recalculer les compteurs d'alertes non lues depuis la table alerts (filet de sécurité)"""
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(lambda session: rebuild_alert_counters(session.connection()))
+        await db.commit()
+    return {"rebuilt": True}
@@ -0,0 +1,136 @@
+"""
+Pub/sub des événements poussés aux clients (SSE / WebSocket)
+
+Un canal par utilisateur. Le broker en mémoire suffit pour un seul worker ;
+avec plusieurs workers (ou le moteur d'alertes dans un autre processus),
+PUBSUB_BACKEND="redis" relaie les messages entre processus.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.alert_counter import unread_counts
+
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription(ABC):
+    """Messages reçus sur un canal"""
+
+    @abstractmethod
+    async def get(self, timeout: float) -> Optional[str]:
+        """Prochain message, ou None après `timeout` secondes"""
+
+
+class MemorySubscription(Subscription):
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def put(self, message: str):
+        # Client trop lent : on abandonne le plus ancien message
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBroker:
+    """Broker en processus (un seul worker)"""
+
+    def __init__(self):
+        self.channels: Dict[str, Set[MemorySubscription]] = {}
+
+    async def publish(self, channel: str, message: str):
+        for subscription in self.channels.get(channel, ()):
+            subscription.put(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        subscription = MemorySubscription()
+        self.channels.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self.channels.get(channel)
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.channels[channel]
+
+    async def close(self):
+        self.channels.clear()
+
+
+class RedisSubscription(Subscription):
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout: float) -> Optional[str]:
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        data = message["data"]
+        return data.decode() if isinstance(data, bytes) else data
+
+
+class RedisBroker:
+    """Broker Redis (plusieurs workers / processus)"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_broker():
+    if settings.PUBSUB_BACKEND == "redis":
+        return RedisBroker(settings.REDIS_URL)
+    return MemoryBroker()
+
+
+# Instance globale
+broker = create_broker()
+
+
+async def publish_event(user_id: str, event: str, data) -> None:
+    """Publier un événement sur le canal d'un utilisateur (sans jamais faire échouer l'appelant)"""
+    message = json.dumps({"event": event, "data": jsonable_encoder(data)})
+    try:
+        await broker.publish(user_channel(user_id), message)
+    except Exception as e:
+        print(f"⚠️ Publication événement {event} impossible: {e}")
+
+
+async def publish_unread_counts(db: AsyncSession, user_ids: Iterable[str]) -> None:
+    """Publier le nombre d'alertes non lues (après commit) de chaque utilisateur"""
+    counts = await db.run_sync(lambda session: unread_counts(session.connection(), user_ids))
+    for user_id, unread in counts.items():
+        await publish_event(user_id, "unread_count", {"unread": unread})
@@ -0,0 +1,69 @@
+"""
+État de préchauffage des dépendances (sonde /ready)
+
+Les dépendances lentes (Earth Engine, index spatial) sont initialisées en
+arrière-plan depuis le lifespan : le worker accepte le trafic tout de suite
+et /ready indique ce qui est déjà chaud. READY_REQUIRES liste celles sans
+lesquelles /ready répond 503.
+"""
+
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.database import async_engine
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+RETRYING = "retrying"
+UNAVAILABLE = "unavailable"  # non configurée : repli (données simulées...)
+FAILED = "failed"
+
+
+class Readiness:
+    def __init__(self):
+        self.dependencies: Dict[str, Dict] = {}
+
+    def update(self, name: str, state: str, error: Optional[str] = None):
+        entry = self.dependencies.setdefault(name, {"attempts": 0})
+        if state == WARMING:
+            entry["attempts"] += 1
+        entry.update(state=state, error=error, since=time.time())
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """État de chaque dépendance (sans la base, vérifiée à chaque appel)"""
+        now = time.time()
+        return {
+            name: {
+                "state": entry["state"],
+                "attempts": entry["attempts"],
+                "error": entry["error"],
+                "for_seconds": round(now - entry["since"], 1),
+            }
+            for name, entry in self.dependencies.items()
+        }
+
+    async def check(self) -> Dict:
+        """Rapport /ready : base de données vérifiée en direct + dépendances préchauffées"""
+        dependencies = {"database": await check_database(), **self.snapshot()}
+        ready = all(
+            dependencies.get(name, {}).get("state") == READY for name in settings.READY_REQUIRES
+        )
+        return {"ready": ready, "dependencies": dependencies}
+
+
+async def check_database() -> Dict:
+    started = time.perf_counter()
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"state": FAILED, "error": str(e)}
+    return {"state": READY, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+# Instance globale
+readiness = Readiness()
@@ -0,0 +1,415 @@
+"""
+Cache local des scènes Sentinel-2
+Stockage chunké (tuile MGRS x date x bande), compressé, avec éviction LRU par budget disque.
+
+Une tuile est téléchargée en bloc depuis Earth Engine (computePixels) pour
+toutes les parcelles qu'elle couvre ; NDVI/NDWI sont ensuite calculés
+localement par simple lecture disque, sans requête EE par parcelle.
+"""
+
+import json
+import math
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.geo import latlon_to_utm, mgrs_tile_origin
+
+# Bandes Sentinel-2 utilisées (réflectance x 10000) : rouge, PIR, SWIR
+SCENE_BANDS = ("B4", "B8", "B11")
+SCENE_RESOLUTION = 20  # mètres (résolution native de B11)
+TILE_SIZE_M = 100000
+
+
+class SceneChunkCache:
+    """
+    Magasin de chunks raster sur disque
+
+    Arborescence: <root>/<tuile>/<date>/meta.json
+                  <root>/<tuile>/<date>/<bande>/<ligne>_<colonne>.npz
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int,
+        chunk_size: int = 500,
+        resolution: int = SCENE_RESOLUTION
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.resolution = resolution
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Path, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._scanned = False
+        self._downloading: Set[str] = set()
+
+    # ---------- Géométrie ----------
+
+    @property
+    def chunks_per_side(self) -> int:
+        return math.ceil(TILE_SIZE_M / self.resolution / self.chunk_size)
+
+    def _pixel(self, meta: Dict, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Ligne/colonne (pixels) d'une position dans la grille de la tuile"""
+        zone = meta["epsg"] % 100
+        easting, northing, _ = latlon_to_utm(latitude, longitude, zone=zone)
+        col = int((easting - meta["x_min"]) // self.resolution)
+        row = int((meta["y_min"] + TILE_SIZE_M - northing) // self.resolution)
+        return row, col
+
+    def chunks_for_points(self, points: Iterable[Tuple[float, float]], radius_m: float = 50) -> Set[Tuple[int, int]]:
+        """Chunks nécessaires pour couvrir un ensemble de parcelles"""
+        chunks = set()
+        pad = math.ceil(radius_m / self.resolution)
+        for latitude, longitude in points:
+            origin = mgrs_tile_origin(latitude, longitude)
+            row, col = self._pixel(origin, latitude, longitude)
+            for r in (row - pad, row + pad):
+                for c in (col - pad, col + pad):
+                    cr, cc = r // self.chunk_size, c // self.chunk_size
+                    if 0 <= cr < self.chunks_per_side and 0 <= cc < self.chunks_per_side:
+                        chunks.add((cr, cc))
+        return chunks
+
+    # ---------- Stockage ----------
+
+    def _scene_dir(self, tile: str, date: str) -> Path:
+        return self.root / tile / date
+
+    def _chunk_path(self, tile: str, date: str, band: str, row: int, col: int) -> Path:
+        return self._scene_dir(tile, date) / band / f"{row}_{col}.npz"
+
+    def _scan(self):
+        """Reconstruire l'index LRU depuis le disque (ordre des dates d'accès)"""
+        if self._scanned:
+            return
+        files = []
+        if self.root.exists():
+            for path in self.root.rglob("*.npz"):
+                stat = path.stat()
+                files.append((stat.st_atime, path, stat.st_size))
+        files.sort()
+        self._lru = OrderedDict((path, size) for _, path, size in files)
+        self._total_bytes = sum(self._lru.values())
+        self._scanned = True
+
+    def _touch(self, path: Path):
+        if path in self._lru:
+            self._lru.move_to_end(path)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Supprimer les chunks les moins récemment utilisés au-delà du budget"""
+        while self._total_bytes > self.max_bytes and self._lru:
+            path, size = self._lru.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            band_dir = path.parent
+            if band_dir.exists() and not any(band_dir.iterdir()):
+                band_dir.rmdir()
+
+    def write_scene_meta(self, tile: str, date: str, meta: Dict):
+        scene_dir = self._scene_dir(tile, date)
+        scene_dir.mkdir(parents=True, exist_ok=True)
+        (scene_dir / "meta.json").write_text(json.dumps(meta))
+
+    def read_scene_meta(self, tile: str, date: str) -> Optional[Dict]:
+        meta_file = self._scene_dir(tile, date) / "meta.json"
+        if not meta_file.exists():
+            return None
+        return json.loads(meta_file.read_text())
+
+    def write_chunk(self, tile: str, date: str, band: str, row: int, col: int, data: np.ndarray):
+        """Écrire un chunk compressé puis appliquer le budget disque"""
+        path = self._chunk_path(tile, date, band, row, col)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, data=data)
+        size = path.stat().st_size
+
+        with self._lock:
+            self._scan()
+            previous = self._lru.pop(path, 0)
+            self._lru[path] = size
+            self._total_bytes += size - previous
+            self._evict()
+
+    def read_chunk(self, tile: str, date: str, band: str, row: int, col: int) -> Optional[np.ndarray]:
+        path = self._chunk_path(tile, date, band, row, col)
+        try:
+            with np.load(path) as archive:
+                data = archive["data"]
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        with self._lock:
+            self._scan()
+            self._touch(path)
+        return data
+
+    def read_window(self, tile: str, date: str, band: str, row0: int, col0: int, row1: int, col1: int) -> Optional[np.ndarray]:
+        """Lire une fenêtre [row0:row1, col0:col1] (pixels) ; None si un chunk manque"""
+        cs = self.chunk_size
+        window = np.zeros((row1 - row0, col1 - col0), dtype=np.uint16)
+        for cr in range(row0 // cs, (row1 - 1) // cs + 1):
+            for cc in range(col0 // cs, (col1 - 1) // cs + 1):
+                chunk = self.read_chunk(tile, date, band, cr, cc)
+                if chunk is None:
+                    return None
+                r_start, r_end = max(row0, cr * cs), min(row1, (cr + 1) * cs)
+                c_start, c_end = max(col0, cc * cs), min(col1, (cc + 1) * cs)
+                window[r_start - row0:r_end - row0, c_start - col0:c_end - col0] = \
+                    chunk[r_start - cr * cs:r_end - cr * cs, c_start - cc * cs:c_end - cc * cs]
+        return window
+
+    def scenes(self, tile: str) -> List[str]:
+        """Dates des scènes en cache pour une tuile (ordre chronologique)"""
+        tile_dir = self.root / tile
+        if not tile_dir.exists():
+            return []
+        return sorted(p.name for p in tile_dir.iterdir() if (p / "meta.json").exists())
+
+    def latest_scene(self, tile: str, since: datetime) -> Optional[str]:
+        since_str = since.strftime("%Y-%m-%d")
+        dates = [d for d in self.scenes(tile) if d >= since_str]
+        return dates[-1] if dates else None
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._lru.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._scan()
+            return self._total_bytes
+
+    # ---------- Calcul local des indices ----------
+
+    def field_indices(
+        self,
+        latitude: float,
+        longitude: float,
+        since: datetime,
+        radius_m: float = 50
+    ) -> Optional[Dict]:
+        """
+        NDVI/NDWI d'une parcelle depuis la dernière scène en cache
+
+        Returns:
+            Dict (date, ndvi, ndwi, ndvi_min, ndvi_max, red, nir, swir, pixels)
+            ou None si aucune scène récente n'est en cache pour la tuile
+        """
+        origin = mgrs_tile_origin(latitude, longitude)
+        tile = origin["tile"]
+        if not tile:
+            return None
+
+        # Scène la plus récente dont les chunks couvrent la parcelle
+        since_str = since.strftime("%Y-%m-%d")
+        for date in reversed(self.scenes(tile)):
+            if date < since_str:
+                return None
+            meta = self.read_scene_meta(tile, date) or origin
+            row, col = self._pixel(meta, latitude, longitude)
+            pad = max(1, math.ceil(radius_m / self.resolution))
+            row0, col0 = max(0, row - pad), max(0, col - pad)
+            row1, col1 = row + pad + 1, col + pad + 1
+
+            bands = {}
+            for band in SCENE_BANDS:
+                window = self.read_window(tile, date, band, row0, col0, row1, col1)
+                if window is None:
+                    break
+                bands[band] = window.astype(np.float64)
+            if len(bands) == len(SCENE_BANDS):
+                result = self._indices(bands, row, col, row0, col0, row1, col1, pad)
+                if result is not None:
+                    result.update({"tile": tile, "date": date})
+                    return result
+        return None
+
+    @staticmethod
+    def _indices(bands: Dict, row: int, col: int, row0: int, col0: int, row1: int, col1: int, pad: int) -> Optional[Dict]:
+        """Moyennes spectrales et indices sur le disque de pixels valides autour du centre"""
+        rr, cc = np.ogrid[row0:row1, col0:col1]
+        inside = (rr - row) ** 2 + (cc - col) ** 2 <= pad ** 2
+        valid = inside & (bands["B4"] > 0) & (bands["B8"] > 0) & (bands["B11"] > 0)
+        if not valid.any():
+            return None
+
+        red = bands["B4"][valid]
+        nir = bands["B8"][valid]
+        swir = bands["B11"][valid]
+        ndvi_pixels = (nir - red) / (nir + red)
+
+        red_mean, nir_mean, swir_mean = red.mean(), nir.mean(), swir.mean()
+        return {
+            "red": float(red_mean),
+            "nir": float(nir_mean),
+            "swir": float(swir_mean),
+            "ndvi": float((nir_mean - red_mean) / (nir_mean + red_mean)),
+            "ndwi": float((nir_mean - swir_mean) / (nir_mean + swir_mean)),
+            "ndvi_min": float(ndvi_pixels.min()),
+            "ndvi_max": float(ndvi_pixels.max()),
+            "pixels": int(valid.sum()),
+        }
+
+    # ---------- Téléchargement groupé (Earth Engine) ----------
+
+    def download_tile(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        chunks: Optional[Set[Tuple[int, int]]] = None,
+        max_cloud: float = 30
+    ) -> List[str]:
+        """
+        Télécharger les scènes d'une tuile MGRS dans le cache
+
+        Une mosaïque par date d'acquisition ; seuls les chunks manquants sont
+        demandés (tous les chunks de la tuile si `chunks` est None).
+
+        Returns:
+            Dates des scènes écrites
+        """
+        import ee
+
+        origin = mgrs_tile_origin(latitude, longitude)
+        tile = origin["tile"]
+        end_date = end_date or datetime.now()
+        if chunks is None:
+            n = self.chunks_per_side
+            chunks = {(r, c) for r in range(n) for c in range(n)}
+
+        with self._lock:
+            if tile in self._downloading:
+                return []
+            self._downloading.add(tile)
+
+        try:
+            tile_geometry = ee.Geometry.Rectangle(
+                [origin["x_min"], origin["y_min"],
+                 origin["x_min"] + TILE_SIZE_M, origin["y_min"] + TILE_SIZE_M],
+                f"EPSG:{origin['epsg']}",
+                False
+            )
+            collection = (ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
+                          .filterBounds(tile_geometry)
+                          .filterDate(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+                          .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", max_cloud)))
+
+            dates = collection.aggregate_array("system:time_start").map(
+                lambda t: ee.Date(t).format("YYYY-MM-dd")
+            ).distinct().getInfo()
+
+            written = []
+            for date in sorted(dates):
+                day = datetime.strptime(date, "%Y-%m-%d")
+                mosaic = (collection
+                          .filterDate(date, (day + timedelta(days=1)).strftime("%Y-%m-%d"))
+                          .mosaic()
+                          .select(list(SCENE_BANDS)))
+
+                self.write_scene_meta(tile, date, {
+                    "tile": tile,
+                    "epsg": origin["epsg"],
+                    "x_min": origin["x_min"],
+                    "y_min": origin["y_min"],
+                    "resolution": self.resolution,
+                    "chunk_size": self.chunk_size,
+                    "bands": list(SCENE_BANDS),
+                })
+
+                for row, col in sorted(chunks):
+                    if all(self._chunk_path(tile, date, b, row, col).exists() for b in SCENE_BANDS):
+                        continue
+                    pixels = self._compute_pixels(ee, mosaic, origin, row, col)
+                    for band in SCENE_BANDS:
+                        self.write_chunk(tile, date, band, row, col, pixels[band].astype(np.uint16))
+                written.append(date)
+
+            print(f"✅ Cache Sentinel-2 {tile}: {len(written)} scène(s), {len(chunks)} chunk(s)")
+            return written
+        finally:
+            with self._lock:
+                self._downloading.discard(tile)
+
+    def _compute_pixels(self, ee, image, origin: Dict, row: int, col: int) -> np.ndarray:
+        """Un chunk (toutes bandes) via ee.data.computePixels, en grille UTM de la tuile"""
+        cs = self.chunk_size
+        res = self.resolution
+        return ee.data.computePixels({
+            "expression": image,
+            "fileFormat": "NUMPY_NDARRAY",
+            "bandIds": list(SCENE_BANDS),
+            "grid": {
+                "dimensions": {"width": cs, "height": cs},
+                "affineTransform": {
+                    "scaleX": res,
+                    "shearX": 0,
+                    "translateX": origin["x_min"] + col * cs * res,
+                    "shearY": 0,
+                    "scaleY": -res,
+                    "translateY": origin["y_min"] + TILE_SIZE_M - row * cs * res,
+                },
+                "crsCode": f"EPSG:{origin['epsg']}",
+            },
+        })
+
+    def download_for_fields(self, entries: Iterable, start_date: datetime, radius_m: float = 50) -> Dict[str, List[str]]:
+        """
+        Télécharger, tuile par tuile, les chunks couvrant un ensemble de parcelles
+
+        Args:
+            entries: Parcelles (objets avec latitude, longitude, s2_tile)
+            start_date: Début de la période d'acquisition
+
+        Returns:
+            Dict tuile -> dates écrites
+        """
+        by_tile: Dict[str, List] = {}
+        for entry in entries:
+            if entry.s2_tile:
+                by_tile.setdefault(entry.s2_tile, []).append(entry)
+
+        written = {}
+        for tile, members in by_tile.items():
+            points = [(e.latitude, e.longitude) for e in members]
+            written[tile] = self.download_tile(
+                members[0].latitude,
+                members[0].longitude,
+                start_date,
+                chunks=self.chunks_for_points(points, radius_m),
+            )
+        return written
+
+    def is_downloading(self, tile: str) -> bool:
+        with self._lock:
+            return tile in self._downloading
+
+
+# Instance globale
+scene_cache = SceneChunkCache(
+    root=settings.SCENE_CACHE_DIR,
+    max_bytes=settings.SCENE_CACHE_MAX_BYTES,
+    chunk_size=settings.SCENE_CACHE_CHUNK_SIZE,
+)
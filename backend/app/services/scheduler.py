@@ -0,0 +1,249 @@
+"""
+Planificateur de tâches de fond persistant
+
+Les tâches sont déclarées en code (nom, cron, reprises, délai max) et leur
+état est stocké en base (scheduled_jobs) : chaque worker interroge la table,
+prend un bail sur une tâche due par UPDATE conditionnel (un seul worker
+gagne), le renouvelle pendant l'exécution et le libère en fin de tâche.
+Si le worker meurt, le bail expire et un autre worker reprend la tâche.
+Chaque exécution est historisée dans job_runs.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import executors
+from app.db.database import AsyncSessionLocal, dialect_insert
+from app.models.job import JobRun, ScheduledJob
+from app.utils.cron import CronSchedule
+
+
+@dataclass
+class JobDefinition:
+    name: str
+    schedule: CronSchedule
+    func: Callable[[], Awaitable[Optional[Dict]]]
+    enabled: bool = True
+    max_retries: int = 3
+    retry_backoff_seconds: float = 60
+    timeout_seconds: float = 3600
+
+
+class JobScheduler:
+    def __init__(self):
+        self.jobs: Dict[str, JobDefinition] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.running: Dict[str, asyncio.Task] = {}
+
+    def job(self, name: str, schedule: str, enabled: bool = True, **options):
+        """Décorateur : enregistrer une coroutine comme tâche planifiée"""
+        def register(func):
+            self.jobs[name] = JobDefinition(name, CronSchedule(schedule), func, enabled=enabled, **options)
+            return func
+        return register
+
+    # ==================== Table des tâches ====================
+
+    async def sync(self, db: AsyncSession):
+        """Créer les tâches déclarées et appliquer les changements de planification"""
+        if not self.jobs:
+            return
+        now = datetime.utcnow()
+        # Plusieurs workers démarrent ensemble : la ligne créée par un autre est conservée
+        connection = await db.connection()
+        table = ScheduledJob.__table__
+        await db.execute(
+            dialect_insert(connection.dialect.name)(table)
+            .values([
+                {
+                    "name": name, "schedule": definition.schedule.expression, "enabled": definition.enabled,
+                    "next_run_at": definition.schedule.next_after(now), "attempt": 0,
+                }
+                for name, definition in self.jobs.items()
+            ])
+            .on_conflict_do_nothing(index_elements=[table.c.name])
+        )
+        result = await db.execute(select(ScheduledJob).where(ScheduledJob.name.in_(self.jobs)))
+        for row in result.scalars():
+            definition = self.jobs[row.name]
+            row.enabled = definition.enabled
+            if row.schedule != definition.schedule.expression:
+                row.schedule = definition.schedule.expression
+                row.next_run_at = definition.schedule.next_after(now)
+                row.attempt = 0
+        await db.commit()
+
+    async def claim(self, db: AsyncSession, name: str, now: datetime) -> Optional[ScheduledJob]:
+        """Prendre le bail d'une tâche due ; None si un autre worker l'a prise"""
+        result = await db.execute(
+            update(ScheduledJob)
+            .where(
+                ScheduledJob.name == name,
+                ScheduledJob.enabled == True,
+                ScheduledJob.next_run_at <= now,
+                or_(ScheduledJob.lease_expires_at.is_(None), ScheduledJob.lease_expires_at < now),
+            )
+            .values(
+                lease_owner=self.worker_id,
+                lease_expires_at=now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+            )
+        )
+        if result.rowcount != 1:
+            await db.rollback()
+            return None
+        # Exécutions d'un worker disparu (bail expiré)
+        await db.execute(
+            update(JobRun)
+            .where(JobRun.job_name == name, JobRun.status == "running")
+            .values(status="abandoned", finished_at=now)
+        )
+        await db.commit()
+        return await db.get(ScheduledJob, name, populate_existing=True)
+
+    async def due_jobs(self, db: AsyncSession, now: datetime):
+        result = await db.execute(
+            select(ScheduledJob.name).where(
+                ScheduledJob.enabled == True,
+                ScheduledJob.next_run_at <= now,
+                ScheduledJob.name.in_(self.jobs),
+                or_(ScheduledJob.lease_expires_at.is_(None), ScheduledJob.lease_expires_at < now),
+            )
+        )
+        return result.scalars().all()
+
+    # ==================== Exécution ====================
+
+    async def run_due(self):
+        """Un tour : lancer les tâches dues dont ce worker obtient le bail"""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            for name in await self.due_jobs(db, now):
+                if name in self.running:
+                    continue
+                job = await self.claim(db, name, now)
+                if job is None:
+                    continue
+                task = asyncio.create_task(self.execute(self.jobs[name], job.attempt))
+                self.running[name] = task
+                task.add_done_callback(lambda _, name=name: self.running.pop(name, None))
+
+    async def execute(self, definition: JobDefinition, attempt: int):
+        started = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            run = JobRun(
+                job_name=definition.name, worker=self.worker_id, attempt=attempt,
+                status="running", started_at=started
+            )
+            db.add(run)
+            await db.execute(
+                update(ScheduledJob).where(ScheduledJob.name == definition.name).values(last_started_at=started)
+            )
+            await db.commit()
+            run_id = run.id
+
+        heartbeat = asyncio.create_task(self._renew_lease(definition.name))
+        status, error, summary = "success", None, None
+        try:
+            summary = await asyncio.wait_for(definition.func(), definition.timeout_seconds)
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"No result within {definition.timeout_seconds:g}s"
+        except asyncio.CancelledError:
+            # Arrêt du worker : le bail expirera et un autre worker reprendra la tâche
+            heartbeat.cancel()
+            raise
+        except Exception as e:
+            status, error = "failed", str(e) or type(e).__name__
+        finally:
+            heartbeat.cancel()
+
+        await self._finish(definition, attempt, run_id, status, error, summary)
+
+    async def _finish(self, definition: JobDefinition, attempt: int, run_id: int, status: str, error, summary):
+        finished = datetime.utcnow()
+        if status == "success" or attempt >= definition.max_retries:
+            next_run_at, next_attempt = definition.schedule.next_after(finished), 0
+        else:
+            # Reprise avec attente exponentielle
+            delay = definition.retry_backoff_seconds * 2 ** attempt
+            next_run_at, next_attempt = finished + timedelta(seconds=delay), attempt + 1
+
+        if status == "success":
+            print(f"✅ Tâche {definition.name} terminée: {summary or {}}")
+        else:
+            print(f"⚠️ Tâche {definition.name} ({status}, essai {attempt + 1}): {error}")
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(JobRun).where(JobRun.id == run_id).values(
+                    status=status, finished_at=finished, error=error,
+                    result=json.dumps(summary, default=str) if summary is not None else None
+                )
+            )
+            await db.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == definition.name, ScheduledJob.lease_owner == self.worker_id)
+                .values(
+                    next_run_at=next_run_at, attempt=next_attempt, last_finished_at=finished,
+                    last_status=status, last_error=error, lease_owner=None, lease_expires_at=None
+                )
+            )
+            await db.commit()
+
+    async def _renew_lease(self, name: str):
+        interval = settings.SCHEDULER_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(ScheduledJob)
+                    .where(ScheduledJob.name == name, ScheduledJob.lease_owner == self.worker_id)
+                    .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS))
+                )
+                await db.commit()
+
+    async def trigger(self, name: str):
+        """Rendre une tâche due immédiatement (exécution au prochain tour)"""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(ScheduledJob).where(ScheduledJob.name == name).values(next_run_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def run_forever(self):
+        """Boucle de fond (lifespan de l'application)"""
+        synced = False
+        while True:
+            try:
+                if not synced:
+                    async with AsyncSessionLocal() as db:
+                        await self.sync(db)
+                    synced = True
+                await self.run_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Erreur planificateur: {e}")
+            await asyncio.sleep(settings.SCHEDULER_POLL_SECONDS)
+
+    async def shutdown(self):
+        for task in list(self.running.values()):
+            task.cancel()
+        await asyncio.gather(*self.running.values(), return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {"worker": self.worker_id, "running": sorted(self.running)}
+
+
+# Instance globale
+scheduler = JobScheduler()
+executors.register("scheduled_jobs", lambda: {"in_flight": len(scheduler.running)})
@@ -0,0 +1,439 @@
+"""
+Pipeline SMI (Soil Moisture Index) par parcelle
+Indices Sentinel-2 + pluviométrie + météo + topographie -> SMI, risque inondation, recommandation
+
+Utilisé par la route /api/weather/smi et par le moteur d'alertes.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import executors
+from app.core.tracing import span
+from app.models.field import Field
+from app.services.cache import cache_key, upstream_cache
+from app.services.irrigation_recommendations import irrigation_recommendation_service
+from app.services.readiness import READY, RETRYING, UNAVAILABLE, WARMING, readiness
+from app.services.scene_cache import scene_cache
+from app.services.soil_moisture import soil_moisture_service
+from app.services.spatial_index import spatial_index
+from app.utils.conditional import daily_max_age, forecast_max_age, forecast_run, revisit_max_age, revisit_window
+
+
+# ==================== Initialisation Google Earth Engine ====================
+_gee_initialized = False
+GEE_SERVICE_ACCOUNT_FILE = 'gee-service-account.json'
+
+def _initialize_gee() -> bool:
+    """
+    Authentification Earth Engine (bloquant : chargement de la clé + réseau)
+
+    False si GEE n'est pas configuré (paquet ou clé absents) ; lève une
+    exception en cas d'échec transitoire.
+    """
+    global _gee_initialized
+    if _gee_initialized:
+        return True
+
+    if not os.path.exists(GEE_SERVICE_ACCOUNT_FILE):
+        print("⚠️ Fichier clé GEE non trouvé, utilisation de données simulées")
+        return False
+    try:
+        import ee  # import lourd, différé au premier usage
+    except ImportError:
+        print("⚠️ Paquet earthengine-api absent, utilisation de données simulées")
+        return False
+
+    credentials = ee.ServiceAccountCredentials(None, GEE_SERVICE_ACCOUNT_FILE)
+    ee.Initialize(credentials)
+    _gee_initialized = True
+    print("✅ Google Earth Engine initialisé avec succès")
+    return True
+
+def init_gee():
+    """Initialiser Google Earth Engine une seule fois (appel synchrone, scripts)"""
+    try:
+        return _initialize_gee()
+    except Exception as e:
+        print(f"⚠️ Erreur initialisation GEE: {e}")
+        return False
+
+async def warm_up_gee():
+    """
+    Initialiser GEE en arrière-plan (lifespan), avec reprise exponentielle
+
+    En attendant, gee_available() reste False et les routes utilisent le
+    cache des scènes ou les données simulées.
+    """
+    delay = settings.GEE_INIT_BACKOFF_SECONDS
+    while True:
+        readiness.update("earth_engine", WARMING)
+        try:
+            ok = await asyncio.to_thread(_initialize_gee)
+        except Exception as e:
+            readiness.update("earth_engine", RETRYING, error=str(e))
+            print(f"⚠️ Erreur initialisation GEE (nouvel essai dans {delay:g}s): {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.GEE_INIT_MAX_BACKOFF_SECONDS)
+            continue
+        readiness.update("earth_engine", READY if ok else UNAVAILABLE)
+        return ok
+
+def gee_available() -> bool:
+    return _gee_initialized
+
+
+class SMIPipeline:
+    """
+    Étapes du calcul SMI
+
+    Les entrées externes (indices, pluie, météo, altitude) sont récupérées
+    séparément du calcul (evaluate), pour que le moteur d'alertes puisse
+    partager une requête météo entre les parcelles d'une même cellule.
+    """
+
+    def __init__(self):
+        # Téléchargements de tuiles (minutes de GEE) : pool dédié, hors du pool de asyncio.to_thread
+        self.download_executor = ThreadPoolExecutor(
+            max_workers=settings.SCENE_CACHE_DOWNLOAD_WORKERS, thread_name_prefix="s2-download"
+        )
+        self.downloads: Set[asyncio.Future] = set()
+
+    # ==================== Entrées ====================
+
+    def sample_sentinel2_indices(self, field: Field, start_date: datetime, end_date: datetime) -> Tuple[float, float]:
+        """Échantillonner NDVI/NDWI de la dernière image Sentinel-2 via GEE (requête par parcelle)"""
+        if not _gee_initialized:
+            raise HTTPException(status_code=503, detail="Google Earth Engine non disponible")
+
+        import ee
+
+        try:
+            # Créer point géographique
+            point = ee.Geometry.Point([field.longitude, field.latitude])
+
+            # Récupérer dernière image Sentinel-2 (30 jours)
+            collection = ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED") \
+                .filterBounds(point) \
+                .filterDate(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")) \
+                .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 30)) \
+                .select(['B4', 'B8', 'B11']) \
+                .sort('system:time_start', False)
+
+            image_count = collection.size().getInfo()
+
+            if image_count == 0:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Aucune image Sentinel-2 récente (< 30 jours) disponible"
+                )
+
+            # Prendre la dernière image
+            latest_image = ee.Image(collection.first())
+
+            # Extraire valeurs spectrales
+            scale = 20
+            sample = latest_image.sample(
+                region=point.buffer(50),
+                scale=scale,
+                numPixels=10
+            ).getInfo()
+        except ee.EEException as e:
+            raise HTTPException(status_code=503, detail=f"Erreur Google Earth Engine: {str(e)}")
+
+        if not sample['features'] or len(sample['features']) == 0:
+            raise HTTPException(status_code=404, detail="Pas de données spectrales disponibles")
+
+        # Moyenne des pixels
+        b4_values = [f['properties'].get('B4', 0) for f in sample['features'] if 'B4' in f['properties']]
+        b8_values = [f['properties'].get('B8', 0) for f in sample['features'] if 'B8' in f['properties']]
+        b11_values = [f['properties'].get('B11', 0) for f in sample['features'] if 'B11' in f['properties']]
+
+        if not b4_values or not b8_values or not b11_values:
+            raise HTTPException(status_code=404, detail="Valeurs spectrales incomplètes")
+
+        red = sum(b4_values) / len(b4_values)
+        nir = sum(b8_values) / len(b8_values)
+        swir = sum(b11_values) / len(b11_values)
+
+        # Calculer NDVI
+        if (nir + red) > 0:
+            ndvi = (nir - red) / (nir + red)
+        else:
+            ndvi = 0.0
+
+        # Calculer NDWI (NIR - SWIR) / (NIR + SWIR)
+        ndwi = soil_moisture_service.calculate_ndwi(nir, swir)
+
+        return ndvi, ndwi
+
+    async def schedule_tile_download(self, field: Field, start_date: datetime, db: AsyncSession):
+        """
+        Lancer en arrière-plan le téléchargement groupé de la tuile Sentinel-2
+        si elle couvre assez de parcelles pour amortir la requête
+        """
+        if not _gee_initialized or not field.s2_tile or scene_cache.is_downloading(field.s2_tile):
+            return
+
+        await spatial_index.ensure_loaded(db)
+        members = spatial_index.group_by_cell("s2_tile").get(field.s2_tile, [])
+        if len(members) < settings.SCENE_CACHE_MIN_FIELDS_PER_TILE:
+            return
+
+        self.run_download(members, start_date)
+
+    def run_download(self, members, start_date: datetime) -> asyncio.Future:
+        """Téléchargement dans le pool dédié ; échec journalisé (référence gardée jusqu'à la fin)"""
+        future = asyncio.get_running_loop().run_in_executor(
+            self.download_executor, scene_cache.download_for_fields, members, start_date
+        )
+        self.downloads.add(future)
+        future.add_done_callback(self._download_done)
+        return future
+
+    def _download_done(self, future: asyncio.Future):
+        self.downloads.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"⚠️ Téléchargement de tuile Sentinel-2 impossible: {type(error).__name__}: {error}")
+
+    async def field_indices(self, field: Field, db: AsyncSession, allow_gee: bool = True) -> Optional[Tuple[float, float]]:
+        """NDVI/NDWI : cache local des scènes, sinon Sentinel-2 via GEE (None si indisponible sans GEE)"""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=30)
+
+        with span("scene_cache"):
+            cached = scene_cache.field_indices(field.latitude, field.longitude, since=start_date)
+        if cached:
+            ndvi = cached["ndvi"]
+            ndwi = cached["ndwi"]
+            print(f"✅ Sentinel-2 (cache {cached['tile']} {cached['date']}): NDVI={ndvi:.3f}, NDWI={ndwi:.3f}")
+            return ndvi, ndwi
+        if not allow_gee:
+            return None
+
+        # Appels GEE bloquants (getInfo) exécutés hors de la boucle d'événements
+        with span("ee"):
+            ndvi, ndwi = await upstream_cache.get_or_set(
+                cache_key("gee-indices", field.latitude, field.longitude, revisit_window()),
+                revisit_max_age(),
+                lambda: asyncio.to_thread(self.sample_sentinel2_indices, field, start_date, end_date)
+            )
+        await self.schedule_tile_download(field, start_date, db)
+        print(f"✅ Sentinel-2: NDVI={ndvi:.3f}, NDWI={ndwi:.3f}")
+        return ndvi, ndwi
+
+    async def fetch_rainfall_series(
+        self, client: httpx.AsyncClient, latitude: float, longitude: float, start_date: datetime, end_date: datetime
+    ) -> Dict[str, float]:
+        """Pluies journalières NASA POWER {AAAAMMJJ: mm} (en cache jusqu'au lendemain)"""
+        params = {
+            "parameters": "PRECTOTCORR",
+            "community": "AG",
+            "longitude": longitude,
+            "latitude": latitude,
+            "start": start_date.strftime("%Y%m%d"),
+            "end": end_date.strftime("%Y%m%d"),
+            "format": "JSON"
+        }
+
+        async def load():
+            response = await client.get(
+                "https://power.larc.nasa.gov/api/temporal/daily/point", params=params, timeout=60.0
+            )
+            response.raise_for_status()
+            return response.json()["properties"]["parameter"]["PRECTOTCORR"]
+
+        with span("nasa_power"):
+            return await upstream_cache.get_or_set(
+                cache_key("nasa-power", latitude, longitude, params["start"], params["end"]), daily_max_age(), load
+            )
+
+    async def fetch_rainfall_7d(self, client: httpx.AsyncClient, latitude: float, longitude: float) -> float:
+        """Pluviométrie des 7 derniers jours (NASA POWER)"""
+        end_date = datetime.now()
+        series = await self.fetch_rainfall_series(client, latitude, longitude, end_date - timedelta(days=7), end_date)
+        return self.rainfall_total(series.values())
+
+    @staticmethod
+    def rainfall_total(values) -> float:
+        """Cumul de pluie NASA POWER (-999 = valeur manquante)"""
+        return sum([v for v in values if v != -999])
+
+    async def fetch_weather(self, client: httpx.AsyncClient, latitude: float, longitude: float) -> Tuple[float, float]:
+        """Température moyenne des 7 derniers jours et pluies prévues sur 7 jours (Open-Meteo)"""
+        async def load():
+            response = await client.get(
+                "https://api.open-meteo.com/v1/forecast",
+                params={
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "daily": "temperature_2m_mean,precipitation_sum",
+                    "timezone": "Africa/Abidjan",
+                    "forecast_days": 7,
+                    "past_days": 7
+                },
+                timeout=30.0
+            )
+            response.raise_for_status()
+            return response.json()["daily"]
+
+        with span("open_meteo"):
+            daily = await upstream_cache.get_or_set(
+                cache_key("open-meteo-smi", latitude, longitude, forecast_run()), forecast_max_age(), load
+            )
+        return self.weather_inputs(daily)
+
+    @staticmethod
+    def weather_inputs(daily: Dict) -> Tuple[float, float]:
+        """Séries Open-Meteo (7 jours passés + 7 jours prévus) -> température moyenne, pluies prévues"""
+        # Température moyenne des 7 derniers jours
+        temps_past = daily["temperature_2m_mean"][:7]
+        temp_avg = sum(temps_past) / len(temps_past)
+
+        # Pluies prévues 7 prochains jours
+        rainfall_forecast = sum(daily["precipitation_sum"][7:])
+        return temp_avg, rainfall_forecast
+
+    async def fetch_elevation(self, client: httpx.AsyncClient, latitude: float, longitude: float) -> float:
+        """Altitude SRTM (Open-Elevation)"""
+        async def load():
+            response = await client.get(
+                "https://api.open-elevation.com/api/v1/lookup",
+                params={
+                    "locations": f"{latitude},{longitude}"
+                },
+                timeout=30.0
+            )
+            response.raise_for_status()
+            return response.json()["results"][0]["elevation"]
+
+        with span("elevation"):
+            return await upstream_cache.get_or_set(
+                cache_key("open-elevation", latitude, longitude), settings.ELEVATION_CACHE_TTL_SECONDS, load
+            )
+
+    # ==================== Calcul ====================
+
+    def evaluate(
+        self,
+        field: Field,
+        ndvi: float,
+        ndwi: float,
+        rainfall_7d: float,
+        temp_avg: float,
+        rainfall_forecast: float,
+        elevation: float
+    ) -> Dict:
+        """SMI, SWDI, risque inondation et recommandation à partir des entrées"""
+        # Estimation pente/drainage (simplifié)
+        slope = 0.0  # TODO: Calculer avec images DEM
+        drainage_class = "moderate"  # TODO: Déterminer via analyse spatiale
+
+        # === DÉTERMINER TYPE SOL ===
+        # TODO: Intégrer base de données sols ou SoilGrids API
+        soil_type = "sol_argilo_limoneux"  # Type dominant Côte d'Ivoire
+
+        # === CALCULER SMI ===
+        smi_result = soil_moisture_service.calculate_smi_multiindex(
+            ndvi=ndvi,
+            ndwi=ndwi,
+            rainfall_7d=rainfall_7d,
+            temperature_avg=temp_avg,
+            soil_type=soil_type
+        )
+
+        # === CALCULER SWDI ===
+        swdi_result = soil_moisture_service.calculate_swdi(
+            ndvi=ndvi,
+            ndwi=ndwi,
+            soil_type=soil_type
+        )
+
+        # === ÉVALUER RISQUE INONDATION ===
+        flood_risk = soil_moisture_service.assess_flood_risk(
+            smi=smi_result["smi"],
+            rainfall_forecast_7d=rainfall_forecast,
+            slope=slope,
+            drainage_class=drainage_class,
+            elevation=elevation
+        )
+
+        # === STADE PHÉNOLOGIQUE ===
+        phenology_stage = irrigation_recommendation_service.get_phenology_stage(
+            field.planting_date
+        )
+
+        # === GÉNÉRER RECOMMANDATION ===
+        recommendation = irrigation_recommendation_service.generate_recommendation(
+            field_id=field.id,
+            smi_data=smi_result,
+            phenology_stage=phenology_stage,
+            rainfall_forecast_7d=rainfall_forecast,
+            temperature_forecast_avg=temp_avg,
+            flood_risk=flood_risk
+        )
+
+        return {
+            "smi": smi_result["smi"],
+            "smi_class": smi_result["smi_class"],
+            "swdi": swdi_result["swdi"],
+            "swdi_class": swdi_result["swdi_class"],
+            "components": smi_result["components"],
+            "confidence": smi_result["confidence"],
+            "flood_risk": {
+                "risk_level": flood_risk["risk_level"],
+                "risk_score": flood_risk["risk_score"],
+                "warnings": flood_risk["warnings"],
+                "days_until_saturation": flood_risk.get("days_until_saturation")
+            },
+            "recommendation": recommendation,
+            "field_info": {
+                "phenology_stage": phenology_stage,
+                "soil_type": soil_type,
+                "elevation": elevation,
+                "rainfall_7d": round(rainfall_7d, 1),
+                "rainfall_forecast_7d": round(rainfall_forecast, 1),
+                "temperature_avg": round(temp_avg, 1),
+                "ndvi": round(ndvi, 3),
+                "ndwi": round(ndwi, 3)
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def compute(self, field: Field, db: AsyncSession) -> Dict:
+        """Pipeline complet pour une parcelle (route /smi)"""
+        # === 1. RÉCUPÉRER NDVI/NDWI (cache local des scènes, sinon Sentinel-2 via GEE) ===
+        with span("indices"):
+            ndvi, ndwi = await self.field_indices(field, db)
+
+        async with httpx.AsyncClient() as client:
+            # === 2. RÉCUPÉRER PLUVIOMÉTRIE (NASA POWER) ===
+            rainfall_7d = await self.fetch_rainfall_7d(client, field.latitude, field.longitude)
+            print(f"✅ Pluviométrie 7j: {rainfall_7d:.1f}mm")
+
+            # === 3. RÉCUPÉRER TEMPÉRATURE MOYENNE (Open-Meteo) ===
+            temp_avg, rainfall_forecast = await self.fetch_weather(client, field.latitude, field.longitude)
+            print(f"✅ Température moy: {temp_avg:.1f}°C, Pluies prévues: {rainfall_forecast:.1f}mm")
+
+            # === 4. RÉCUPÉRER TOPOGRAPHIE (SRTM) ===
+            elevation = await self.fetch_elevation(client, field.latitude, field.longitude)
+            print(f"✅ Topographie: {elevation}m")
+
+        with span("compute"):
+            return self.evaluate(field, ndvi, ndwi, rainfall_7d, temp_avg, rainfall_forecast, elevation)
+
+
+# Instance globale
+smi_pipeline = SMIPipeline()
+executors.register("scene_downloads", lambda: {"in_flight": len(smi_pipeline.downloads)})
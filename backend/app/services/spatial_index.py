@@ -0,0 +1,392 @@
+"""
+Service d'index spatial des parcelles
+R-tree en mémoire (construction STR) + regroupement par cellule météo / tuile Sentinel-2
+
+L'index est propre au processus : les hooks after_commit ne voient que les
+écritures de ce worker. Avec plusieurs workers (ou le planificateur dans un
+autre processus), ensure_loaded rattrape au plus toutes les
+SPATIAL_INDEX_REFRESH_SECONDS les parcelles modifiées ou supprimées
+ailleurs (versions de synchronisation et tombstones, cf. app.models.sync),
+et recharge tout après SPATIAL_INDEX_MAX_AGE_SECONDS.
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.field import Field
+from app.models.sync import CHANGE_COUNTER, ChangeCounter, Tombstone
+from app.services.readiness import FAILED, READY, WARMING, readiness
+from app.utils.geo import bbox_around, haversine_m
+
+
+@dataclass(frozen=True)
+class FieldEntry:
+    """Entrée légère indexée pour une parcelle géolocalisée"""
+    id: str
+    owner_id: str
+    latitude: float
+    longitude: float
+    geohash: Optional[str] = None
+    grid_cell: Optional[str] = None
+    s2_tile: Optional[str] = None
+
+
+class _Node:
+    __slots__ = ("min_lat", "min_lon", "max_lat", "max_lon", "children", "entries")
+
+    def __init__(self, children=None, entries=None):
+        self.children = children
+        self.entries = entries
+        items = children if children is not None else entries
+        if entries is not None:
+            self.min_lat = min(e.latitude for e in entries)
+            self.max_lat = max(e.latitude for e in entries)
+            self.min_lon = min(e.longitude for e in entries)
+            self.max_lon = max(e.longitude for e in entries)
+        else:
+            self.min_lat = min(c.min_lat for c in items)
+            self.max_lat = max(c.max_lat for c in items)
+            self.min_lon = min(c.min_lon for c in items)
+            self.max_lon = max(c.max_lon for c in items)
+
+    def intersects(self, min_lat, min_lon, max_lat, max_lon) -> bool:
+        return not (
+            self.max_lat < min_lat or self.min_lat > max_lat
+            or self.max_lon < min_lon or self.min_lon > max_lon
+        )
+
+
+class STRTree:
+    """
+    R-tree statique construit par Sort-Tile-Recursive
+
+    Les parcelles étant des points, les feuilles contiennent directement
+    les entrées et les nœuds internes leurs rectangles englobants.
+    """
+
+    def __init__(self, entries: Iterable[FieldEntry], node_capacity: int = 16):
+        self.node_capacity = node_capacity
+        self.size = 0
+        self.root = self._build(list(entries))
+
+    def _build(self, entries: List[FieldEntry]) -> Optional[_Node]:
+        self.size = len(entries)
+        if not entries:
+            return None
+
+        level = [
+            _Node(entries=group)
+            for group in self._str_pack(entries, lambda e: e.longitude, lambda e: e.latitude)
+        ]
+        while len(level) > 1:
+            level = [
+                _Node(children=group)
+                for group in self._str_pack(
+                    level,
+                    lambda n: (n.min_lon + n.max_lon) / 2,
+                    lambda n: (n.min_lat + n.max_lat) / 2,
+                )
+            ]
+        return level[0]
+
+    def _str_pack(self, items, x_key, y_key):
+        """Découper en tranches verticales puis en groupes de node_capacity"""
+        capacity = self.node_capacity
+        n_groups = math.ceil(len(items) / capacity)
+        n_slices = math.ceil(math.sqrt(n_groups))
+        slice_size = n_slices * capacity
+
+        items = sorted(items, key=x_key)
+        groups = []
+        for i in range(0, len(items), slice_size):
+            vertical_slice = sorted(items[i:i + slice_size], key=y_key)
+            for j in range(0, len(vertical_slice), capacity):
+                groups.append(vertical_slice[j:j + capacity])
+        return groups
+
+    def query(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[FieldEntry]:
+        """Entrées contenues dans le rectangle"""
+        if self.root is None:
+            return []
+
+        results = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not node.intersects(min_lat, min_lon, max_lat, max_lon):
+                continue
+            if node.entries is not None:
+                results.extend(
+                    e for e in node.entries
+                    if min_lat <= e.latitude <= max_lat and min_lon <= e.longitude <= max_lon
+                )
+            else:
+                stack.extend(node.children)
+        return results
+
+
+class SpatialIndexService:
+    """
+    Index spatial en mémoire des parcelles
+
+    L'arbre STR est reconstruit en bloc ; les écritures intermédiaires
+    vont dans une couche de modifications consultée en plus de l'arbre,
+    qui est repliée dans l'arbre au-delà de `rebuild_threshold` changements.
+    """
+
+    def __init__(
+        self,
+        rebuild_threshold: int = 256,
+        refresh_seconds: float = settings.SPATIAL_INDEX_REFRESH_SECONDS,
+        max_age_seconds: float = settings.SPATIAL_INDEX_MAX_AGE_SECONDS
+    ):
+        self.rebuild_threshold = rebuild_threshold
+        self.refresh_seconds = refresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._tree = STRTree([])
+        self._entries: Dict[str, FieldEntry] = {}
+        self._overlay: Dict[str, Optional[FieldEntry]] = {}
+        self.loaded = False
+        self.version = 0  # dernière version de synchronisation prise en compte
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    # ---------- Chargement / maintenance ----------
+
+    def load(self, entries: Iterable[FieldEntry], version: int = 0):
+        """Charger (ou recharger) l'index à partir d'une liste complète"""
+        with self._lock:
+            self._entries = {e.id: e for e in entries}
+            self._overlay = {}
+            self._tree = STRTree(self._entries.values())
+            self.version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+            self.loaded = True
+
+    async def ensure_loaded(self, db):
+        """
+        Charger l'index depuis la base au premier usage (session asynchrone)
+
+        Ensuite, au plus toutes les `refresh_seconds` : rattrapage des
+        changements des autres processus, ou rechargement complet si l'index
+        a plus de `max_age_seconds`.
+        """
+        now = time.monotonic()
+        if self.loaded:
+            if now - self._checked_at < self.refresh_seconds:
+                return
+            # Une seule vérification pour les requêtes concurrentes
+            self._checked_at = now
+            if now - self._loaded_at < self.max_age_seconds:
+                await self._catch_up(db)
+                return
+
+        # Compteur lu avant les lignes : un changement plus récent sera rejoué au rattrapage
+        version = (await db.execute(
+            select(ChangeCounter.value).where(ChangeCounter.name == CHANGE_COUNTER)
+        )).scalar() or 0
+        result = await db.execute(
+            select(
+                Field.id, Field.owner_id, Field.latitude, Field.longitude,
+                Field.geohash, Field.grid_cell, Field.s2_tile
+            ).where(Field.latitude.isnot(None), Field.longitude.isnot(None))
+        )
+        rows = result.all()
+
+        self.load((FieldEntry(*row) for row in rows), version)
+
+    async def _catch_up(self, db):
+        """Appliquer les parcelles modifiées ou supprimées depuis `self.version`"""
+        since = self.version
+        result = await db.execute(
+            select(
+                Field.id, Field.owner_id, Field.latitude, Field.longitude,
+                Field.geohash, Field.grid_cell, Field.s2_tile, Field.version
+            ).where(Field.version > since)
+        )
+        changed = result.all()
+        result = await db.execute(
+            select(Tombstone.entity_id, Tombstone.version)
+            .where(Tombstone.entity == "field", Tombstone.version > since)
+        )
+        deleted = result.all()
+
+        with self._lock:
+            for field_id, _ in deleted:
+                self.remove(field_id)
+            for *columns, _ in changed:
+                entry = FieldEntry(*columns)
+                if entry.latitude is None or entry.longitude is None:
+                    self.remove(entry.id)
+                else:
+                    self.upsert(entry)
+            self.version = max([since] + [row[-1] for row in changed] + [row[-1] for row in deleted])
+
+    def upsert(self, entry: FieldEntry):
+        """Ajouter ou déplacer une parcelle"""
+        with self._lock:
+            self._entries[entry.id] = entry
+            self._overlay[entry.id] = entry
+            self._maybe_rebuild()
+
+    def remove(self, field_id: str):
+        """Retirer une parcelle de l'index"""
+        with self._lock:
+            if self._entries.pop(field_id, None) is not None:
+                self._overlay[field_id] = None
+                self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if len(self._overlay) >= self.rebuild_threshold:
+            self._tree = STRTree(self._entries.values())
+            self._overlay = {}
+
+    # ---------- Requêtes ----------
+
+    def fields_in_bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        owner_id: Optional[str] = None
+    ) -> List[FieldEntry]:
+        """Parcelles contenues dans un rectangle (optionnellement filtrées par propriétaire)"""
+        with self._lock:
+            tree = self._tree
+            overlay = dict(self._overlay)
+
+        results = [e for e in tree.query(min_lat, min_lon, max_lat, max_lon) if e.id not in overlay]
+        results.extend(
+            e for e in overlay.values()
+            if e is not None
+            and min_lat <= e.latitude <= max_lat
+            and min_lon <= e.longitude <= max_lon
+        )
+        if owner_id is not None:
+            results = [e for e in results if e.owner_id == owner_id]
+        return results
+
+    def fields_near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_m: float,
+        limit: int = 50,
+        owner_id: Optional[str] = None
+    ) -> List[Tuple[FieldEntry, float]]:
+        """Parcelles à moins de radius_m d'un point, triées par distance"""
+        candidates = self.fields_in_bbox(*bbox_around(latitude, longitude, radius_m), owner_id=owner_id)
+        scored = [
+            (e, haversine_m(latitude, longitude, e.latitude, e.longitude))
+            for e in candidates
+        ]
+        scored = [item for item in scored if item[1] <= radius_m]
+        scored.sort(key=lambda item: item[1])
+        return scored[:limit]
+
+    def group_by_cell(
+        self,
+        key: str = "grid_cell",
+        owner_id: Optional[str] = None,
+        field_ids: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[FieldEntry]]:
+        """
+        Regrouper les parcelles par cellule
+
+        Args:
+            key: "grid_cell" (météo), "s2_tile" (Sentinel-2) ou "geohash"
+            owner_id: Restreindre à un propriétaire
+            field_ids: Restreindre à une liste de parcelles
+        """
+        if key not in ("grid_cell", "s2_tile", "geohash"):
+            raise ValueError(f"Clé de regroupement inconnue: {key}")
+
+        with self._lock:
+            entries = list(self._entries.values())
+
+        if field_ids is not None:
+            wanted = set(field_ids)
+            entries = [e for e in entries if e.id in wanted]
+        if owner_id is not None:
+            entries = [e for e in entries if e.owner_id == owner_id]
+
+        groups = defaultdict(list)
+        for entry in entries:
+            cell = getattr(entry, key)
+            if cell:
+                groups[cell].append(entry)
+        return dict(groups)
+
+    def get(self, field_id: str) -> Optional[FieldEntry]:
+        with self._lock:
+            return self._entries.get(field_id)
+
+
+# Instance globale
+spatial_index = SpatialIndexService()
+
+
+async def warm_up_spatial_index():
+    """Charger l'index au démarrage (lifespan) plutôt qu'à la première requête carte"""
+    readiness.update("spatial_index", WARMING)
+    try:
+        async with AsyncSessionLocal() as db:
+            await spatial_index.ensure_loaded(db)
+    except Exception as e:
+        # Nouvel essai à la première requête (ensure_loaded)
+        readiness.update("spatial_index", FAILED, error=str(e))
+        print(f"⚠️ Préchargement de l'index spatial impossible: {e}")
+        return
+    readiness.update("spatial_index", READY)
+
+
+# ==================== Synchronisation avec les écritures ====================
+# Les changements sont collectés au flush et appliqués seulement au commit,
+# pour qu'un rollback ne laisse pas de parcelle fantôme dans l'index.
+
+_PENDING_KEY = "spatial_index_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_field_changes(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Field):
+            if obj.latitude is None or obj.longitude is None:
+                pending[obj.id] = None
+            else:
+                pending[obj.id] = FieldEntry(
+                    obj.id, obj.owner_id, obj.latitude, obj.longitude,
+                    obj.geohash, obj.grid_cell, obj.s2_tile
+                )
+    for obj in session.deleted:
+        if isinstance(obj, Field):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_field_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not spatial_index.loaded:
+        return
+    for field_id, entry in pending.items():
+        if entry is None:
+            spatial_index.remove(field_id)
+        else:
+            spatial_index.upsert(entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_field_changes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,240 @@
+"""
+Offline sync service
+Applies batches of creates/updates/deletes queued by the mobile app while offline
+"""
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.alert import Alert
+from app.models.field import Field
+from app.models.operation import Operation
+from app.models.sync import Tombstone, current_change_version
+from app.schemas.field import FieldCreate, FieldUpdate
+from app.schemas.operation import OperationCreate, OperationUpdate
+from app.schemas.sync import (
+    SyncItem, SyncItemResult, SyncPullResponse, SyncPushRequest, SyncPushResponse, SyncTombstone
+)
+
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+def _validate(schema: type, item: SyncItem, exclude_unset: bool = False) -> Dict:
+    values: BaseModel = schema.model_validate(item.data or {})
+    return values.model_dump(exclude_unset=exclude_unset)
+
+
+async def _delete(db: AsyncSession, instance):
+    # Créé plus tôt dans le même lot : il suffit de ne pas l'insérer
+    if instance in db.new:
+        db.expunge(instance)
+    else:
+        await db.delete(instance)
+
+
+class SyncService:
+    """
+    Bulk application of offline changes
+
+    Ownership is checked with one query per entity type for the whole batch,
+    and every change is flushed in a single transaction: new rows go out as
+    batched multi-row INSERTs and updated rows as grouped UPDATEs.
+    Client ids are primary keys, so replaying a batch whose acknowledgement
+    was lost is idempotent: a "create" for an existing row is applied as an
+    update and a "delete" for a missing row succeeds.
+    """
+
+    async def apply_push(self, db: AsyncSession, user_id: str, request: SyncPushRequest) -> SyncPushResponse:
+        results: List[SyncItemResult] = []
+
+        owned_fields = await self._apply_fields(db, user_id, request.fields, results)
+        await self._apply_operations(db, user_id, request.operations, owned_fields, results)
+
+        await db.commit()
+
+        failed = sum(1 for r in results if r.status == "error")
+        return SyncPushResponse(applied=len(results) - failed, failed=failed, results=results)
+
+    async def _apply_fields(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        items: List[SyncItem],
+        results: List[SyncItemResult]
+    ) -> Dict[str, Optional[Field]]:
+        """Apply field changes; return the user's fields touched by the batch (None if deleted)"""
+        existing: Dict[str, Optional[Field]] = {}
+        ids = {item.id for item in items}
+        if ids:
+            rows = await db.execute(select(Field).where(Field.id.in_(ids)))
+            existing = {field.id: field for field in rows.scalars()}
+
+        for item in items:
+            field = existing.get(item.id)
+            if field is not None and field.owner_id != user_id:
+                results.append(self._error("field", item, "Field not found"))
+                continue
+
+            try:
+                if item.op == "delete":
+                    if field is not None:
+                        await _delete(db, field)
+                    existing[item.id] = None
+                    status = "deleted"
+                elif field is None:
+                    if item.op == "update":
+                        results.append(self._error("field", item, "Field not found"))
+                        continue
+                    field = Field(id=item.id, owner_id=user_id, **_validate(FieldCreate, item))
+                    db.add(field)
+                    existing[item.id] = field
+                    status = "created"
+                else:
+                    schema = FieldCreate if item.op == "create" else FieldUpdate
+                    for key, value in _validate(schema, item, exclude_unset=True).items():
+                        setattr(field, key, value)
+                    status = "updated"
+            except ValidationError as e:
+                results.append(self._error("field", item, _validation_message(e)))
+                continue
+
+            results.append(SyncItemResult(entity="field", id=item.id, op=item.op, status=status))
+
+        return {
+            field_id: field for field_id, field in existing.items()
+            if field is None or field.owner_id == user_id
+        }
+
+    async def _apply_operations(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        items: List[SyncItem],
+        batch_fields: Dict[str, Optional[Field]],
+        results: List[SyncItemResult]
+    ):
+        if not items:
+            return
+
+        # Opérations existantes et propriétaire de leur parcelle, en une requête
+        ids = {item.id for item in items}
+        rows = await db.execute(
+            select(Operation, Field.owner_id).join(Field).where(Operation.id.in_(ids))
+        )
+        existing = {operation.id: (operation, owner_id) for operation, owner_id in rows.all()}
+
+        # Parcelles référencées appartenant à l'utilisateur, en une requête
+        referenced: Set[str] = {
+            item.data["field_id"] for item in items
+            if item.data and isinstance(item.data.get("field_id"), str)
+        }
+        owned: Set[str] = {field_id for field_id, field in batch_fields.items() if field is not None}
+        unknown = referenced - set(batch_fields)
+        if unknown:
+            rows = await db.execute(
+                select(Field.id).where(Field.id.in_(unknown), Field.owner_id == user_id)
+            )
+            owned.update(rows.scalars())
+
+        for item in items:
+            operation, owner_id = existing.get(item.id, (None, None))
+            if operation is not None and owner_id != user_id:
+                results.append(self._error("operation", item, "Operation not found"))
+                continue
+
+            try:
+                if item.op == "delete":
+                    if operation is not None:
+                        await _delete(db, operation)
+                        del existing[item.id]
+                    status = "deleted"
+                elif operation is None:
+                    if item.op == "update":
+                        results.append(self._error("operation", item, "Operation not found"))
+                        continue
+                    values = _validate(OperationCreate, item)
+                    if values["field_id"] not in owned:
+                        results.append(self._error("operation", item, "Field not found"))
+                        continue
+                    operation = Operation(id=item.id, **values)
+                    db.add(operation)
+                    existing[item.id] = (operation, user_id)
+                    status = "created"
+                else:
+                    schema = OperationCreate if item.op == "create" else OperationUpdate
+                    values = _validate(schema, item, exclude_unset=True)
+                    target_field = values.get("field_id", operation.field_id)
+                    if target_field != operation.field_id and target_field not in owned:
+                        results.append(self._error("operation", item, "Field not found"))
+                        continue
+                    for key, value in values.items():
+                        setattr(operation, key, value)
+                    status = "updated"
+            except ValidationError as e:
+                results.append(self._error("operation", item, _validation_message(e)))
+                continue
+
+            results.append(SyncItemResult(entity="operation", id=item.id, op=item.op, status=status))
+
+    async def pull_changes(self, db: AsyncSession, user_id: str, since: int, limit: int) -> SyncPullResponse:
+        """
+        Rows changed and deleted after version `since`, oldest first
+
+        Each entity type is read through its (owner, version) index. A page
+        stops on a version boundary, so it holds at least `limit` rows of the
+        first truncated type and every row of the versions it covers.
+        """
+        upto = await db.run_sync(lambda session: current_change_version(session.connection()))
+        sources = {
+            "fields": select(Field).where(Field.owner_id == user_id),
+            "operations": select(Operation).join(Field).where(Field.owner_id == user_id),
+            "alerts": select(Alert).where(Alert.user_id == user_id),
+            "deleted": select(Tombstone).where(Tombstone.owner_id == user_id),
+        }
+
+        # Borne de la page : version du limit-ième changement, la plus petite entre types
+        has_more = False
+        for stmt in sources.values():
+            entity = stmt.column_descriptions[0]["entity"]
+            boundary = (await db.execute(
+                stmt.with_only_columns(entity.version)
+                .where(entity.version > since, entity.version <= upto)
+                .order_by(entity.version)
+                .offset(limit - 1)
+                .limit(1)
+            )).scalar()
+            if boundary is not None and boundary < upto:
+                upto, has_more = boundary, True
+
+        rows = {}
+        for key, stmt in sources.items():
+            entity = stmt.column_descriptions[0]["entity"]
+            result = await db.execute(
+                stmt.where(entity.version > since, entity.version <= upto).order_by(entity.version)
+            )
+            rows[key] = result.scalars().all()
+
+        return SyncPullResponse(
+            version=max(upto, since),
+            has_more=has_more,
+            fields=rows["fields"],
+            operations=rows["operations"],
+            alerts=rows["alerts"],
+            deleted=[
+                SyncTombstone(entity=t.entity, id=t.entity_id, version=t.version)
+                for t in rows["deleted"]
+            ],
+        )
+
+    @staticmethod
+    def _error(entity: str, item: SyncItem, message: Optional[str]) -> SyncItemResult:
+        return SyncItemResult(entity=entity, id=item.id, op=item.op, status="error", error=message)
+
+
+sync_service = SyncService()
@@ -0,0 +1,54 @@
+"""
+Cache court des profils utilisateurs
+
+Évite une lecture de la table users à chaque /auth/me. Les entrées vivent
+USER_CACHE_TTL_SECONDS et sont invalidées par update_user ; avec plusieurs
+workers, un autre processus peut servir l'ancien profil jusqu'à expiration.
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+
+class UserCache:
+    def __init__(self, ttl_seconds: int, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.entries: Dict[str, Tuple[UserResponse, float]] = {}
+
+    async def get(self, db: AsyncSession, user_id: str) -> Optional[UserResponse]:
+        """Profil (y compris is_active) depuis le cache, sinon depuis la base"""
+        entry = self.entries.get(user_id)
+        now = time.monotonic()
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        user = await db.get(User, user_id)
+        if user is None:
+            self.entries.pop(user_id, None)
+            return None
+        profile = UserResponse.model_validate(user)
+        if self.ttl_seconds > 0:
+            if len(self.entries) >= self.max_size:
+                self._evict(now)
+            self.entries[user_id] = (profile, now + self.ttl_seconds)
+        return profile
+
+    def invalidate(self, user_id: str):
+        self.entries.pop(user_id, None)
+
+    def _evict(self, now: float):
+        # Entrées expirées, sinon les plus anciennes (ordre d'insertion)
+        expired = [key for key, (_, expires_at) in self.entries.items() if expires_at <= now]
+        for key in expired or list(self.entries)[: self.max_size // 10 or 1]:
+            del self.entries[key]
+
+
+# Instance globale
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS)
@@ -0,0 +1,299 @@
+"""
+Données météo, pluie, topographie et NDVI par position
+
+Appels amont (Open-Meteo, NASA POWER, Open-Elevation, Google Earth Engine)
+partagés par les routes météo, le tableau de bord parcelle et les tâches
+planifiées (préchargement des prévisions). Réponses en cache amont.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.models.field import Field as FieldModel
+from app.schemas.weather import NDVIPoint, RainfallPoint, TopographyResponse, WeatherDay, WeatherResponse
+from app.services.cache import cache_key, upstream_cache
+from app.services.scene_cache import scene_cache
+from app.services.smi_pipeline import gee_available, smi_pipeline
+from app.utils.conditional import forecast_max_age, forecast_run, revisit_max_age, revisit_window
+
+
+# ==================== Open-Meteo API ====================
+
+async def fetch_forecast(client: httpx.AsyncClient, latitude: float, longitude: float, past_days: int = 0) -> dict:
+    """Prévisions journalières 7 jours + conditions actuelles (réponse brute Open-Meteo)"""
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "daily": ",".join([
+            "temperature_2m_max",
+            "temperature_2m_min",
+            "temperature_2m_mean",
+            "precipitation_sum",
+            "precipitation_probability_max",
+            "wind_speed_10m_max",
+            "relative_humidity_2m_mean",
+            "et0_fao_evapotranspiration",
+        ]),
+        "current": ",".join([
+            "temperature_2m",
+            "relative_humidity_2m",
+            "wind_speed_10m",
+            "precipitation",
+        ]),
+        "timezone": "Africa/Abidjan",
+        "forecast_days": 7,
+    }
+    if past_days:
+        params["past_days"] = past_days
+    
+    async def load():
+        upstream = await client.get("https://api.open-meteo.com/v1/forecast", params=params, timeout=30.0)
+        upstream.raise_for_status()
+        return upstream.json()
+    
+    # Partagé entre workers jusqu'au prochain run du modèle
+    with span("open_meteo"):
+        return await upstream_cache.get_or_set(
+            cache_key("open-meteo", latitude, longitude, past_days, forecast_run()), forecast_max_age(), load
+        )
+
+
+def parse_forecast(data: dict, past_days: int = 0) -> WeatherResponse:
+    """Réponse Open-Meteo -> WeatherResponse (jours passés exclus)"""
+    daily = []
+    for i in range(past_days, len(data["daily"]["time"])):
+        daily.append(WeatherDay(
+            date=data["daily"]["time"][i],
+            temperature_max=data["daily"]["temperature_2m_max"][i],
+            temperature_min=data["daily"]["temperature_2m_min"][i],
+            temperature_mean=data["daily"]["temperature_2m_mean"][i],
+            precipitation_sum=data["daily"]["precipitation_sum"][i],
+            precipitation_probability_max=data["daily"]["precipitation_probability_max"][i],
+            wind_speed_max=data["daily"]["wind_speed_10m_max"][i],
+            relative_humidity_mean=data["daily"]["relative_humidity_2m_mean"][i],
+            et0_fao_evapotranspiration=data["daily"]["et0_fao_evapotranspiration"][i],
+        ))
+    
+    return WeatherResponse(
+        latitude=data["latitude"],
+        longitude=data["longitude"],
+        timezone=data["timezone"],
+        current={
+            "temperature": data["current"]["temperature_2m"],
+            "humidity": data["current"]["relative_humidity_2m"],
+            "wind_speed": data["current"]["wind_speed_10m"],
+            "precipitation": data["current"]["precipitation"],
+        },
+        daily=daily,
+    )
+
+
+# ==================== NASA POWER (Rainfall) ====================
+
+async def fetch_rainfall(client: httpx.AsyncClient, latitude: float, longitude: float, days: int) -> List[RainfallPoint]:
+    """Pluies journalières des `days` derniers jours (NASA POWER : -999 = valeur manquante)"""
+    end_date = datetime.now()
+    series = await smi_pipeline.fetch_rainfall_series(
+        client, latitude, longitude, end_date - timedelta(days=days), end_date
+    )
+    return [
+        RainfallPoint(date=f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}", precipitation=value)
+        for date_str, value in series.items()
+    ]
+
+
+# ==================== SRTM (Topographie) ====================
+
+async def fetch_topography(client: httpx.AsyncClient, latitude: float, longitude: float) -> TopographyResponse:
+    """Altitude du centre et pente estimée sur 4 points à 50 m (Open-Elevation)"""
+    delta = 50 / 111320
+    
+    points = [
+        {"latitude": latitude, "longitude": longitude},
+        {"latitude": latitude + delta, "longitude": longitude},
+        {"latitude": latitude - delta, "longitude": longitude},
+        {"latitude": latitude, "longitude": longitude + delta},
+        {"latitude": latitude, "longitude": longitude - delta},
+    ]
+    
+    async def load():
+        upstream = await client.post(
+            "https://api.open-elevation.com/api/v1/lookup",
+            json={"locations": points},
+            timeout=30.0
+        )
+        upstream.raise_for_status()
+        return [r["elevation"] for r in upstream.json()["results"]]
+    
+    with span("elevation"):
+        elevations = await upstream_cache.get_or_set(
+            cache_key("open-elevation", latitude, longitude, "cross-50m"), settings.ELEVATION_CACHE_TTL_SECONDS, load
+        )
+    center_elevation = elevations[0]
+    
+    gradients = [abs(elevations[i] - center_elevation) for i in range(1, 5)]
+    avg_gradient = sum(gradients) / len(gradients)
+    slope = round(abs(avg_gradient / 50) * 100, 2)
+    slope_degrees = round(slope * 0.57, 1)
+    
+    if slope_degrees > 8:
+        drainage_class = "excellent"
+    elif slope_degrees > 5:
+        drainage_class = "good"
+    elif slope_degrees > 2:
+        drainage_class = "moderate"
+    elif slope_degrees > 0.5:
+        drainage_class = "poor"
+    else:
+        drainage_class = "very-poor"
+    
+    if center_elevation < 100 and slope_degrees < 1:
+        flood_risk = "high"
+    elif center_elevation < 200 and slope_degrees < 2:
+        flood_risk = "medium"
+    else:
+        flood_risk = "low"
+    
+    return TopographyResponse(
+        elevation=round(center_elevation),
+        slope=slope_degrees,
+        aspect=0,
+        drainageClass=drainage_class,
+        floodRisk=flood_risk,
+    )
+
+
+# ==================== NDVI Google Earth Engine ====================
+
+def get_real_ndvi_from_gee(latitude: float, longitude: float, start_date: datetime, days_interval: int = 10):
+    """Récupérer les vraies données NDVI depuis Google Earth Engine"""
+    try:
+        import ee
+        
+        # Vérifier que GEE est initialisé
+        if not gee_available():
+            raise Exception("GEE non initialisé")
+        
+        # Point d'intérêt
+        point = ee.Geometry.Point([longitude, latitude])
+        buffer_zone = point.buffer(500)  # 500m autour du point
+        
+        # Dates
+        end_date = datetime.now()
+        
+        # Collection Sentinel-2
+        collection = ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED') \
+            .filterBounds(buffer_zone) \
+            .filterDate(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')) \
+            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 30))
+        
+        # Fonction pour calculer NDVI
+        def calculate_ndvi(image):
+            ndvi = image.normalizedDifference(['B8', 'B4']).rename('NDVI')
+            return ndvi.set('system:time_start', image.get('system:time_start')) \
+                      .set('CLOUDY_PIXEL_PERCENTAGE', image.get('CLOUDY_PIXEL_PERCENTAGE'))
+        
+        ndvi_collection = collection.map(calculate_ndvi)
+        
+        # Récupérer les statistiques (OPTIMISÉ: limité à 10 images max)
+        ndvi_list = []
+        images = ndvi_collection.toList(ndvi_collection.size())
+        size = images.size().getInfo()
+        
+        # Limiter à 10 images pour éviter timeout
+        max_images = min(size, 10)
+        print(f"📊 Traitement de {max_images} images Sentinel-2...")
+        
+        for i in range(max_images):
+            image = ee.Image(images.get(i))
+            
+            stats = image.reduceRegion(
+                reducer=ee.Reducer.mean().combine(
+                    reducer2=ee.Reducer.minMax(),
+                    sharedInputs=True
+                ),
+                geometry=buffer_zone,
+                scale=20,  # Augmenté à 20m pour plus de rapidité
+                maxPixels=1e8  # Réduit pour plus de rapidité
+            ).getInfo()
+            
+            timestamp = image.get('system:time_start').getInfo()
+            cloud_cover = image.get('CLOUDY_PIXEL_PERCENTAGE').getInfo()
+            date = datetime.fromtimestamp(timestamp / 1000)
+            
+            ndvi_mean = stats.get('NDVI_mean', 0)
+            
+            ndvi_list.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'ndvi_mean': round(ndvi_mean, 3),
+                'ndvi_min': round(stats.get('NDVI_min', 0), 3),
+                'ndvi_max': round(stats.get('NDVI_max', 0), 3),
+                'cloud_coverage': round(cloud_cover, 1)
+            })
+        
+        return sorted(ndvi_list, key=lambda x: x['date'])
+        
+    except Exception as e:
+        print(f"Erreur GEE: {e}")
+        return None
+
+
+def latest_acquisition(field: FieldModel, since: datetime):
+    """Date de la dernière scène Sentinel-2 en cache pour la tuile de la parcelle"""
+    if not field.s2_tile:
+        return None
+    return scene_cache.latest_scene(field.s2_tile, since)
+
+
+def get_simulated_ndvi(planting_date: datetime):
+    """Fallback: données NDVI simulées"""
+    days_since_planting = (datetime.now() - planting_date).days
+    ndvi_data = []
+    
+    for day in range(0, min(days_since_planting, 120), 10):
+        if day < 20:
+            ndvi_mean = 0.2 + (day / 20) * 0.2
+        elif day < 60:
+            ndvi_mean = 0.4 + ((day - 20) / 40) * 0.3
+        elif day < 90:
+            ndvi_mean = 0.7 + ((day - 60) / 30) * 0.1
+        else:
+            ndvi_mean = 0.8 - ((day - 90) / 30) * 0.3
+        
+        date = planting_date + timedelta(days=day)
+        ndvi_data.append({
+            'date': date.strftime("%Y-%m-%d"),
+            'ndvi_mean': round(ndvi_mean, 2),
+            'ndvi_min': round(ndvi_mean - 0.05, 2),
+            'ndvi_max': round(ndvi_mean + 0.05, 2),
+            'cloud_coverage': 10.0,
+        })
+    
+    return ndvi_data
+
+
+async def load_ndvi_series(field: FieldModel) -> List[NDVIPoint]:
+    """Série NDVI depuis la plantation : GEE, sinon données simulées"""
+    # Essayer d'abord les vraies données GEE (en cache jusqu'au prochain passage Sentinel-2)
+    ndvi_data = None
+    if gee_available():
+        with span("ee"):
+            ndvi_data = await upstream_cache.get_or_set(
+                cache_key("gee-ndvi", field.latitude, field.longitude, field.planting_date.date(), revisit_window()),
+                revisit_max_age(),
+                lambda: asyncio.to_thread(get_real_ndvi_from_gee, field.latitude, field.longitude, field.planting_date)
+            )
+    
+    # Fallback sur données simulées si erreur GEE
+    if not ndvi_data or len(ndvi_data) == 0:
+        print("⚠️ Utilisation des données NDVI simulées (pas de données GEE)")
+        ndvi_data = get_simulated_ndvi(field.planting_date)
+    else:
+        print(f"✅ {len(ndvi_data)} mesures NDVI réelles récupérées depuis GEE")
+    
+    return [NDVIPoint(**data) for data in ndvi_data]
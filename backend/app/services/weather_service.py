@@ -5,6 +5,8 @@ import httpx
 from datetime import datetime, timedelta
 from typing import List, Optional
 from app.core.config import settings
+from app.services.cache import cache_key, upstream_cache
+from app.utils.conditional import forecast_max_age, forecast_run
 from app.schemas.weather import WeatherForecast, DailyWeather, HourlyWeather, WeatherCurrent
 
 class WeatherService:
@@ -39,29 +41,35 @@ class WeatherService:
     
     async def get_forecast(self, lat: float, lon: float, days: int = 7) -> WeatherForecast:
         """Get weather forecast for a location"""
-        async with httpx.AsyncClient() as client:
-            # Get 5-day forecast (3-hour intervals)
-            response = await client.get(
-                f"{self.base_url}/forecast",
-                params={
-                    "lat": lat,
-                    "lon": lon,
-                    "appid": self.api_key,
-                    "units": "metric"
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Process forecast data
-            daily_forecasts = self._process_forecast_data(data["list"])
-            
-            return WeatherForecast(
-                location=data["city"]["name"],
-                latitude=lat,
-                longitude=lon,
-                forecast=daily_forecasts[:days]
-            )
+        async def load():
+            async with httpx.AsyncClient() as client:
+                # Get 5-day forecast (3-hour intervals)
+                response = await client.get(
+                    f"{self.base_url}/forecast",
+                    params={
+                        "lat": lat,
+                        "lon": lon,
+                        "appid": self.api_key,
+                        "units": "metric"
+                    }
+                )
+                response.raise_for_status()
+                return response.json()
+        
+        # Shared across workers until the next forecast run
+        data = await upstream_cache.get_or_set(
+            cache_key("openweathermap", lat, lon, forecast_run()), forecast_max_age(), load
+        )
+        
+        # Process forecast data
+        daily_forecasts = self._process_forecast_data(data["list"])
+        
+        return WeatherForecast(
+            location=data["city"]["name"],
+            latitude=lat,
+            longitude=lon,
+            forecast=daily_forecasts[:days]
+        )
     
     def _process_forecast_data(self, forecast_list: List[dict]) -> List[DailyWeather]:
         """Process raw forecast data into daily summaries"""
@@ -0,0 +1,88 @@
+"""
+Columnar wire format for time series
+
+Opt-in alternative to the list-of-objects JSON of the NDVI, rainfall and
+forecast endpoints: one array per column plus a start date and a step in
+days (or the list of dates when the series is irregular), so key names are
+sent once instead of once per point. Selected with `?format=columnar` or
+`Accept: application/vnd.sigir.columnar+json`; MessagePack
+(`?format=msgpack` or `Accept: application/msgpack`) carries the same
+document when the optional `msgpack` package is installed.
+
+    {"length": 3, "start": "2026-08-01", "step_days": 10,
+     "columns": {"ndvi_mean": [0.2, 0.3, 0.4], ...}}
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # dépendance optionnelle
+    msgpack = None
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.sigir.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+FORMATS = ("json", "columnar", "msgpack")
+FORMAT_PATTERN = "^(json|columnar|msgpack)$"
+
+
+def wire_format(request: Request, requested: Optional[str]) -> str:
+    """Format from the `format` query parameter, otherwise from Accept"""
+    if requested:
+        if requested == "msgpack" and msgpack is None:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail="MessagePack is not available on this server",
+            )
+        return requested
+    accept = request.headers.get("accept", "")
+    if MSGPACK_MEDIA_TYPE in accept and msgpack is not None:
+        return "msgpack"
+    if COLUMNAR_MEDIA_TYPE in accept or MSGPACK_MEDIA_TYPE in accept:
+        return "columnar"
+    return "json"
+
+
+def _day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def to_columns(rows: Sequence[BaseModel], date_key: str = "date") -> Dict:
+    """List of models -> {length, start, step_days | dates, columns}"""
+    if not rows:
+        return {"length": 0, "start": None, "step_days": None, "columns": {}}
+
+    names = [name for name in type(rows[0]).model_fields if name != date_key]
+    columns: Dict[str, List] = {name: [] for name in names}
+    dates = []
+    for row in rows:
+        dates.append(getattr(row, date_key))
+        for name in names:
+            columns[name].append(getattr(row, name))
+
+    days = [_day(value) for value in dates]
+    steps = {(b - a).days for a, b in zip(days, days[1:])}
+    document = {"length": len(rows), "start": days[0].isoformat()}
+    if len(steps) <= 1:
+        document["step_days"] = steps.pop() if steps else None
+    else:
+        document["dates"] = [day.isoformat() for day in days]
+    document["columns"] = columns
+    return document
+
+
+def columnar_response(fmt: str, document: Dict, response: Response) -> Response:
+    """Encode a columnar document, keeping the headers set on `response` (ETag...)"""
+    headers = dict(response.headers)
+    headers.pop("content-length", None)
+    if fmt == "msgpack":
+        return Response(msgpack.packb(document), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return ORJSONResponse(document, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
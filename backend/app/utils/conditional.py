@@ -0,0 +1,86 @@
+"""
+Conditional GET helpers (ETag / If-None-Match / Cache-Control)
+
+Validators are derived from the inputs that drive a response (coordinates,
+forecast model run, latest Sentinel-2 acquisition, field version...), so a
+route can answer 304 right after loading the field, before any call to an
+upstream API.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the response inputs"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def period_index(period_seconds: int, now: Optional[float] = None) -> int:
+    """Index of the current period (model run, revisit window...) since the epoch"""
+    return int((now or time.time()) // period_seconds)
+
+
+def seconds_until_next(period_seconds: int, now: Optional[float] = None) -> int:
+    now = now or time.time()
+    return max(1, int(period_seconds - now % period_seconds))
+
+
+def forecast_run() -> int:
+    """Current forecast model run (Open-Meteo refresh cadence)"""
+    return period_index(settings.WEATHER_MODEL_RUN_MINUTES * 60)
+
+
+def forecast_max_age() -> int:
+    return seconds_until_next(settings.WEATHER_MODEL_RUN_MINUTES * 60)
+
+
+def daily_max_age() -> int:
+    """Until the next UTC day (daily series: rainfall, crop stage)"""
+    return seconds_until_next(86400)
+
+
+def revisit_window() -> int:
+    """Current Sentinel-2 revisit window"""
+    return period_index(settings.S2_REVISIT_DAYS * 86400)
+
+
+def revisit_max_age() -> int:
+    return seconds_until_next(settings.S2_REVISIT_DAYS * 86400)
+
+
+def utc_day() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Comparaison faible (RFC 9110) : la compression rend l'ETag faible
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: str, max_age: int) -> Optional[Response]:
+    """
+    Set ETag / Cache-Control on `response`
+
+    Returns a 304 response to send as is when the client's If-None-Match
+    already matches, None otherwise. The 304 carries the Vary header the
+    200 would have had (RFC 9110 §15.4.5).
+    """
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        not_modified = dict(headers)
+        if "vary" in response.headers:
+            not_modified["Vary"] = response.headers["vary"]
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=not_modified)
+    response.headers.update(headers)
+    return None
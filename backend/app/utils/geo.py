@@ -0,0 +1,230 @@
+"""
+Utilitaires géographiques
+Geohash, cellules de grille météo, projection UTM et tuiles MGRS (Sentinel-2)
+"""
+import math
+from typing import Dict, Optional, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+
+# Taille des cellules de la grille météo (degrés).
+# Open-Meteo ~0.1°, NASA POWER 0.5° x 0.625° : on regroupe sur la plus fine.
+WEATHER_GRID_STEP = 0.1
+
+GEOHASH_PRECISION = 7  # ~150 m x 150 m
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Lettres MGRS (I et O exclus)
+_MGRS_LAT_BANDS = "CDEFGHJKLMNPQRSTUVWX"
+_MGRS_COL_SETS = ("ABCDEFGH", "JKLMNPQR", "STUVWXYZ")
+_MGRS_ROW_LETTERS = "ABCDEFGHJKLMNPQRSTUV"
+
+# Ellipsoïde WGS84
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+_UTM_K0 = 0.9996
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encoder une position en geohash
+
+    Args:
+        latitude: Latitude (degrés)
+        longitude: Longitude (degrés)
+        precision: Nombre de caractères
+
+    Returns:
+        Chaîne geohash (base32)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def weather_grid_cell(latitude: float, longitude: float, step: float = WEATHER_GRID_STEP) -> str:
+    """
+    Identifiant de la cellule de grille météo contenant le point
+
+    Les parcelles d'une même cellule partagent les mêmes prévisions
+    Open-Meteo / NASA POWER.
+    """
+    row = math.floor((latitude + 90.0) / step)
+    col = math.floor((longitude + 180.0) / step)
+    return f"{step:g}:{row}:{col}"
+
+
+def grid_cell_center(cell: str) -> Tuple[float, float]:
+    """Centre (latitude, longitude) d'une cellule de grille météo"""
+    step_str, row_str, col_str = cell.split(":")
+    step = float(step_str)
+    latitude = (int(row_str) + 0.5) * step - 90.0
+    longitude = (int(col_str) + 0.5) * step - 180.0
+    return round(latitude, 6), round(longitude, 6)
+
+
+def utm_zone(latitude: float, longitude: float) -> int:
+    """Numéro de zone UTM (avec les exceptions Norvège/Svalbard)"""
+    zone = int((longitude + 180.0) / 6.0) + 1
+    if zone > 60:
+        zone = 60
+    if 56.0 <= latitude < 64.0 and 3.0 <= longitude < 12.0:
+        zone = 32
+    if 72.0 <= latitude < 84.0:
+        if 0.0 <= longitude < 9.0:
+            zone = 31
+        elif 9.0 <= longitude < 21.0:
+            zone = 33
+        elif 21.0 <= longitude < 33.0:
+            zone = 35
+        elif 33.0 <= longitude < 42.0:
+            zone = 37
+    return zone
+
+
+def utm_epsg(latitude: float, longitude: float) -> int:
+    """Code EPSG WGS84 / UTM de la zone contenant le point"""
+    zone = utm_zone(latitude, longitude)
+    return (32600 if latitude >= 0 else 32700) + zone
+
+
+def latlon_to_utm(latitude: float, longitude: float, zone: Optional[int] = None) -> Tuple[float, float, int]:
+    """
+    Projeter une position WGS84 en UTM
+
+    Returns:
+        Tuple (easting, northing, zone) en mètres
+    """
+    if zone is None:
+        zone = utm_zone(latitude, longitude)
+
+    e2 = _WGS84_F * (2 - _WGS84_F)
+    ep2 = e2 / (1 - e2)
+
+    lat = math.radians(latitude)
+    lon0 = math.radians((zone - 1) * 6 - 180 + 3)
+    lon = math.radians(longitude)
+
+    sin_lat = math.sin(lat)
+    cos_lat = math.cos(lat)
+    tan_lat = math.tan(lat)
+
+    n = _WGS84_A / math.sqrt(1 - e2 * sin_lat ** 2)
+    t = tan_lat ** 2
+    c = ep2 * cos_lat ** 2
+    a = cos_lat * (lon - lon0)
+
+    m = _WGS84_A * (
+        (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256) * lat
+        - (3 * e2 / 8 + 3 * e2 ** 2 / 32 + 45 * e2 ** 3 / 1024) * math.sin(2 * lat)
+        + (15 * e2 ** 2 / 256 + 45 * e2 ** 3 / 1024) * math.sin(4 * lat)
+        - (35 * e2 ** 3 / 3072) * math.sin(6 * lat)
+    )
+
+    easting = _UTM_K0 * n * (
+        a
+        + (1 - t + c) * a ** 3 / 6
+        + (5 - 18 * t + t ** 2 + 72 * c - 58 * ep2) * a ** 5 / 120
+    ) + 500000.0
+
+    northing = _UTM_K0 * (
+        m + n * tan_lat * (
+            a ** 2 / 2
+            + (5 - t + 9 * c + 4 * c ** 2) * a ** 4 / 24
+            + (61 - 58 * t + t ** 2 + 600 * c - 330 * ep2) * a ** 6 / 720
+        )
+    )
+    if latitude < 0:
+        northing += 10000000.0
+
+    return easting, northing, zone
+
+
+def mgrs_tile(latitude: float, longitude: float) -> Optional[str]:
+    """
+    Identifiant de tuile MGRS 100 km (ex: "30NVN")
+
+    Les produits Sentinel-2 L2A sont découpés selon cette grille : deux parcelles
+    de la même tuile sont couvertes par les mêmes scènes.
+    """
+    if not -80.0 <= latitude < 84.0:
+        return None
+
+    easting, northing, zone = latlon_to_utm(latitude, longitude)
+    band = _MGRS_LAT_BANDS[min(int((latitude + 80.0) / 8.0), len(_MGRS_LAT_BANDS) - 1)]
+
+    col_letters = _MGRS_COL_SETS[(zone - 1) % 3]
+    col = col_letters[int(easting // 100000) - 1]
+
+    row_index = int(northing // 100000) % 20
+    if zone % 2 == 0:
+        row_index = (row_index + 5) % 20
+    row = _MGRS_ROW_LETTERS[row_index]
+
+    return f"{zone:02d}{band}{col}{row}"
+
+
+def mgrs_tile_origin(latitude: float, longitude: float) -> Dict:
+    """
+    Origine UTM du carré MGRS 100 km contenant le point
+
+    Returns:
+        Dict avec tile, epsg, x_min, y_min (coin sud-ouest, mètres)
+    """
+    easting, northing, _ = latlon_to_utm(latitude, longitude)
+    return {
+        "tile": mgrs_tile(latitude, longitude),
+        "epsg": utm_epsg(latitude, longitude),
+        "x_min": math.floor(easting / 100000) * 100000,
+        "y_min": math.floor(northing / 100000) * 100000,
+    }
+
+
+def spatial_columns(latitude: Optional[float], longitude: Optional[float]) -> Dict[str, Optional[str]]:
+    """Colonnes d'indexation spatiale dérivées d'une position (None si pas de GPS)"""
+    if latitude is None or longitude is None:
+        return {"geohash": None, "grid_cell": None, "s2_tile": None}
+    return {
+        "geohash": geohash_encode(latitude, longitude),
+        "grid_cell": weather_grid_cell(latitude, longitude),
+        "s2_tile": mgrs_tile(latitude, longitude),
+    }
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distance orthodromique entre deux points (mètres)"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+def bbox_around(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """Rectangle englobant (min_lat, min_lon, max_lat, max_lon) d'un cercle"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlon = math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat))
+    return latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon
@@ -0,0 +1,69 @@
+"""
+Keyset (cursor) pagination helpers
+
+Cursors are opaque, URL-safe tokens encoding the sort key of the last row
+of a page, e.g. (created_at, id). The next page is fetched with a row-value
+comparison on that key, which the matching composite index serves directly
+whatever the depth, unlike OFFSET which scans and discards skipped rows.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode a sort key as an opaque cursor"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """Decode an opaque cursor, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("cursor size mismatch")
+        return tuple(_decode_value(v) for v in values)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def keyset_paginate(stmt, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    """
+    Order a select by `columns` and start it after `cursor`
+
+    One extra row is requested so that `finish_page` can tell whether a next
+    page exists without a COUNT query.
+    """
+    order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+    stmt = stmt.order_by(*order)
+    if cursor:
+        key = decode_cursor(cursor, len(columns))
+        row_value = tuple_(*columns)
+        stmt = stmt.where(row_value < tuple_(*key) if descending else row_value > tuple_(*key))
+    return stmt.limit(limit + 1)
+
+def finish_page(rows: List, limit: int, key_attrs: Sequence[str], response: Response) -> List:
+    """Trim the look-ahead row and expose the next cursor in a response header"""
+    if limit > 0 and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, attr) for attr in key_attrs])
+    return rows
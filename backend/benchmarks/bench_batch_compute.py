@@ -0,0 +1,96 @@
+"""
+Benchmark: calcul SMI de la flotte dans le processus vs pool de processus
+
+Flotte synthétique (indices, météo, altitude, date de semis aléatoires) :
+le même lot est évalué en ligne (evaluate_rows dans le processus courant),
+puis par BatchComputer avec 1..N workers, en envoyant les tranches par
+pickle ou par mémoire partagée. Le débit (parcelles/s) et l'accélération
+par rapport au calcul en ligne montrent le passage à l'échelle avec le
+nombre de cœurs ; le démarrage des workers (spawn) est exclu de la mesure.
+
+Usage:
+    python benchmarks/bench_batch_compute.py --fields 20000
+    python benchmarks/bench_batch_compute.py --fields 100000 --workers 1,2,4,8 --chunk-size 512
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from app.services.batch_compute import BatchComputer, evaluate_rows, pack_inputs
+
+
+class PooledComputer(BatchComputer):
+    """Toujours passer par le pool, même avec un seul worker (coût du transfert seul)"""
+
+    def use_pool(self, n_rows: int) -> bool:
+        return True
+
+
+def synthetic_fleet(n_fields: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    rows = [
+        {
+            "ndvi": float(rng.uniform(0.1, 0.8)),
+            "ndwi": float(rng.uniform(-0.3, 0.4)),
+            "rainfall_7d": float(rng.gamma(2.0, 10.0)),
+            "temp_avg": float(rng.uniform(22, 34)),
+            "rainfall_forecast": float(rng.gamma(1.5, 8.0)),
+            "elevation": float(rng.uniform(100, 400)),
+            "planting_date": now - timedelta(days=int(rng.integers(0, 120))),
+        }
+        for _ in range(n_fields)
+    ]
+    return rows, [f"field-{i}" for i in range(n_fields)]
+
+
+async def timed(computer: BatchComputer, rows, field_ids, repeat: int) -> float:
+    # Échauffement : démarrage des processus et import du pipeline
+    await computer.evaluate(rows[: computer.chunk_size * computer.workers], field_ids)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = await computer.evaluate(rows, field_ids)
+        best = min(best, time.perf_counter() - start)
+        assert len(results) == len(rows)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", type=int, default=20000)
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--chunk-size", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows, field_ids = synthetic_fleet(args.fields)
+    print(f"fields={args.fields} chunk={args.chunk_size} cpus={os.cpu_count()} "
+          f"matrix={pack_inputs(rows).nbytes / 1024:.0f} KiB")
+
+    inline = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        evaluate_rows(pack_inputs(rows), field_ids)
+        inline = min(inline, time.perf_counter() - start)
+
+    print(f"{'mode':<14} {'workers':>7} {'fields/s':>12} {'speedup':>8}")
+    print(f"{'inline':<14} {'-':>7} {args.fields / inline:>12.0f} {1.0:>8.2f}")
+    for n_workers in (int(n) for n in args.workers.split(",")):
+        for transport, shm_min_bytes in (("pickle", float("inf")), ("shared_memory", 0)):
+            computer = PooledComputer(n_workers, args.chunk_size, min_rows=0, shm_min_bytes=shm_min_bytes)
+            elapsed = asyncio.run(timed(computer, rows, field_ids, args.repeat))
+            computer.shutdown()
+            print(f"{transport:<14} {n_workers:>7} {args.fields / elapsed:>12.0f} {inline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
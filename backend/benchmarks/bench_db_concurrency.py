@@ -0,0 +1,168 @@
+"""
+Benchmark: débit sous concurrence, session SQLAlchemy synchrone vs asynchrone
+
+Compare deux handlers `async def` identiques (liste des parcelles d'un
+utilisateur) : l'un avec l'ancienne session synchrone (SessionLocal), qui
+bloque la boucle d'événements pendant la requête SQL, l'autre avec
+AsyncSession (aiosqlite / asyncpg).
+
+Avec SQLite, la latence réseau d'un serveur de base de données est simulée
+par --db-latency-ms : une fonction SQL `bench_pause()` exécutée par le driver
+pendant la requête. Avec le driver synchrone elle bloque toute la boucle,
+avec aiosqlite elle ne bloque que le thread de la connexion concernée.
+
+Au-delà de la taille du pool synchrone (SQLITE_POOL_SIZE, ou DB_POOL_SIZE +
+DB_MAX_OVERFLOW), l'ancien schéma se bloque : le handler attend une connexion
+sur la boucle alors que les connexions ne sont rendues qu'à la fermeture de
+session, elle-même planifiée par la boucle (attente de pool_timeout, comptée
+en erreurs).
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --requests 400 --concurrency 8 --db-latency-ms 5
+    DATABASE_URL=postgresql://... python benchmarks/bench_db_concurrency.py --db-latency-ms 0
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+if "DATABASE_URL" not in os.environ:
+    _db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.database import Base, SessionLocal, async_engine, engine, get_async_db, get_db
+from app.models.field import Field
+from app.models.user import User
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    def query(owner_id: str):
+        stmt = select(Field).where(Field.owner_id == owner_id).limit(50)
+        if engine.dialect.name == "sqlite":
+            stmt = stmt.where(select(func.bench_pause()).scalar_subquery() == 0)
+        return stmt
+
+    @app.get("/sync/{owner_id}")
+    async def list_fields_sync(owner_id: str, db: Session = Depends(get_db)):
+        rows = db.execute(query(owner_id)).scalars().all()
+        return {"count": len(rows)}
+
+    @app.get("/async/{owner_id}")
+    async def list_fields_async(owner_id: str, db: AsyncSession = Depends(get_async_db)):
+        result = await db.execute(query(owner_id))
+        return {"count": len(result.scalars().all())}
+
+    return app
+
+
+def seed(n_users: int, fields_per_user: int):
+    Base.metadata.create_all(bind=engine)
+    owners = []
+    with SessionLocal() as db:
+        for u in range(n_users):
+            user = User(id=str(uuid.uuid4()), phone=f"+225{u:08d}", name=f"u{u}", hashed_password="x")
+            db.add(user)
+            owners.append(user.id)
+            for f in range(fields_per_user):
+                db.add(Field(
+                    id=str(uuid.uuid4()), name=f"f{f}", area=1.0, crop_type="riz",
+                    latitude=5.3 + f * 0.001, longitude=-4.0 + u * 0.001, owner_id=user.id
+                ))
+        db.commit()
+    return owners
+
+
+def add_latency(latency_ms: float):
+    """Déclarer bench_pause() sur chaque connexion SQLite (sync et aiosqlite)"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    def pause():
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+        return 0
+
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("bench_pause", 0, pause)
+
+    event.listen(engine, "connect", register)
+    event.listen(async_engine.sync_engine, "connect", register)
+
+
+async def run(app: FastAPI, path: str, owners, n_requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(f"/{path}/{owners[i % len(owners)]}")
+                    response.raise_for_status()
+                except Exception as e:
+                    errors.append(e)
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        # Échauffement (pool de connexions, caches)
+        await asyncio.gather(*(one(i) for i in range(min(concurrency, n_requests))))
+        latencies.clear()
+        errors.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    if not latencies:
+        latencies.append(float("nan"))
+    return {
+        "rps": (n_requests - len(errors)) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--fields-per-user", type=int, default=20)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    add_latency(args.db_latency_ms)
+    owners = seed(args.users, args.fields_per_user)
+    app = build_app()
+
+    print(f"DB: {engine.url.render_as_string(hide_password=True)}  "
+          f"requests={args.requests} concurrency={args.concurrency} latency={args.db_latency_ms}ms")
+    print(f"{'session':<8} {'req/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'errors':>8}")
+    for label in ("sync", "async"):
+        stats = asyncio.run(run(app, label, owners, args.requests, args.concurrency))
+        print(f"{label:<8} {stats['rps']:>10.1f} {stats['p50_ms']:>10.1f} "
+              f"{stats['p95_ms']:>10.1f} {stats['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
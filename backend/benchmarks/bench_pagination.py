@@ -0,0 +1,127 @@
+"""
+Benchmark: latence d'une page, pagination OFFSET vs curseur (keyset)
+
+Remplit une table avec --rows lignes pour un seul utilisateur (pire cas :
+tout le volume dans une seule liste), puis mesure le temps d'une page de
+--limit éléments à différentes profondeurs, avec les requêtes des routes :
+  - alerts     : alertes d'un utilisateur, (created_at, id) décroissant
+  - operations : journal d'une parcelle, (date, id) décroissant
+
+OFFSET croît linéairement avec la profondeur ; le curseur reste constant
+grâce aux index composites (ix_alerts_user_created_id, ix_operations_field_date_id).
+
+Usage:
+    python benchmarks/bench_pagination.py --rows 1000000 --table alerts
+    python benchmarks/bench_pagination.py --rows 1000000 --table operations
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+if "DATABASE_URL" not in os.environ:
+    _db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+from sqlalchemy import insert, select
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import Alert, Field, Operation, User
+from app.utils.pagination import encode_cursor, keyset_paginate
+
+BATCH = 20000
+
+
+def seed(table: str, n_rows: int):
+    Base.metadata.create_all(bind=engine)
+    user_id = str(uuid.uuid4())
+    field_id = str(uuid.uuid4())
+    start = datetime(2020, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(
+            id=user_id, phone=f"+225{uuid.uuid4().int % 10**10}", name="bench",
+            hashed_password="x", is_active=True, created_at=start
+        ))
+        conn.execute(insert(Field).values(
+            id=field_id, name="bench", area=1.0, crop_type="riz", owner_id=user_id,
+            status="active", created_at=start, updated_at=start
+        ))
+
+        for offset in range(0, n_rows, BATCH):
+            size = min(BATCH, n_rows - offset)
+            if table == "alerts":
+                rows = [{
+                    "id": str(uuid.uuid4()), "user_id": user_id, "type": "irrigation",
+                    "title": "Irrigation", "message": "Irriguer la parcelle", "priority": "normal",
+                    "is_read": False, "created_at": start + timedelta(seconds=offset + i),
+                } for i in range(size)]
+                conn.execute(insert(Alert), rows)
+            else:
+                rows = [{
+                    "id": str(uuid.uuid4()), "type": "irrigation", "field_id": field_id,
+                    "date": start + timedelta(minutes=offset + i), "water_amount": 10.0,
+                    "created_at": start, "updated_at": start,
+                } for i in range(size)]
+                conn.execute(insert(Operation), rows)
+
+    return user_id, field_id
+
+
+def page_query(table: str, user_id: str, field_id: str, cursor, limit: int):
+    if table == "alerts":
+        query = select(Alert).where(Alert.user_id == user_id)
+        return keyset_paginate(query, [Alert.created_at, Alert.id], cursor, limit, descending=True), ("created_at", "id")
+    query = select(Operation).where(Operation.field_id == field_id)
+    return keyset_paginate(query, [Operation.date, Operation.id], cursor, limit, descending=True), ("date", "id")
+
+
+def timed(db, query, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        db.execute(query).scalars().all()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--table", choices=("alerts", "operations"), default="alerts")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Remplissage: {args.rows} lignes ({args.table})...")
+    start = time.perf_counter()
+    user_id, field_id = seed(args.table, args.rows)
+    print(f"  {time.perf_counter() - start:.1f}s")
+
+    depths = [d for d in (0, 1_000, 10_000, 100_000, 500_000, args.rows - args.limit - 1) if 0 <= d < args.rows]
+    print(f"{'profondeur':>12} {'offset (ms)':>12} {'curseur (ms)':>13}")
+    with SessionLocal() as db:
+        for depth in sorted(set(depths)):
+            query, key_attrs = page_query(args.table, user_id, field_id, None, args.limit)
+            offset_ms = timed(db, query.offset(depth), args.repeats)
+
+            # Curseur équivalent : clé de la ligne précédant la page (non chronométré)
+            cursor = None
+            if depth:
+                previous = db.execute(query.offset(depth - 1).limit(1)).scalars().first()
+                cursor = encode_cursor([getattr(previous, attr) for attr in key_attrs])
+            keyset_query, _ = page_query(args.table, user_id, field_id, cursor, args.limit)
+            keyset_ms = timed(db, keyset_query, args.repeats)
+
+            print(f"{depth:>12} {offset_ms:>12.2f} {keyset_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
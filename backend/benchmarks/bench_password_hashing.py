@@ -0,0 +1,130 @@
+"""
+Benchmark: bcrypt dans la boucle d'événements vs pool de threads borné
+
+Deux handlers de connexion identiques (vérification bcrypt d'un hash en
+mémoire) : l'un appelle pwd_context.verify directement dans le handler
+`async def` comme les anciennes routes, l'autre passe par password_hasher.
+Pendant la charge de connexions, un client sonde en continu un endpoint
+trivial (/ping) : sa latence montre l'impact sur les autres requêtes.
+
+Le coût bcrypt est fixé par BCRYPT_ROUNDS (10 par défaut ici, 12 en
+production : multiplier les temps par ~4).
+
+Usage:
+    python benchmarks/bench_password_hashing.py --requests 64 --concurrency 16
+    BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=8 python benchmarks/bench_password_hashing.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("BCRYPT_ROUNDS", "10")
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.config import settings
+from app.core.security import password_hasher, pwd_context
+
+PASSWORD = "mot-de-passe"
+
+
+def build_app(hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/inline/login")
+    async def login_inline():
+        if not pwd_context.verify(PASSWORD, hashed):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/pool/login")
+    async def login_pool():
+        valid, _ = await password_hasher.verify_and_update(PASSWORD, hashed)
+        if not valid:
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[max(0, int(len(values) * q) - 1)] * 1000
+
+
+async def run(app: FastAPI, mode: str, n_requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    stop_at = []
+    ping_latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        async def login():
+            async with semaphore:
+                response = await client.post(f"/{mode}/login")
+                response.raise_for_status()
+
+        async def probe():
+            # Une sonde toutes les 10 ms, latence mesurée depuis l'instant prévu :
+            # une boucle bloquée compte pour toutes les sondes qu'elle retarde
+            origin = time.perf_counter()
+            k = 0
+            while True:
+                intended = origin + k * 0.01
+                if stop_at and intended > stop_at[0]:
+                    break
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - intended)
+                k += 1
+
+        prober = asyncio.create_task(probe())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(n_requests)))
+        elapsed = time.perf_counter() - start
+        stop_at.append(start + elapsed)
+        await prober
+
+    return {
+        "rps": n_requests / elapsed,
+        "ping_p50_ms": statistics.median(ping_latencies) * 1000,
+        "ping_p95_ms": percentile(ping_latencies, 0.95),
+        "ping_max_ms": max(ping_latencies) * 1000,
+        "pings": len(ping_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash(PASSWORD)
+    app = build_app(hashed)
+
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS} workers={settings.PASSWORD_HASH_WORKERS} "
+          f"requests={args.requests} concurrency={args.concurrency} cpus={os.cpu_count()}")
+    print(f"{'mode':<8} {'login/s':>10} {'ping p50':>10} {'ping p95':>10} {'ping max':>10} {'pings':>7}")
+    for mode in ("inline", "pool"):
+        stats = asyncio.run(run(app, mode, args.requests, args.concurrency))
+        print(f"{mode:<8} {stats['rps']:>10.1f} {stats['ping_p50_ms']:>10.1f} "
+              f"{stats['ping_p95_ms']:>10.1f} {stats['ping_max_ms']:>10.1f} {stats['pings']:>7}")
+    print(f"pool: {password_hasher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: rapport de saison, somme des opérations en Python vs tables de cumul hebdomadaires
+
+Remplit --fields parcelles d'un même propriétaire (une coopérative) avec
+--ops-per-field opérations réparties sur une saison de 26 semaines, puis
+compare :
+  - scan   : chargement de toutes les opérations de la saison et cumul en Python
+             (ancienne approche des rapports)
+  - rollup : requête de GET /api/operations/season-summary sur operation_weekly_rollups
+
+Usage:
+    python benchmarks/bench_season_summary.py --fields 5000 --ops-per-field 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+if "DATABASE_URL" not in os.environ:
+    _db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import Base, engine
+from app.models import Field, Operation, User
+from app.models.rollup import OperationWeeklyRollup, rebuild_rollups, week_start
+
+SEASON_START = datetime(2026, 3, 2)
+TYPES = ("irrigation", "fertilization", "treatment")
+
+
+def seed(n_fields: int, ops_per_field: int) -> str:
+    Base.metadata.create_all(bind=engine)
+    user_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id=user_id, phone="+2250000000000", name="coop", hashed_password="x"))
+        field_ids = [str(uuid.uuid4()) for _ in range(n_fields)]
+        conn.execute(insert(Field), [
+            {"id": f, "name": "f", "area": 1.0, "crop_type": "riz", "owner_id": user_id} for f in field_ids
+        ])
+        batch = []
+        for f in field_ids:
+            for i in range(ops_per_field):
+                batch.append({
+                    "id": str(uuid.uuid4()), "type": TYPES[i % len(TYPES)], "field_id": f,
+                    "date": SEASON_START + timedelta(hours=i * 26 * 7 * 24 // ops_per_field),
+                    "water_amount": 10.0, "duration": 2.0, "cost": 500.0,
+                })
+                if len(batch) >= 20000:
+                    conn.execute(insert(Operation), batch)
+                    batch.clear()
+        if batch:
+            conn.execute(insert(Operation), batch)
+        rebuild_rollups(conn)
+    return user_id
+
+
+def scan_report(db, user_id: str, end: datetime):
+    totals = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    rows = db.execute(
+        select(Operation).join(Field).where(
+            Field.owner_id == user_id, Operation.date >= SEASON_START, Operation.date <= end
+        )
+    ).scalars().all()
+    for op in rows:
+        total = totals[(op.field_id, op.type)]
+        total[0] += 1
+        total[1] += op.water_amount or 0.0
+        total[2] += op.duration or 0.0
+        total[3] += op.cost or 0.0
+    return len(totals)
+
+
+def rollup_report(db, user_id: str, end: datetime):
+    r = OperationWeeklyRollup
+    rows = db.execute(
+        select(r.field_id, r.op_type, func.sum(r.op_count), func.sum(r.water_amount),
+               func.sum(r.duration), func.sum(r.cost))
+        .join(Field, Field.id == r.field_id)
+        .where(Field.owner_id == user_id, r.week_start >= week_start(SEASON_START), r.week_start <= end.date())
+        .group_by(r.field_id, r.op_type)
+    ).all()
+    return len(rows)
+
+
+def rows_read(db, table, user_id: str) -> int:
+    return db.execute(
+        select(func.count()).select_from(table).join(Field, Field.id == table.field_id)
+        .where(Field.owner_id == user_id)
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", type=int, default=5000)
+    parser.add_argument("--ops-per-field", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Remplissage: {args.fields} parcelles x {args.ops_per_field} opérations...")
+    start = time.perf_counter()
+    user_id = seed(args.fields, args.ops_per_field)
+    print(f"  {time.perf_counter() - start:.1f}s")
+
+    end = SEASON_START + timedelta(weeks=26)
+    print(f"{'méthode':<8} {'temps (ms)':>11} {'lignes rapport':>15} {'lignes lues':>12}")
+    for label, report, table in (("scan", scan_report, Operation), ("rollup", rollup_report, OperationWeeklyRollup)):
+        samples = []
+        with Session(engine) as db:
+            for _ in range(args.repeats):
+                t0 = time.perf_counter()
+                out_rows = report(db, user_id, end)
+                samples.append(time.perf_counter() - t0)
+            read = rows_read(db, table, user_id)
+        print(f"{label:<8} {statistics.median(samples) * 1000:>11.1f} {out_rows:>15} {read:>12}")
+
+
+if __name__ == "__main__":
+    main()
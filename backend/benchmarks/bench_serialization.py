@@ -0,0 +1,142 @@
+"""
+Benchmark: sérialisation JSON (json standard vs orjson) et compression
+
+Pour chaque forme de réponse des séries temporelles (NDVI, pluie, prévisions
+météo, ETP), deux applications identiques servent les mêmes objets Pydantic
+via response_model : l'une avec JSONResponse (json standard), l'autre avec
+ORJSONResponse. Le temps CPU par requête (client compris) est mesuré à travers
+la pile ASGI complète, validation response_model incluse, puis la taille de la
+réponse sans compression, en gzip et en brotli (si installé) via
+CompressionMiddleware, et celle de la représentation colonnes (?format=columnar),
+brute et en gzip.
+
+Usage:
+    python benchmarks/bench_serialization.py --iterations 300 --rainfall-days 365
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import orjson
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.schemas.weather import NDVIPoint, RainfallPoint, WeatherResponse
+from app.services.weather_data import get_simulated_ndvi
+from app.schemas.etp import ETPForecast
+from app.utils.columnar import to_columns
+from app.utils.compression import CompressionMiddleware, brotli
+
+
+def payloads(rainfall_days: int, forecast_days: int):
+    start = date(2025, 1, 1)
+    days = [(start + timedelta(days=i)).isoformat() for i in range(max(rainfall_days, forecast_days))]
+    weather = WeatherResponse(
+        latitude=5.35, longitude=-4.02, timezone="Africa/Abidjan",
+        current={"temperature": 29.1, "humidity": 78.0, "wind_speed": 9.4, "precipitation": 0.0},
+        daily=[{
+            "date": days[i], "temperature_max": 32.4 + i % 3, "temperature_min": 24.1, "temperature_mean": 28.2,
+            "precipitation_sum": 3.2 * (i % 4), "precipitation_probability_max": 65.0, "wind_speed_max": 14.2,
+            "relative_humidity_mean": 81.5, "et0_fao_evapotranspiration": 4.37,
+        } for i in range(forecast_days)],
+    )
+    etp = ETPForecast(
+        field_id="f" * 36, crop_type="riz", planting_date=datetime(2025, 1, 1), days_since_planting=34,
+        current_stage="tallage",
+        data=[{
+            "date": datetime(2025, 2, 4) + timedelta(days=i), "et0": 4.37, "kc": 1.05, "etc": 4.59,
+            "recommended_irrigation": 2.49,
+        } for i in range(forecast_days)],
+        total_water_requirement=73.4, irrigation_efficiency=0.7, adjusted_irrigation=104.9,
+    )
+    return {
+        "ndvi": (List[NDVIPoint], [NDVIPoint(**p) for p in get_simulated_ndvi(datetime.now() - timedelta(days=120))]),
+        "rainfall": (List[RainfallPoint], [
+            RainfallPoint(date=d, precipitation=round(0.37 * (i % 11), 2)) for i, d in enumerate(days[:rainfall_days])
+        ]),
+        "weather": (WeatherResponse, weather),
+        "etp": (ETPForecast, etp),
+    }
+
+
+def columnar_document(value):
+    """Représentation ?format=columnar des routes météo / NDVI"""
+    if isinstance(value, list):
+        return to_columns(value)
+    if isinstance(value, WeatherResponse):
+        return {**value.model_dump(exclude={"daily"}), "daily": to_columns(value.daily)}
+    return {**value.model_dump(exclude={"data"}), "data": to_columns(value.data)}
+
+
+def make_endpoint(value):
+    async def endpoint():
+        return value
+    return endpoint
+
+
+def build_app(data, response_class, compress: bool = False) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+    for name, (model, value) in data.items():
+        app.add_api_route(f"/{name}", make_endpoint(value), response_model=model)
+    if compress:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+async def time_requests(app: FastAPI, path: str, iterations: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(10):
+            (await client.get(path)).raise_for_status()
+        start = time.process_time()
+        for _ in range(iterations):
+            await client.get(path)
+        return (time.process_time() - start) / iterations * 1e6
+
+
+async def response_size(app: FastAPI, path: str, encoding: str) -> int:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path, headers={"Accept-Encoding": encoding})
+        # Taille sur le réseau (corps encore compressé)
+        return len(response.content) if encoding == "identity" else int(response.headers["content-length"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--rainfall-days", type=int, default=365)
+    parser.add_argument("--forecast-days", type=int, default=16)
+    args = parser.parse_args()
+
+    data = payloads(args.rainfall_days, args.forecast_days)
+    apps = {
+        "json": build_app(data, JSONResponse),
+        "orjson": build_app(data, ORJSONResponse),
+    }
+    compressed_app = build_app(data, ORJSONResponse, compress=True)
+
+    print(f"{'endpoint':<10} {'json us':>8} {'orjson us':>10} {'bytes':>8} {'gzip':>8} {'br':>8} "
+          f"{'col.':>8} {'col.gz':>8}")
+    for name in data:
+        path = f"/{name}"
+        cpu = {label: asyncio.run(time_requests(app, path, args.iterations)) for label, app in apps.items()}
+        raw = asyncio.run(response_size(compressed_app, path, "identity"))
+        gz = asyncio.run(response_size(compressed_app, path, "gzip"))
+        br = asyncio.run(response_size(compressed_app, path, "br")) if brotli is not None else "n/a"
+        columnar = orjson.dumps(columnar_document(data[name][1]))
+        print(f"{name:<10} {cpu['json']:>8.0f} {cpu['orjson']:>10.0f} {raw:>8} {gz:>8} {br:>8} "
+              f"{len(columnar):>8} {len(gzip.compress(columnar)):>8}")
+
+
+if __name__ == "__main__":
+    main()
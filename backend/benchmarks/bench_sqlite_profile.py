@@ -0,0 +1,145 @@
+"""
+Benchmark: débit lecture/écriture concurrentes sur SQLite, profil par défaut vs profil de production
+
+Compare deux moteurs sur deux fichiers neufs :
+  - default : create_engine(url) nu (journal rollback, synchronous=FULL, pool par défaut)
+  - tuned   : moteur de l'application (app.db.database : WAL, synchronous=NORMAL,
+              mmap, cache, busy_timeout, pool dimensionné par Settings)
+
+--workers threads exécutent pendant --duration secondes un mélange de
+lectures (parcelles d'un utilisateur + journal d'une parcelle) et
+d'écritures (ajout d'une opération, commit), selon --write-ratio. Les
+écritures passent par l'ORM, donc par le compteur de versions de synchro,
+comme un envoi depuis l'application mobile. Les erreurs comptées sont
+essentiellement des "database is locked".
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py --workers 16 --duration 10 --write-ratio 0.2
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'app.db')}")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, configure_engine, engine_options
+from app.models import Field, Operation, User
+
+
+def build_engine(profile: str):
+    url = f"sqlite:///{os.path.join(_tmp, profile + '.db')}"
+    if profile == "default":
+        return create_engine(url)
+    return configure_engine(create_engine(url, **engine_options(url)))
+
+
+def seed(engine, n_users: int, fields_per_user: int):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    fields = []
+    with Session() as db:
+        for u in range(n_users):
+            user = User(id=str(uuid.uuid4()), phone=f"+225{u:08d}", name=f"u{u}", hashed_password="x")
+            db.add(user)
+            for f in range(fields_per_user):
+                field = Field(id=str(uuid.uuid4()), name=f"f{f}", area=1.0, crop_type="riz", owner_id=user.id)
+                db.add(field)
+                fields.append((user.id, field.id))
+        db.commit()
+    return fields
+
+
+def worker(Session, fields, deadline: float, write_ratio: float, stats: dict, lock: threading.Lock):
+    reads, writes, errors, latencies = 0, 0, 0, []
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        owner_id, field_id = rng.choice(fields)
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                if rng.random() < write_ratio:
+                    db.add(Operation(
+                        id=str(uuid.uuid4()), type="irrigation", date=datetime.utcnow(),
+                        field_id=field_id, water_amount=10.0
+                    ))
+                    db.commit()
+                    writes += 1
+                else:
+                    db.execute(select(Field).where(Field.owner_id == owner_id).limit(50)).scalars().all()
+                    db.execute(
+                        select(Operation).where(Operation.field_id == field_id)
+                        .order_by(Operation.date.desc()).limit(20)
+                    ).scalars().all()
+                    reads += 1
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    with lock:
+        stats["reads"] += reads
+        stats["writes"] += writes
+        stats["errors"] += errors
+        stats["latencies"].extend(latencies)
+
+
+def run(profile: str, args):
+    engine = build_engine(profile)
+    fields = seed(engine, args.users, args.fields_per_user)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    stats = {"reads": 0, "writes": 0, "errors": 0, "latencies": []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(Session, fields, deadline, args.write_ratio, stats, lock))
+        for _ in range(args.workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    latencies = sorted(stats["latencies"]) or [float("nan")]
+    return {
+        "reads_s": stats["reads"] / args.duration,
+        "writes_s": stats["writes"] / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+        "errors": stats["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--fields-per-user", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"workers={args.workers} duration={args.duration}s write_ratio={args.write_ratio}")
+    print(f"{'profil':<8} {'lectures/s':>11} {'écritures/s':>12} {'p50 (ms)':>9} {'p99 (ms)':>9} {'erreurs':>8}")
+    for profile in ("default", "tuned"):
+        stats = run(profile, args)
+        print(f"{profile:<8} {stats['reads_s']:>11.1f} {stats['writes_s']:>12.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: démarrage du worker avec initialisation Earth Engine bloquante vs en arrière-plan
+
+Chaque essai lance un worker uvicorn dans un sous-processus avec un module
+`ee` factice dont l'authentification dure --ee-delay secondes (chargement de
+la clé + aller-retour réseau). Mode "eager" : init_gee() appelé pendant
+l'import des routes, comme avant ; mode "lazy" : warm_up_gee() depuis le
+lifespan. On mesure, depuis le lancement du processus :
+
+- import : durée d'import de l'application ;
+- health : première réponse 200 de /health (le worker accepte le trafic) ;
+- ready : première réponse 200 de /ready avec READY_REQUIRES=database,earth_engine.
+
+Usage:
+    python benchmarks/bench_startup.py --ee-delay 5 --runs 3
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+WORKER = """
+import os, sys, time, types
+started = time.perf_counter()
+sys.path.insert(0, {backend!r})
+
+# Module ee factice : authentification lente
+ee = types.ModuleType("ee")
+ee.ServiceAccountCredentials = lambda *args: None
+ee.Initialize = lambda credentials: time.sleep(float(os.environ["BENCH_EE_DELAY"]))
+sys.modules["ee"] = ee
+
+if os.environ["BENCH_MODE"] == "eager":
+    # Ancien comportement : init_gee() à l'import de app.api.routes.weather
+    from app.services import smi_pipeline
+    smi_pipeline.init_gee()
+
+import main
+from app.db.database import Base, engine
+Base.metadata.create_all(bind=engine)
+print("import_seconds", time.perf_counter() - started, flush=True)
+
+import uvicorn
+uvicorn.run(main.app, host="127.0.0.1", port=int(os.environ["BENCH_PORT"]), log_level="warning")
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(url)
+
+
+def run_once(mode: str, ee_delay: float, workdir: str) -> dict:
+    port = free_port()
+    env = {
+        **os.environ,
+        "BENCH_MODE": mode,
+        "BENCH_EE_DELAY": str(ee_delay),
+        "BENCH_PORT": str(port),
+        "DATABASE_URL": f"sqlite:///{workdir}/bench_startup.db",
+        "ALERT_ENGINE_ENABLED": "false",
+        "SCHEDULER_ENABLED": "false",
+        "READY_REQUIRES": json.dumps(["database", "earth_engine"]),
+    }
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", WORKER.format(backend=BACKEND)],
+        cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        line = ""
+        while not line.startswith("import_seconds"):  # ignorer les logs de démarrage
+            line = process.stdout.readline()
+        import_seconds = float(line.split()[1])
+        base = f"http://127.0.0.1:{port}"
+        health = wait_for(f"{base}/health", started, ee_delay + 60)
+        ready = wait_for(f"{base}/ready", started, ee_delay + 60)
+    finally:
+        process.terminate()
+        process.wait()
+    return {"import": import_seconds, "health": health, "ready": ready}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ee-delay", type=float, default=5.0, help="durée de l'authentification EE simulée (s)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Clé présente : init_gee() tente l'authentification
+        with open(os.path.join(workdir, "gee-service-account.json"), "w") as key:
+            key.write("{}")
+
+        print(f"Authentification EE simulée: {args.ee_delay:g}s, {args.runs} essais (médianes)\n")
+        print(f"{'mode':<8}{'import (s)':>12}{'/health (s)':>13}{'/ready (s)':>12}")
+        for mode in ("eager", "lazy"):
+            runs = [run_once(mode, args.ee_delay, workdir) for _ in range(args.runs)]
+            print(
+                f"{mode:<8}"
+                f"{statistics.median(r['import'] for r in runs):>12.2f}"
+                f"{statistics.median(r['health'] for r in runs):>13.2f}"
+                f"{statistics.median(r['ready'] for r in runs):>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
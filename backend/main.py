@@ -2,17 +2,58 @@
 SIGIR - Système d'Information pour la Gestion de l'Irrigation du Riz
 Main FastAPI application
 """
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.routes import auth, users, fields, weather, etp
-# TODO: Créer models Operation et Alert avant d'activer ces routes
-# from app.api.routes import operations, alerts
+from app.core.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
+from app.core.tracing import TracingMiddleware, trace_exporter
+from app.core.security import password_hasher
+from app.api.routes import auth, users, fields, dashboard, weather, etp, operations, alerts, sync, analytics, events
+from app.services.batch_compute import batch_computer
+from app.services.cache import upstream_cache
+from app.services.pubsub import broker
+from app.services import jobs  # noqa: F401 (déclaration des tâches planifiées)
+from app.services.scheduler import scheduler
+from app.services.readiness import PENDING, readiness
+from app.services.smi_pipeline import smi_pipeline, warm_up_gee
+from app.services.spatial_index import warm_up_spatial_index
+from app.utils.compression import CompressionMiddleware
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tâches de fond : préchauffage sans bloquer l'acceptation du trafic (cf. /ready)
+    for name in ("earth_engine", "spatial_index"):
+        readiness.update(name, PENDING)
+    tasks = [
+        asyncio.create_task(warm_up_gee()),
+        asyncio.create_task(warm_up_spatial_index()),
+    ]
+    if settings.SCHEDULER_ENABLED:
+        # Moteur d'alertes, préchargement des prévisions, scènes Sentinel-2 (app.services.jobs)
+        tasks.append(asyncio.create_task(scheduler.run_forever()))
+    if trace_exporter.enabled:
+        tasks.append(asyncio.create_task(trace_exporter.run_forever()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await scheduler.shutdown()
+    await broker.close()
+    await upstream_cache.close()
+    password_hasher.executor.shutdown(wait=False)
+    smi_pipeline.download_executor.shutdown(wait=False, cancel_futures=True)
+    batch_computer.shutdown()
 
 app = FastAPI(
     title="SIGIR API",
     description="API pour la gestion de l'irrigation du riz en Côte d'Ivoire",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -22,16 +63,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
 )
+app.add_middleware(TracingMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+# En dernier : le plus externe, la latence inclut CORS et compression
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(fields.router, prefix="/api/fields", tags=["Fields"])
-# app.include_router(operations.router, prefix="/api/operations", tags=["Operations"])  # TODO
+app.include_router(dashboard.router, prefix="/api/fields", tags=["Fields"])
+app.include_router(operations.router, prefix="/api/operations", tags=["Operations"])
 app.include_router(weather.router, prefix="/api/weather", tags=["Weather"])
-# app.include_router(alerts.router, prefix="/api/alerts", tags=["Alerts"])  # TODO
+app.include_router(alerts.router, prefix="/api/alerts", tags=["Alerts"])
 app.include_router(etp.router, prefix="/api/etp", tags=["Evapotranspiration"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
 
 @app.get("/")
 async def root():
@@ -43,7 +98,26 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "password_hashing": password_hasher.stats(),
+        "upstream_cache": upstream_cache.stats(),
+        "scheduler": scheduler.stats(),
+        "trace_export": trace_exporter.stats(),
+    }
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Dépendances préchauffées ; 503 tant qu'une dépendance de READY_REQUIRES ne l'est pas"""
+    report = await readiness.check()
+    if not report["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques Prometheus (format texte)"""
+    return Response(render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
 if __name__ == "__main__":
     import uvicorn
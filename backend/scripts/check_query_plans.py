@@ -0,0 +1,193 @@
+"""
+Vérification des plans de requête des routes (régression d'index)
+
+Crée une base SQLite temporaire par les migrations Alembic (alembic upgrade
+head), la remplit, lance ANALYZE, puis appelle chaque route avec le client
+de test FastAPI. Toutes les requêtes SQL émises par la route sont capturées
+et passées à EXPLAIN QUERY PLAN : un parcours complet de table ou d'index
+("SCAN <table>" sans condition de recherche) fait échouer le script (code de
+sortie 1), sauf exception déclarée dans ALLOWED_SCANS.
+
+Usage (depuis backend/):
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --users 2000 --verbose
+    python scripts/check_query_plans.py --revision 0002   # avant la suite d'index
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+_db_file = os.path.join(tempfile.mkdtemp(), "plans.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+
+from app.core.security import create_access_token
+from app.db.database import Base, async_engine, engine
+from app.models import Alert, Field, Operation, User
+from app.models.alert_counter import rebuild_alert_counters
+from app.models.rollup import rebuild_rollups
+from main import app
+
+# Parcours complets assumés : (route, table)
+ALLOWED_SCANS = {
+    ("fields_map", "fields"),  # chargement unique de l'index spatial en mémoire
+    ("users_list", "users"),  # parcours ordonné de ix_users_created_id, arrêté par LIMIT
+}
+
+# "SCAN t" ou "SCAN t USING [COVERING] INDEX i" sans condition : toute la table est lue
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+def migrate(revision: str):
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def seed(n_users: int, fields_per_user: int, ops_per_field: int, alerts_per_user: int):
+    start = datetime(2025, 1, 1)
+    users, fields, operations, alerts = [], [], [], []
+    for u in range(n_users):
+        user_id = str(uuid.uuid4())
+        users.append({
+            "id": user_id, "phone": f"+225{u:010d}", "name": f"u{u}", "hashed_password": "x",
+            "is_active": True, "created_at": start + timedelta(minutes=u),
+        })
+        for f in range(fields_per_user):
+            field_id = str(uuid.uuid4())
+            fields.append({
+                "id": field_id, "name": f"f{f}", "area": 1.0, "crop_type": "riz", "owner_id": user_id,
+                "latitude": 5.0 + u * 0.001, "longitude": -5.0 + f * 0.001, "status": "active",
+                "version": u + 1, "created_at": start + timedelta(minutes=u, seconds=f),
+            })
+            operations.extend({
+                "id": str(uuid.uuid4()), "type": "irrigation", "field_id": field_id,
+                "date": start + timedelta(days=o), "water_amount": 10.0, "version": u + 1,
+            } for o in range(ops_per_field))
+        alerts.extend({
+            "id": str(uuid.uuid4()), "user_id": user_id, "type": "irrigation", "title": "t",
+            "message": "m", "priority": "normal", "is_read": a % 3 == 0, "version": u + 1,
+            "created_at": start + timedelta(hours=a),
+        } for a in range(alerts_per_user))
+
+    with engine.begin() as conn:
+        for model, rows in ((User, users), (Field, fields), (Operation, operations), (Alert, alerts)):
+            conn.execute(insert(model), rows)
+        rebuild_rollups(conn)  # insertions en masse : hors des hooks de session
+        rebuild_alert_counters(conn)
+        conn.execute(text("ANALYZE"))
+    return users[len(users) // 2]["id"], [f for f in fields if f["owner_id"] == users[len(users) // 2]["id"]]
+
+
+def route_cases(field_ids, operation_id, alert_id):
+    """(nom, méthode, chemin, paramètres / corps)"""
+    field_id = field_ids[0]
+    return [
+        ("auth_me", "GET", "/api/auth/me", None),
+        ("fields_list", "GET", "/api/fields/", {"limit": 20}),
+        ("fields_get", "GET", f"/api/fields/{field_id}", None),
+        ("fields_map", "GET", "/api/fields/map", {"latitude": 5.0, "longitude": -5.0, "radius_m": 5000}),
+        ("fields_groups", "GET", "/api/fields/groups", {"key": "grid_cell"}),
+        ("operations_list", "GET", "/api/operations/", {"limit": 20}),
+        ("operations_by_field", "GET", "/api/operations/", {"field_id": field_id, "limit": 20}),
+        ("operations_season", "GET", "/api/operations/season-summary", {"start": "2025-01-01", "weekly": True}),
+        ("analytics_efficiency", "GET", "/api/analytics/water-efficiency", {"start": "2025-01-01"}),
+        ("analytics_efficiency_weekly", "GET", "/api/analytics/water-efficiency", {"start": "2025-01-01", "weekly": True}),
+        ("operations_get", "GET", f"/api/operations/{operation_id}", None),
+        ("alerts_list", "GET", "/api/alerts/", {"limit": 20}),
+        ("alerts_unread", "GET", "/api/alerts/", {"unread_only": True, "limit": 20}),
+        ("alerts_get", "GET", f"/api/alerts/{alert_id}", None),
+        ("alerts_unread_count", "GET", "/api/alerts/unread-count", None),
+        ("users_list", "GET", "/api/users/", {"limit": 20}),
+        ("sync_pull", "GET", "/api/sync/pull", {"since": 0, "limit": 50}),
+        ("fields_update", "PUT", f"/api/fields/{field_ids[1]}", {"name": "renamed"}),
+        ("alerts_mark_read", "PATCH", f"/api/alerts/{alert_id}", {"is_read": True}),
+        ("operations_delete", "DELETE", f"/api/operations/{operation_id}", None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--fields-per-user", type=int, default=4)
+    parser.add_argument("--ops-per-field", type=int, default=10)
+    parser.add_argument("--alerts-per-user", type=int, default=10)
+    parser.add_argument("--revision", default="head", help="révision Alembic à vérifier")
+    parser.add_argument("--verbose", action="store_true", help="afficher tous les plans")
+    args = parser.parse_args()
+
+    migrate(args.revision)
+    user_id, user_fields = seed(args.users, args.fields_per_user, args.ops_per_field, args.alerts_per_user)
+    field_ids = [f["id"] for f in user_fields]
+    with engine.connect() as conn:
+        operation_id = conn.execute(
+            text("SELECT id FROM operations WHERE field_id = :f LIMIT 1"), {"f": field_ids[0]}
+        ).scalar()
+        alert_id = conn.execute(text("SELECT id FROM alerts WHERE user_id = :u LIMIT 1"), {"u": user_id}).scalar()
+
+    captured = []
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")) and not executemany:
+            captured.append((statement, parameters))
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    failures = 0
+
+    for name, method, path, payload in route_cases(field_ids, operation_id, alert_id):
+        captured.clear()
+        if method == "GET":
+            response = client.get(path, params=payload, headers=headers)
+        else:
+            response = client.request(method, path, json=payload, headers=headers)
+        if response.status_code >= 400:
+            print(f"ERREUR {name}: HTTP {response.status_code} {response.text[:200]}")
+            failures += 1
+            continue
+
+        scans = []
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters)).all()
+                details = [row[-1] for row in plan]
+                for detail in details:
+                    match = FULL_SCAN.match(detail)
+                    # Les CTE / sous-requêtes matérialisées ne sont pas des tables
+                    if match and match.group(1) in Base.metadata.tables and (name, match.group(1)) not in ALLOWED_SCANS:
+                        scans.append((match.group(1), statement))
+                if args.verbose:
+                    print(f"  [{name}] {' '.join(statement.split())[:120]}")
+                    for detail in details:
+                        print(f"      {detail}")
+
+        status = "OK" if not scans else "SCAN"
+        print(f"{status:<5} {name:<28} {len(captured)} requête(s)")
+        for table, statement in scans:
+            failures += 1
+            print(f"      parcours complet de '{table}': {' '.join(statement.split())[:160]}")
+
+    if failures:
+        print(f"\n{failures} problème(s) de plan de requête")
+        sys.exit(1)
+    print("\nAucun parcours complet de table")
+
+
+if __name__ == "__main__":
+    main()
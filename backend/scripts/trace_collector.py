@@ -0,0 +1,100 @@
+"""
+Collecteur de traces local (remplaçant d'un vrai collecteur pour le développement)
+
+Reçoit les lots envoyés par l'API (POST {"traces": [...]}, cf.
+app.core.tracing), les ajoute à un fichier JSON lines et affiche
+périodiquement, par route, la latence p50 / p95 et le temps moyen passé
+dans chaque étape (ee, nasa_power, open_meteo, elevation, compute, db...).
+
+Usage (depuis backend/):
+    python scripts/trace_collector.py --port 4319 --output traces.jsonl
+    TRACE_EXPORT_URL=http://localhost:4319/traces uvicorn main:app
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+lock = threading.Lock()
+durations = defaultdict(list)  # route -> durées totales (ms)
+stage_totals = defaultdict(lambda: defaultdict(float))  # route -> étape -> cumul (ms)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[max(0, int(len(values) * q + 0.5) - 1)]
+
+
+def ingest(trace):
+    with lock:
+        durations[trace["name"]].append(trace["duration_ms"])
+        stages = stage_totals[trace["name"]]
+        for item in trace["spans"]:
+            if item["duration_ms"] is not None:
+                stages[item["name"]] += item["duration_ms"]
+        stages["db"] += trace["db"]["duration_ms"]
+
+
+def report():
+    with lock:
+        for route, values in sorted(durations.items()):
+            count = len(values)
+            stages = ", ".join(
+                f"{name}={total / count:.0f}"
+                for name, total in sorted(stage_totals[route].items(), key=lambda item: -item[1])
+                if total
+            )
+            print(f"{route:<45} n={count:<5} p50={percentile(values, 0.5):>7.0f}ms "
+                  f"p95={percentile(values, 0.95):>7.0f}ms  [{stages}]")
+        print()
+
+
+def make_handler(output):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                traces = json.loads(body)["traces"]
+            except (ValueError, KeyError):
+                self.send_response(400)
+                self.end_headers()
+                return
+            for trace in traces:
+                ingest(trace)
+            if output:
+                with lock, open(output, "a") as f:
+                    f.writelines(json.dumps(trace) + "\n" for trace in traces)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4319)
+    parser.add_argument("--output", default="", help="fichier JSON lines (vide = pas d'écriture)")
+    parser.add_argument("--report-every", type=float, default=30, help="secondes entre deux résumés")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.output))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Collecteur de traces sur http://{args.host}:{args.port}/traces")
+    try:
+        while True:
+            time.sleep(args.report_every)
+            report()
+    except KeyboardInterrupt:
+        report()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
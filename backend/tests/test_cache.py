@@ -0,0 +1,203 @@
+"""
+Tests du cache amont à niveaux (app.services.cache)
+
+Redis est remplacé par FakeRedis, un stand-in en mémoire qui implémente
+les commandes utilisées (GET, SET EX/PX NX, DEL) avec expiration.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import MemoryCache, RedisCache, TieredCache, decode, encode
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, px=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        if isinstance(value, str):
+            value = value.encode()
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+class BrokenRedis:
+    async def _fail(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    get = set = delete = _fail
+
+    async def aclose(self):
+        pass
+
+
+class CountingLoader:
+    def __init__(self, value, delay=0.05):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+def worker_cache(redis) -> TieredCache:
+    """Un worker : LRU en mémoire propre + Redis partagé"""
+    return TieredCache([MemoryCache(1024 ** 2), RedisCache(redis)], lock_seconds=5)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_in_one_process_load_once():
+    cache = TieredCache([MemoryCache(1024 ** 2)])
+    loader = CountingLoader({"rain": 12.5})
+
+    results = await asyncio.gather(*(cache.get_or_set("k", 60, loader) for _ in range(10)))
+
+    assert results == [{"rain": 12.5}] * 10
+    assert loader.calls == 1
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_share_one_load_through_redis_lock():
+    redis = FakeRedis()
+    first, second = worker_cache(redis), worker_cache(redis)
+    loader = CountingLoader([1, 2, 3], delay=0.2)
+
+    results = await asyncio.gather(first.get_or_set("k", 60, loader), second.get_or_set("k", 60, loader))
+
+    assert results == [[1, 2, 3], [1, 2, 3]]
+    assert loader.calls == 1
+    # Verrou libéré après le chargement
+    assert await redis.get(RedisCache.prefix + "lock:k") is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_load():
+    cache = TieredCache([MemoryCache(1024 ** 2)])
+    loader = CountingLoader("ok", delay=0.1)
+
+    impatient = asyncio.create_task(cache.get_or_set("k", 60, loader))
+    patient = asyncio.create_task(cache.get_or_set("k", 60, loader))
+    await asyncio.sleep(0.01)
+    impatient.cancel()
+
+    assert await patient == "ok"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_released_only_by_owner():
+    tier = RedisCache(FakeRedis())
+    token = await tier.acquire("k", 5)
+    assert token is not None
+    assert await tier.acquire("k", 5) is None
+
+    await tier.release("k", "not-the-owner")
+    assert await tier.acquire("k", 5) is None
+
+    await tier.release("k", token)
+    assert await tier.acquire("k", 5) is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_is_not_released_by_previous_owner():
+    tier = RedisCache(FakeRedis())
+    stale = await tier.acquire("k", 0.01)
+    await asyncio.sleep(0.02)
+    current = await tier.acquire("k", 5)
+    assert current is not None
+
+    await tier.release("k", stale)
+    assert await tier.acquire("k", 5) is None
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_degrades_to_cache_miss():
+    cache = TieredCache([MemoryCache(1024 ** 2), RedisCache(BrokenRedis())])
+    loader = CountingLoader(42, delay=0)
+
+    assert await cache.get("k") is None
+    assert await cache.get_or_set("k", 60, loader) == 42
+    assert loader.calls == 1
+    # Toujours servi par le niveau mémoire
+    assert await cache.get_or_set("k", 60, loader) == 42
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_hit_in_slow_tier_is_promoted_with_remaining_ttl():
+    redis = FakeRedis()
+    await worker_cache(redis).set("k", "forecast", 60)
+
+    memory = MemoryCache(1024 ** 2)
+    cache = TieredCache([memory, RedisCache(redis)])
+    assert await cache.get("k") == "forecast"
+
+    expires_at, value = decode(await memory.get("k"))
+    assert value == "forecast"
+    assert 0 < expires_at - time.time() <= 60
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_deleted_and_reloaded():
+    memory = MemoryCache(1024 ** 2)
+    await memory.set("k", encode("old", time.time() - 1), 60)
+    cache = TieredCache([memory])
+    loader = CountingLoader("new", delay=0)
+
+    assert await cache.get("k") is None
+    assert await memory.get("k") is None
+    assert await cache.get_or_set("k", 60, loader) == "new"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_none_is_never_cached():
+    redis = FakeRedis()
+    cache = worker_cache(redis)
+    loader = CountingLoader(None, delay=0)
+
+    assert await cache.get_or_set("k", 60, loader) is None
+    assert await cache.get_or_set("k", 60, loader) is None
+    assert loader.calls == 2
+    assert RedisCache.prefix + "k" not in redis.data
+
+
+@pytest.mark.asyncio
+async def test_failed_load_releases_lock_and_is_not_cached():
+    redis = FakeRedis()
+    cache = worker_cache(redis)
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_set("k", 60, failing)
+    assert await redis.get(RedisCache.prefix + "lock:k") is None
+    assert await cache.get_or_set("k", 60, CountingLoader("ok", delay=0)) == "ok"